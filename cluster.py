@@ -0,0 +1,140 @@
+# cluster.py — run PrimeBot as several processes, each owning a range of shards.
+#
+#   python cluster.py --clusters 4                  # shard count from Discord's recommendation
+#   python cluster.py --clusters 2 --shards 8
+#   python cluster.py --clusters 3 --shards 12 --dry-run
+#   python cluster.py --clusters 2 --shards 4 --worker scripts/stub_worker.py   # local test, no gateway
+#
+# Every worker is a normal `main.py` process (its own setup_hook, cogs and DB
+# connection) started with CLUSTER_ID / SHARD_IDS / SHARD_COUNT in its env.
+# Crashed workers are restarted with backoff; a clean exit stops that cluster.
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def plan_clusters(shard_count: int, cluster_count: int) -> list:
+    """Split shards 0..shard_count-1 into contiguous, near-equal ranges."""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    base, extra = divmod(shard_count, cluster_count)
+    plan, start = [], 0
+    for cluster_id in range(cluster_count):
+        size = base + (1 if cluster_id < extra else 0)
+        plan.append(list(range(start, start + size)))
+        start += size
+    return plan
+
+
+async def recommended_shards(token: str) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+    return data["shards"]
+
+
+class Cluster:
+    def __init__(self, cluster_id: int, shard_ids: list, shard_count: int, worker: str):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.worker = worker
+        self.process = None
+        self.restarts = 0
+        self.started_at = None
+        self.stopping = False
+
+    def env(self) -> dict:
+        env = dict(os.environ)
+        env.update({
+            "CLUSTER_ID": str(self.cluster_id),
+            "SHARD_IDS": ",".join(map(str, self.shard_ids)),
+            "SHARD_COUNT": str(self.shard_count),
+            "PYTHONUNBUFFERED": "1",
+        })
+        return env
+
+    async def _pipe(self, stream):
+        prefix = f"[cluster {self.cluster_id}] "
+        async for line in stream:
+            sys.stdout.write(prefix + line.decode("utf-8", "replace"))
+            sys.stdout.flush()
+
+    async def run(self):
+        while not self.stopping:
+            self.started_at = time.monotonic()
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, self.worker,
+                env=self.env(),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            print(f"🚀 Cluster {self.cluster_id} started (pid {self.process.pid}, shards {self.shard_ids})")
+            await self._pipe(self.process.stdout)
+            code = await self.process.wait()
+            if self.stopping or code == 0:
+                print(f"⏹️ Cluster {self.cluster_id} exited (code {code})")
+                return
+
+            # reset the backoff once a worker has stayed up for a while
+            if time.monotonic() - self.started_at > 300:
+                self.restarts = 0
+            delay = min(60, 2 ** self.restarts)
+            self.restarts += 1
+            print(f"💥 Cluster {self.cluster_id} crashed (code {code}), restart #{self.restarts} in {delay}s")
+            await asyncio.sleep(delay)
+
+    def terminate(self):
+        self.stopping = True
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+
+
+async def launch(args):
+    shard_count = args.shards or await recommended_shards(os.getenv("DISCORD_TOKEN"))
+    plan = plan_clusters(shard_count, args.clusters)
+    print(f"🧩 {shard_count} shards across {len(plan)} clusters")
+    for cluster_id, shard_ids in enumerate(plan):
+        print(f"   cluster {cluster_id}: shards {shard_ids}")
+    if args.dry_run:
+        return
+
+    clusters = [Cluster(i, shard_ids, shard_count, args.worker) for i, shard_ids in enumerate(plan)]
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, lambda: [c.terminate() for c in clusters])
+        except NotImplementedError:  # Windows
+            pass
+
+    tasks = []
+    for cluster in clusters:
+        tasks.append(asyncio.create_task(cluster.run()))
+        # Discord allows one IDENTIFY per 5s per bucket; stagger process start-up
+        await asyncio.sleep(args.stagger)
+    await asyncio.gather(*tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run PrimeBot as multiple shard clusters.")
+    parser.add_argument("--clusters", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--shards", type=int, default=0, help="total shard count (default: Discord's recommendation)")
+    parser.add_argument("--worker", default="main.py", help="script each cluster runs")
+    parser.add_argument("--stagger", type=float, default=5.0, help="seconds between cluster start-ups")
+    parser.add_argument("--dry-run", action="store_true", help="print the shard plan and exit")
+    asyncio.run(launch(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,44 +2,120 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import timedelta
-import datetime, re
+import datetime, re, time
+from utils.warns import WarnStore
+from utils.executor import ActionExecutor
+from utils.actions import ActionError, ModActionPipeline
+from utils.purge import PurgeFilter, run_purge
+from utils.bans import BanIndex
+from utils.spam import SpamTracker
+from utils.scheduler import parse_duration
+from utils import links, metrics
+
+MASS_ACTION_LIMIT = 1000
+MAX_TIMEOUT_MINUTES = 28 * 24 * 60  # Discord's timeout cap
+MAX_MUTE_MINUTES = 365 * 24 * 60  # longer mutes are chained through the scheduler
+WARNS_PER_PAGE = 10
+WARN_TIMEOUT_THRESHOLD = 3  # active warns that trigger the 24h timeout
+MAX_WARN_EXPIRY_DAYS = 365
+SPAM_REASONS = {
+    "flood": "Sending messages too quickly.",
+    "mentions": "Mentioning too many users or roles.",
+    "duplicates": "Repeating the same message.",
+}
+USER_ID_RE = re.compile(r"<@!?(\d{15,20})>|\b(\d{15,20})\b")
+
+class WarningsView(discord.ui.View):
+    """Pages through a user's warnings, fetching one page per click."""
+
+    def __init__(self, warn_store: WarnStore, author_id: int, guild_id: int, member: discord.Member):
+        super().__init__(timeout=180)
+        self.warn_store = warn_store
+        self.author_id = author_id
+        self.guild_id = guild_id
+        self.member = member
+        self.page = 0
+        self.total = 0
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // WARNS_PER_PAGE))
+
+    async def load_total(self) -> int:
+        self.total = await self.warn_store.count(self.guild_id, self.member.id)
+        return self.total
+
+    async def render(self) -> discord.Embed:
+        warns = await self.warn_store.page(self.guild_id, self.member.id, self.page, WARNS_PER_PAGE)
+        msg = "\n".join(f"**{w['number']}**. {w['reason']} - <@{w['moderator']}> ({w['time'].strftime('%Y-%m-%d')})" for w in warns)
+        self.previous.disabled = self.page == 0
+        self.next.disabled = self.page >= self.pages - 1
+        embed = discord.Embed(title=f"⚠️ Warnings for {self.member}", description=msg[:4096] or "No warnings on this page.", color=discord.Color.orange())
+        embed.set_footer(text=f"Page {self.page + 1}/{self.pages} • {self.total} warnings")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    async def turn(self, interaction: discord.Interaction, step: int):
+        await self.load_total()
+        self.page = min(max(0, self.page + step), self.pages - 1)
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn(interaction, -1)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn(interaction, 1)
+
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = bot.db  # MongoDB client injected from main.py
+        self.db = bot.db  # shared Database from main.py
+        self.warn_store = WarnStore(self.db.warns, self.db.warn_entries)
+        self.executor = ActionExecutor()
+        self.actions = ModActionPipeline()
+        self.ban_index = BanIndex()
+        self.spam = SpamTracker()
+
+    async def cog_load(self):
+        self.bot.scheduler.register("unban", self.scheduled_unban)
+        self.bot.scheduler.register("timeout", self.scheduled_timeout)
+        if self.bot.cluster_id == 0:
+            # one cluster is enough to sweep the shared collection
+            self.warn_store.start()
+        self.bot.pipeline.register("link_filter", self.link_filter, order=10)
+        self.bot.pipeline.register("spam_filter", self.spam_filter, order=20)
+
+    async def cog_unload(self):
+        self.bot.pipeline.unregister("link_filter")
+        self.bot.pipeline.unregister("spam_filter")
+        await self.warn_store.close()
 
     # ==================================================
     # Helper functions
     # ==================================================
-    async def get_logs_channel(self, guild):
-        guild_data = await self.db.guilds.find_one({"guild_id": guild.id})
-        if guild_data and "mod_logs_channel" in guild_data:
-            return guild.get_channel(guild_data["mod_logs_channel"])
-        return None
-
-    async def link_blocker_enabled(self, guild_id: int):
-        guild_data = await self.db.guilds.find_one({"guild_id": guild_id})
-        return guild_data and guild_data.get("link_blocker", False)
-
-    async def get_warns(self, guild_id: int, user_id: int):
-        data = await self.db.warns.find_one({"guild_id": guild_id, "user_id": user_id})
-        return data["warns"] if data else []
+    async def send_mod_log(self, guild, embed: discord.Embed):
+        """Queue an embed for the guild's mod log channel, if one is set."""
+        guild_data = await self.bot.guild_cache.get(guild.id)
+        if guild_data.get("mod_logs_channel"):
+            self.bot.logs.enqueue(guild_data["mod_logs_channel"], embed=embed)
 
     async def add_warn(self, guild_id: int, user_id: int, reason: str, moderator_id: int):
-        warns = await self.get_warns(guild_id, user_id)
-        warn_number = len(warns) + 1
-        await self.db.warns.update_one(
-            {"guild_id": guild_id, "user_id": user_id},
-            {"$push": {"warns": {
-                "number": warn_number,
-                "reason": reason,
-                "moderator": moderator_id,
-                "time": datetime.datetime.utcnow()
-            }}},
-            upsert=True
-        )
-        return warn_number
+        """Store a warn; returns (warn number, active warns) so escalation ignores expired ones."""
+        guild_data = await self.bot.guild_cache.get(guild_id)
+        number = await self.warn_store.add(guild_id, user_id, reason, moderator_id, guild_data.get("warn_expiry_days", 0))
+        return number, await self.warn_store.count_active(guild_id, user_id)
+
+    async def escalate(self, member: discord.Member, active: int):
+        """Time the member out once their active warns reach the threshold."""
+        if active < WARN_TIMEOUT_THRESHOLD:
+            return
+        await member.timeout(timedelta(hours=24), reason=f"Reached {WARN_TIMEOUT_THRESHOLD} active warnings")
+        self.bot.dms.send(member, f"⏰ You’ve been timed out for **24 hours** due to reaching {WARN_TIMEOUT_THRESHOLD} warnings.")
 
     # ==================================================
     # Core moderation commands
@@ -47,84 +123,200 @@ class Moderation(commands.Cog):
     @app_commands.command(name="kick", description="Kick a user from the server.")
     @commands.has_permissions(kick_members=True)
     async def kick(self, interaction: discord.Interaction, member: discord.Member, *, reason: str = "No reason provided"):
-        await member.kick(reason=reason)
-        await interaction.response.send_message(f"👢 Kicked {member.mention}. Reason: {reason}", ephemeral=True)
-        try:
-            await member.send(f"You were kicked from **{interaction.guild.name}**. Reason: {reason}")
-        except:
-            pass
-
-        log = await self.get_logs_channel(interaction.guild)
-        if log:
-            await log.send(embed=discord.Embed(
-                title="👢 Member Kicked",
-                description=f"**User:** {member.mention}\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}",
-                color=discord.Color.orange(),
-                timestamp=datetime.datetime.utcnow()
-            ))
+        await self.actions.run(
+            interaction,
+            lambda: member.kick(reason=reason),
+            lambda _: f"👢 Kicked {member.mention}. Reason: {reason}",
+            {
+                "dm": lambda _: self.bot.dms.send(member, f"You were kicked from **{interaction.guild.name}**. Reason: {reason}", remember_closed=False),
+                "mod_log": lambda _: self.send_mod_log(interaction.guild, discord.Embed(
+                    title="👢 Member Kicked",
+                    description=f"**User:** {member.mention}\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}",
+                    color=discord.Color.orange(),
+                    timestamp=datetime.datetime.utcnow()
+                )),
+            }
+        )
 
     @app_commands.command(name="ban", description="Ban a user from the server.")
     @commands.has_permissions(ban_members=True)
     async def ban(self, interaction: discord.Interaction, member: discord.Member, *, reason: str = "No reason provided"):
-        await member.ban(reason=reason)
-        await interaction.response.send_message(f"🔨 Banned {member.mention}. Reason: {reason}", ephemeral=True)
+        await self.actions.run(
+            interaction,
+            lambda: member.ban(reason=reason),
+            lambda _: f"🔨 Banned {member.mention}. Reason: {reason}",
+            {
+                "dm": lambda _: self.bot.dms.send(member, f"You were banned from **{interaction.guild.name}**. Reason: {reason}", remember_closed=False),
+                "mod_log": lambda _: self.send_mod_log(interaction.guild, discord.Embed(
+                    title="🔨 Member Banned",
+                    description=f"**User:** {member.mention}\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}",
+                    color=discord.Color.red(),
+                    timestamp=datetime.datetime.utcnow()
+                )),
+            }
+        )
+
+    @app_commands.command(name="tempban", description="Ban a user for a while (e.g. 12h, 7d, 2w).")
+    @app_commands.default_permissions(ban_members=True)
+    @app_commands.checks.has_permissions(ban_members=True)
+    async def tempban(self, interaction: discord.Interaction, member: discord.Member, duration: str, *, reason: str = "No reason provided"):
         try:
-            await member.send(f"You were banned from **{interaction.guild.name}**. Reason: {reason}")
-        except:
-            pass
+            length = parse_duration(duration)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+        until = datetime.datetime.utcnow() + length
+
+        async def action():
+            # store the unban first: a ban whose unban failed to save would never be lifted
+            key = await self.bot.scheduler.schedule("unban", interaction.guild.id, member.id, until)
+            try:
+                await member.ban(reason=f"{reason} (temporary, {duration})")
+            except Exception:
+                await self.bot.scheduler.cancel(key)
+                raise
+
+        await self.actions.run(
+            interaction,
+            action,
+            lambda _: f"⏳ Banned {member.mention} for {duration}. Reason: {reason}",
+            {
+                "dm": lambda _: self.bot.dms.send(member, f"You were banned from **{interaction.guild.name}** for {duration}. Reason: {reason}", remember_closed=False),
+                "mod_log": lambda _: self.send_mod_log(interaction.guild, discord.Embed(
+                    title="⏳ Member Temporarily Banned",
+                    description=f"**User:** {member.mention}\n**Moderator:** {interaction.user.mention}\n**Duration:** {duration} (until <t:{int(until.replace(tzinfo=datetime.timezone.utc).timestamp())}:f>)\n**Reason:** {reason}",
+                    color=discord.Color.red(),
+                    timestamp=datetime.datetime.utcnow()
+                )),
+            }
+        )
 
-        log = await self.get_logs_channel(interaction.guild)
-        if log:
-            await log.send(embed=discord.Embed(
-                title="🔨 Member Banned",
-                description=f"**User:** {member.mention}\n**Moderator:** {interaction.user.mention}\n**Reason:** {reason}",
-                color=discord.Color.red(),
-                timestamp=datetime.datetime.utcnow()
-            ))
+    async def scheduled_unban(self, guild: discord.Guild, doc: dict):
+        try:
+            await guild.unban(discord.Object(id=doc["user_id"]), reason="Temporary ban expired")
+        except discord.NotFound:
+            return  # already unbanned by hand
+        await self.send_mod_log(guild, discord.Embed(
+            title="✅ Temporary Ban Expired",
+            description=f"**User:** <@{doc['user_id']}>",
+            color=discord.Color.green(),
+            timestamp=datetime.datetime.utcnow()
+        ))
+
+    async def unban_user(self, guild: discord.Guild, user: str) -> discord.User:
+        """Resolve an ID or name to a banned user and unban them."""
+        user = user.strip()
+        if user.isdigit():
+            user_id = int(user)
+        else:
+            # name lookups use the local index; only the first one in a guild pages through guild.bans()
+            try:
+                await self.ban_index.wait(guild)
+            except discord.HTTPException:
+                raise ActionError("I couldn't read the ban list.")
+            user_id = self.ban_index.find(guild.id, user)
+        try:
+            entry = await guild.fetch_ban(discord.Object(id=user_id)) if user_id else None
+        except discord.NotFound:
+            entry = None
+        if entry is None:
+            raise ActionError("User not found in ban list.")
+        await guild.unban(entry.user)
+        await self.bot.scheduler.cancel(f"unban:{guild.id}:{entry.user.id}")
+        return entry.user
 
     @app_commands.command(name="unban", description="Unban a user by name#discriminator or ID.")
-    @commands.has_permissions(ban_members=True)
+    @app_commands.guild_only()
+    @app_commands.default_permissions(ban_members=True)
+    @app_commands.checks.has_permissions(ban_members=True)
     async def unban(self, interaction: discord.Interaction, user: str):
-        bans = [ban async for ban in interaction.guild.bans()]
-        for entry in bans:
-            if str(entry.user) == user or str(entry.user.id) == user:
-                await interaction.guild.unban(entry.user)
-                await interaction.response.send_message(f"✅ Unbanned {entry.user}", ephemeral=True)
-
-                log = await self.get_logs_channel(interaction.guild)
-                if log:
-                    await log.send(embed=discord.Embed(
-                        title="✅ Member Unbanned",
-                        description=f"**User:** {entry.user}\n**Moderator:** {interaction.user.mention}",
-                        color=discord.Color.green(),
-                        timestamp=datetime.datetime.utcnow()
-                    ))
-                return
-        await interaction.response.send_message("❌ User not found in ban list.", ephemeral=True)
+        await self.actions.run(
+            interaction,
+            lambda: self.unban_user(interaction.guild, user),
+            lambda unbanned: f"✅ Unbanned {unbanned}",
+            {
+                "mod_log": lambda unbanned: self.send_mod_log(interaction.guild, discord.Embed(
+                    title="✅ Member Unbanned",
+                    description=f"**User:** {unbanned}\n**Moderator:** {interaction.user.mention}",
+                    color=discord.Color.green(),
+                    timestamp=datetime.datetime.utcnow()
+                )),
+            }
+        )
+
+    @unban.autocomplete("user")
+    async def unban_autocomplete(self, interaction: discord.Interaction, current: str):
+        # autocomplete skips the command's checks; don't list bans (or page them) for just anyone
+        if interaction.guild is None or not interaction.permissions.ban_members:
+            return []
+        if not self.ban_index.is_ready(interaction.guild.id):
+            self.ban_index.ensure(interaction.guild)  # suggestions appear once the index is built
+            return []
+        return [
+            app_commands.Choice(name=f"{label} ({user_id})"[:100], value=str(user_id))
+            for user_id, label in self.ban_index.search(interaction.guild.id, current)
+        ]
+
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild: discord.Guild, user):
+        self.ban_index.add(guild.id, user)
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild: discord.Guild, user):
+        self.ban_index.remove(guild.id, user.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.ban_index.drop(guild.id)
+        self.spam.forget_guild(guild.id)
+        await self.bot.scheduler.drop_guild(guild.id)
 
     # ==================================================
     # Mute / Unmute
     # ==================================================
+    async def apply_timeout(self, member: discord.Member, until: datetime.datetime, reason: str):
+        """Timeout until `until`; past Discord's 28-day cap the rest is chained through the scheduler."""
+        cap = datetime.datetime.utcnow() + timedelta(minutes=MAX_TIMEOUT_MINUTES)
+        await member.timeout(min(until, cap).replace(tzinfo=datetime.timezone.utc), reason=reason)
+        key = f"timeout:{member.guild.id}:{member.id}"
+        if until > cap:
+            # re-apply shortly before the current timeout runs out
+            await self.bot.scheduler.schedule("timeout", member.guild.id, member.id, cap - timedelta(hours=1), key=key, until=until, reason=reason)
+        else:
+            await self.bot.scheduler.cancel(key)
+
+    async def scheduled_timeout(self, guild: discord.Guild, doc: dict):
+        try:
+            member = guild.get_member(doc["user_id"]) or await guild.fetch_member(doc["user_id"])
+        except discord.NotFound:
+            return  # left the server; nothing to extend
+        if member.timed_out_until is None:
+            return  # unmuted by hand
+        await self.apply_timeout(member, doc["data"]["until"], doc["data"]["reason"])
+
     @app_commands.command(name="mute", description="Timeout a user for a certain number of minutes.")
     @commands.has_permissions(moderate_members=True)
-    async def mute(self, interaction: discord.Interaction, member: discord.Member, minutes: int, *, reason: str = "No reason provided"):
-        duration = timedelta(minutes=minutes)
-        await member.timeout(duration, reason=reason)
-        await interaction.response.send_message(f"🔇 Muted {member.mention} for {minutes} minutes.", ephemeral=True)
-        try:
-            await member.send(f"You were muted in **{interaction.guild.name}** for {minutes} minutes.\nReason: {reason}")
-        except:
-            pass
+    async def mute(self, interaction: discord.Interaction, member: discord.Member, minutes: app_commands.Range[int, 1, MAX_MUTE_MINUTES], *, reason: str = "No reason provided"):
+        await self.actions.run(
+            interaction,
+            lambda: self.apply_timeout(member, datetime.datetime.utcnow() + timedelta(minutes=minutes), reason),
+            lambda _: f"🔇 Muted {member.mention} for {minutes} minutes.",
+            {"dm": lambda _: self.bot.dms.send(member, f"You were muted in **{interaction.guild.name}** for {minutes} minutes.\nReason: {reason}")}
+        )
 
     @app_commands.command(name="unmute", description="Remove timeout from a user.")
     @commands.has_permissions(moderate_members=True)
     async def unmute(self, interaction: discord.Interaction, member: discord.Member):
-        await member.timeout(None)
-        await interaction.response.send_message(f"🔊 Unmuted {member.mention}.", ephemeral=True)
-        try:
-            await member.send(f"You were unmuted in **{interaction.guild.name}**.")
-        except:
-            pass
+        async def action():
+            await member.timeout(None)
+            await self.bot.scheduler.cancel(f"timeout:{interaction.guild.id}:{member.id}")
+
+        await self.actions.run(
+            interaction,
+            action,
+            lambda _: f"🔊 Unmuted {member.mention}.",
+            {"dm": lambda _: self.bot.dms.send(member, f"You were unmuted in **{interaction.guild.name}**.")}
+        )
 
     # ==================================================
     # Warn system
@@ -132,118 +324,401 @@ class Moderation(commands.Cog):
     @app_commands.command(name="warn", description="Warn a user manually.")
     @commands.has_permissions(manage_messages=True)
     async def warn(self, interaction: discord.Interaction, member: discord.Member, *, reason: str):
-        warn_number = await self.add_warn(interaction.guild.id, member.id, reason, interaction.user.id)
-        await interaction.response.send_message(f"⚠️ Warned {member.mention}. (Warn {warn_number}) Reason: {reason}", ephemeral=True)
-
-        # DM user
-        try:
-            await member.send(f"⚠️ You received **Warn {warn_number}** in **{interaction.guild.name}**.\nReason: {reason}")
-        except:
-            pass
-
-        # Auto-timeout after 3 warns
-        if warn_number >= 3:
-            duration = timedelta(hours=24)
-            await member.timeout(duration, reason="Reached 3 warnings")
-            await member.send("⏰ You’ve been timed out for **24 hours** due to reaching 3 warnings.")
-
-        # Log
-        log = await self.get_logs_channel(interaction.guild)
-        if log:
-            embed = discord.Embed(
-                title="⚠️ User Warned",
-                description=f"**User:** {member.mention}\n**Warn #:** {warn_number}\n**Reason:** {reason}\n**Moderator:** {interaction.user.mention}",
-                color=discord.Color.yellow(),
-                timestamp=datetime.datetime.utcnow()
-            )
-            await log.send(embed=embed)
+        # result = (warn number, active warns)
+        await self.actions.run(
+            interaction,
+            lambda: self.add_warn(interaction.guild.id, member.id, reason, interaction.user.id),
+            lambda result: f"⚠️ Warned {member.mention}. (Warn {result[0]}) Reason: {reason}",
+            {
+                "dm": lambda result: self.bot.dms.send(member, f"⚠️ You received **Warn {result[0]}** in **{interaction.guild.name}**.\nReason: {reason}"),
+                # Auto-timeout after 3 active warns
+                "escalate": lambda result: self.escalate(member, result[1]),
+                "mod_log": lambda result: self.send_mod_log(interaction.guild, discord.Embed(
+                    title="⚠️ User Warned",
+                    description=f"**User:** {member.mention}\n**Warn #:** {result[0]}\n**Reason:** {reason}\n**Moderator:** {interaction.user.mention}",
+                    color=discord.Color.yellow(),
+                    timestamp=datetime.datetime.utcnow()
+                )),
+            }
+        )
 
     @app_commands.command(name="warnings", description="Check the warnings of a user.")
     async def warnings(self, interaction: discord.Interaction, member: discord.Member):
-        warns = await self.get_warns(interaction.guild.id, member.id)
-        if not warns:
+        view = WarningsView(self.warn_store, interaction.user.id, interaction.guild.id, member)
+        total = await view.load_total()
+        if not total:
             await interaction.response.send_message(f"✅ {member.mention} has no warnings.", ephemeral=True)
             return
-        msg = "\n".join([f"**{w['number']}**. {w['reason']} - <@{w['moderator']}> ({w['time'].strftime('%Y-%m-%d')})" for w in warns])
-        await interaction.response.send_message(embed=discord.Embed(
-            title=f"⚠️ Warnings for {member}",
-            description=msg,
-            color=discord.Color.orange()
-        ), ephemeral=True)
+        await interaction.response.send_message(embed=await view.render(), view=view, ephemeral=True)
 
     @app_commands.command(name="clear_warns", description="Clear all warnings for a user.")
     @commands.has_permissions(manage_messages=True)
     async def clear_warns(self, interaction: discord.Interaction, member: discord.Member):
-        await self.db.warns.delete_one({"guild_id": interaction.guild.id, "user_id": member.id})
-        await interaction.response.send_message(f"✅ Cleared all warnings for {member.mention}.", ephemeral=True)
+        await self.actions.run(
+            interaction,
+            lambda: self.warn_store.clear(interaction.guild.id, member.id),
+            lambda _: f"✅ Cleared all warnings for {member.mention}."
+        )
+
+    @app_commands.command(name="warn_expiry", description="Set how many days warnings count before expiring (0 = never).")
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def warn_expiry(self, interaction: discord.Interaction, days: app_commands.Range[int, 0, MAX_WARN_EXPIRY_DAYS]):
+        await interaction.response.defer(ephemeral=True)
+        await self.bot.guild_cache.update(interaction.guild.id, {"$set": {"warn_expiry_days": days}})
+        # existing warns follow the new setting too
+        updated = await self.warn_store.set_expiry(interaction.guild.id, days)
+        if days:
+            await interaction.followup.send(f"⏳ Warnings now expire after **{days} days** ({updated} existing warnings updated).", ephemeral=True)
+        else:
+            await interaction.followup.send(f"♾️ Warnings no longer expire ({updated} existing warnings updated).", ephemeral=True)
 
     # ==================================================
     # Link blocker
     # ==================================================
     @app_commands.command(name="link_blocker_on", description="Enable automatic link blocking.")
-    @commands.has_permissions(manage_messages=True)
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
     async def link_blocker_on(self, interaction: discord.Interaction):
-        await self.db.guilds.update_one({"guild_id": interaction.guild.id}, {"$set": {"link_blocker": True}}, upsert=True)
+        await self.bot.guild_cache.update(interaction.guild.id, {"$set": {"link_blocker": True}})
         await interaction.response.send_message("🛡️ Link blocker enabled.", ephemeral=True)
 
     @app_commands.command(name="link_blocker_off", description="Disable link blocking.")
-    @commands.has_permissions(manage_messages=True)
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
     async def link_blocker_off(self, interaction: discord.Interaction):
-        await self.db.guilds.update_one({"guild_id": interaction.guild.id}, {"$set": {"link_blocker": False}}, upsert=True)
+        await self.bot.guild_cache.update(interaction.guild.id, {"$set": {"link_blocker": False}})
         await interaction.response.send_message("⚙️ Link blocker disabled.", ephemeral=True)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
+    @app_commands.command(name="link_allow", description="Always allow links to a domain (and its subdomains).")
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    async def link_allow(self, interaction: discord.Interaction, domain: str):
+        domain = links.clean_domain(domain)
+        await self.bot.guild_cache.update(interaction.guild.id, {"$addToSet": {"link_allow": domain}, "$pull": {"link_deny": domain}})
+        await interaction.response.send_message(f"✅ Links to `{domain}` are now allowed.", ephemeral=True)
+
+    @app_commands.command(name="link_deny", description="Always block links to a domain, even with the link blocker off.")
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    async def link_deny(self, interaction: discord.Interaction, domain: str):
+        domain = links.clean_domain(domain)
+        await self.bot.guild_cache.update(interaction.guild.id, {"$addToSet": {"link_deny": domain}, "$pull": {"link_allow": domain}})
+        await interaction.response.send_message(f"🚫 Links to `{domain}` are now blocked.", ephemeral=True)
+
+    @app_commands.command(name="link_unlist", description="Remove a domain from the link allow/deny lists.")
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    async def link_unlist(self, interaction: discord.Interaction, domain: str):
+        domain = links.clean_domain(domain)
+        await self.bot.guild_cache.update(interaction.guild.id, {"$pull": {"link_allow": domain, "link_deny": domain}})
+        await interaction.response.send_message(f"⚙️ Removed `{domain}` from the link lists.", ephemeral=True)
+
+    @app_commands.command(name="link_lists", description="Show the link allow/deny lists.")
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    async def link_lists(self, interaction: discord.Interaction):
+        guild_data = await self.bot.guild_cache.get(interaction.guild.id)
+        allow = ", ".join(f"`{d}`" for d in guild_data.get("link_allow", [])) or "None"
+        deny = ", ".join(f"`{d}`" for d in guild_data.get("link_deny", [])) or "None"
+        embed = discord.Embed(title="🔗 Link Lists", color=discord.Color.blurple())
+        embed.add_field(name="Link blocker", value="On" if guild_data.get("link_blocker") else "Off", inline=False)
+        embed.add_field(name="Allowed", value=allow[:1024], inline=False)
+        embed.add_field(name="Blocked", value=deny[:1024], inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def link_filter(self, ctx):
+        """Message pipeline stage: delete and warn for blocked links."""
+        message = ctx.message
+        if not message.guild or not links.might_contain_link(message.content):
+            return
+        guild_data = await ctx.guild_config()
+        blocker = guild_data.get("link_blocker", False)
+        if not blocker and not guild_data.get("link_deny"):
+            return
+
+        policy = links.policy_for(guild_data)
+        domain = links.find_blocked(message.content, policy, block_unlisted=blocker)
+        if domain is None:
+            return
+
+        ctx.stop()
+        if policy.verdict(domain) is False:
+            reason = f"Posted a link to a blocked domain ({domain})."
+        else:
+            reason = "Posted a link while link blocker is active."
+        # same split as spam_filter: Discord refusals are expected, anything else goes to on_error
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+        warn_number, active = await self.add_warn(message.guild.id, message.author.id, reason, message.guild.me.id)
+        try:
+            await message.channel.send(f"🚫 {message.author.mention}, that link isn't allowed here! (Warn {warn_number})", delete_after=5)
+            await self.escalate(message.author, active)
+        except discord.HTTPException:
+            pass
+
+        self.bot.dms.send(message.author, f"⚠️ You’ve received **Warn {warn_number}** in **{message.guild.name}**. Reason: {reason}")
+
+        await self.send_mod_log(message.guild, discord.Embed(
+            title="🚫 Link Blocker Triggered",
+            description=f"**User:** {message.author.mention}\n**Warn #:** {warn_number}\n**Reason:** {reason}",
+            color=discord.Color.orange(),
+            timestamp=datetime.datetime.utcnow()
+        ))
+
+    # ==================================================
+    # Anti-spam
+    # ==================================================
+    @app_commands.command(name="anti_spam_on", description="Enable automatic flood, mass-mention and duplicate-message protection.")
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    async def anti_spam_on(self, interaction: discord.Interaction):
+        await self.bot.guild_cache.update(interaction.guild.id, {"$set": {"anti_spam": True}})
+        await interaction.response.send_message("🛡️ Anti-spam enabled.", ephemeral=True)
+
+    @app_commands.command(name="anti_spam_off", description="Disable anti-spam protection.")
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    async def anti_spam_off(self, interaction: discord.Interaction):
+        await self.bot.guild_cache.update(interaction.guild.id, {"$set": {"anti_spam": False}})
+        self.spam.forget_guild(interaction.guild.id)
+        await interaction.response.send_message("⚙️ Anti-spam disabled.", ephemeral=True)
+
+    async def spam_filter(self, ctx):
+        """Message pipeline stage: warn members who flood, mass-mention or repeat themselves."""
+        message = ctx.message
         if not message.guild or message.author.bot:
             return
-        if not await self.link_blocker_enabled(message.guild.id):
+        guild_data = await ctx.guild_config()
+        if not guild_data.get("anti_spam"):
+            return
+
+        verdict = self.spam.check(
+            message.guild.id, message.author.id, message.content,
+            len(message.mentions) + len(message.role_mentions)
+        )
+        metrics.SPAM_TRACKED.set(len(self.spam))
+        if verdict is None or message.author.guild_permissions.manage_messages:
             return
 
-        if re.search(r"(https?://|www\.|discord\.gg/)", message.content, re.IGNORECASE):
+        ctx.stop()
+        metrics.SPAM_HITS.inc(verdict)
+        reason = SPAM_REASONS[verdict]
+        # Discord refusals (already deleted, missing permissions, higher role) are expected;
+        # anything else (e.g. a failed warn write) goes to on_error
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+        warn_number, active = await self.add_warn(message.guild.id, message.author.id, reason, message.guild.me.id)
+        try:
+            await message.channel.send(f"🚫 {message.author.mention}, slow down! {reason} (Warn {warn_number})", delete_after=5)
+            await self.escalate(message.author, active)
+        except discord.HTTPException:
+            pass
+
+        await self.send_mod_log(message.guild, discord.Embed(
+            title="🚫 Anti-Spam Triggered",
+            description=f"**User:** {message.author.mention}\n**Warn #:** {warn_number}\n**Reason:** {reason}\n**Channel:** {message.channel.mention}",
+            color=discord.Color.orange(),
+            timestamp=datetime.datetime.utcnow()
+        ))
+
+    # ==================================================
+    # Bulk moderation (raids)
+    # ==================================================
+    async def resolve_targets(self, interaction: discord.Interaction, users: str = None, joined_within: int = None):
+        """Collect targets from mentions/IDs and/or a "joined in the last N minutes" filter.
+
+        Returns (targets, skipped) where targets are Members, or discord.Object
+        for IDs that aren't in the (fully chunked) guild; the invoker, the bot,
+        the owner and anyone at or above the invoker's top role are skipped.
+        """
+        guild = interaction.guild
+        ids = []
+        for mention, raw in USER_ID_RE.findall(users or ""):
+            ids.append(int(mention or raw))
+        if joined_within or any(guild.get_member(user_id) is None for user_id in ids):
+            # guilds aren't chunked at startup with the lighter cache profiles; an uncached
+            # member would become a discord.Object and skip the role hierarchy check below
+            await self.bot.ensure_chunked(guild)
+        if joined_within:
+            cutoff = discord.utils.utcnow() - timedelta(minutes=joined_within)
+            ids.extend(m.id for m in guild.members if m.joined_at and m.joined_at >= cutoff and not m.bot)
+
+        targets, skipped, seen = [], 0, set()
+        for user_id in ids:
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            member = guild.get_member(user_id)
+            if user_id in (interaction.user.id, self.bot.user.id, guild.owner_id):
+                skipped += 1
+            elif member and interaction.user.id != guild.owner_id and member.top_role >= interaction.user.top_role:
+                skipped += 1
+            else:
+                targets.append(member or discord.Object(id=user_id))
+        return targets[:MASS_ACTION_LIMIT], skipped + max(0, len(targets) - MASS_ACTION_LIMIT)
+
+    async def finish_mass_action(self, interaction, progress_msg, title: str, verb: str, done: list, failed: dict,
+                                 skipped: int, elapsed: float, reason: str, color: discord.Color):
+        summary = f"{title}: **{len(done)}** {verb}, **{len(failed)}** failed, **{skipped}** skipped in {elapsed:.1f}s."
+        if failed:
+            reasons = {}
+            for error in failed.values():
+                reasons[error] = reasons.get(error, 0) + 1
+            summary += "\n" + "\n".join(f"• {error}: {count}" for error, count in reasons.items())
+        await progress_msg.edit(content=summary)
+
+        # one aggregated log entry instead of one embed per member
+        ids = " ".join(f"<@{user_id}>" for user_id in done[:60]) or "None"
+        if len(done) > 60:
+            ids += f" … (+{len(done) - 60})"
+        await self.send_mod_log(interaction.guild, discord.Embed(
+            title=title,
+            description=f"**Moderator:** {interaction.user.mention}\n**Reason:** {reason}\n**{verb.title()}:** {len(done)} | **Failed:** {len(failed)} | **Skipped:** {skipped}\n\n{ids}",
+            color=color,
+            timestamp=datetime.datetime.utcnow()
+        ))
+
+    async def start_mass_action(self, interaction, users, joined_within, noun: str):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        targets, skipped = await self.resolve_targets(interaction, users, joined_within)
+        if not targets:
+            await interaction.followup.send(f"❌ No {noun} targets found ({skipped} skipped).", ephemeral=True)
+            return None, None, skipped
+        progress_msg = await interaction.followup.send(f"⏳ Processing {len(targets)} users...", ephemeral=True, wait=True)
+        return targets, progress_msg, skipped
+
+    def progress_reporter(self, progress_msg, verb: str):
+        async def report(done, failed, total):
+            await progress_msg.edit(content=f"⏳ {done}/{total} {verb}, {failed} failed...")
+        return report
+
+    @app_commands.command(name="massban", description="Ban many users by mention/ID list or recent join time.")
+    @app_commands.describe(users="Mentions or IDs separated by spaces", joined_within="Also ban members who joined in the last N minutes")
+    @app_commands.default_permissions(ban_members=True)
+    @app_commands.checks.has_permissions(ban_members=True)
+    async def massban(self, interaction: discord.Interaction, users: str = None, joined_within: int = None,
+                      reason: str = "Mass ban", delete_message_days: app_commands.Range[int, 0, 7] = 0):
+        targets, progress_msg, skipped = await self.start_mass_action(interaction, users, joined_within, "ban")
+        if not targets:
+            return
+        start = time.perf_counter()
+        done, failed = [], {}
+        # bulk_ban takes up to 200 users per request; fall back to single bans if it is refused
+        for i in range(0, len(targets), 200):
+            chunk = targets[i:i + 200]
             try:
-                await message.delete()
-                reason = "Posted a link while link blocker is active."
-                warn_number = await self.add_warn(message.guild.id, message.author.id, reason, message.guild.me.id)
-                await message.channel.send(f"🚫 {message.author.mention}, links are not allowed! (Warn {warn_number})", delete_after=5)
-
-                try:
-                    await message.author.send(f"⚠️ You’ve received **Warn {warn_number}** in **{message.guild.name}** for posting a link.")
-                except:
-                    pass
-
-                if warn_number >= 3:
-                    await message.author.timeout(timedelta(hours=24), reason="Reached 3 warnings")
-                    await message.author.send("⏰ You’ve been timed out for **24 hours** due to reaching 3 warnings.")
-
-                log = await self.get_logs_channel(message.guild)
-                if log:
-                    await log.send(embed=discord.Embed(
-                        title="🚫 Link Blocker Triggered",
-                        description=f"**User:** {message.author.mention}\n**Warn #:** {warn_number}\n**Reason:** {reason}",
-                        color=discord.Color.orange(),
-                        timestamp=datetime.datetime.utcnow()
-                    ))
-            except:
-                pass
+                result = await interaction.guild.bulk_ban(chunk, reason=reason, delete_message_seconds=delete_message_days * 86400)
+                done.extend(user.id for user in result.banned)
+                failed.update((user.id, "already banned or not bannable") for user in result.failed)
+            except discord.HTTPException:
+                fallback = await self.executor.run(
+                    chunk,
+                    lambda target: interaction.guild.ban(target, reason=reason, delete_message_seconds=delete_message_days * 86400)
+                )
+                done.extend(fallback.done)
+                failed.update(fallback.failed)
+            await self.progress_reporter(progress_msg, "banned")(len(done), len(failed), len(targets))
+        await self.finish_mass_action(interaction, progress_msg, "🔨 Mass Ban", "banned", done, failed, skipped,
+                                      time.perf_counter() - start, reason, discord.Color.red())
+
+    @app_commands.command(name="masskick", description="Kick many members by mention/ID list or recent join time.")
+    @app_commands.describe(users="Mentions or IDs separated by spaces", joined_within="Also kick members who joined in the last N minutes")
+    @app_commands.default_permissions(kick_members=True)
+    @app_commands.checks.has_permissions(kick_members=True)
+    async def masskick(self, interaction: discord.Interaction, users: str = None, joined_within: int = None, reason: str = "Mass kick"):
+        targets, progress_msg, skipped = await self.start_mass_action(interaction, users, joined_within, "kick")
+        if not targets:
+            return
+        result = await self.executor.run(
+            targets,
+            lambda target: interaction.guild.kick(target, reason=reason),
+            progress=self.progress_reporter(progress_msg, "kicked")
+        )
+        await self.finish_mass_action(interaction, progress_msg, "👢 Mass Kick", "kicked", result.done, result.failed, skipped,
+                                      result.elapsed, reason, discord.Color.orange())
+
+    @app_commands.command(name="masstimeout", description="Timeout many members by mention/ID list or recent join time.")
+    @app_commands.describe(users="Mentions or IDs separated by spaces", joined_within="Also timeout members who joined in the last N minutes")
+    @app_commands.default_permissions(moderate_members=True)
+    @app_commands.checks.has_permissions(moderate_members=True)
+    async def masstimeout(self, interaction: discord.Interaction, minutes: app_commands.Range[int, 1, MAX_TIMEOUT_MINUTES],
+                          users: str = None, joined_within: int = None, reason: str = "Mass timeout"):
+        targets, progress_msg, skipped = await self.start_mass_action(interaction, users, joined_within, "timeout")
+        if not targets:
+            return
+        until = discord.utils.utcnow() + timedelta(minutes=minutes)
+
+        async def timeout(target):
+            member = target if isinstance(target, discord.Member) else await interaction.guild.fetch_member(target.id)
+            await member.edit(timed_out_until=until, reason=reason)
+
+        result = await self.executor.run(targets, timeout, progress=self.progress_reporter(progress_msg, "timed out"))
+        await self.finish_mass_action(interaction, progress_msg, "🔇 Mass Timeout", "timed out", result.done, result.failed, skipped,
+                                      result.elapsed, f"{reason} ({minutes} minutes)", discord.Color.dark_grey())
 
     # ==================================================
     # Purge
     # ==================================================
-    @app_commands.command(name="purge", description="Delete a number of messages.")
-    @commands.has_permissions(manage_messages=True)
-    async def purge(self, interaction: discord.Interaction, amount: int):
+    @app_commands.command(name="purge", description="Delete messages, optionally filtered.")
+    @app_commands.describe(
+        amount="How many matching messages to delete",
+        user="Only messages from this user",
+        contains="Only messages matching this regex",
+        only_links="Only messages containing links",
+        attachments="Only messages with attachments",
+        bots="Only messages from bots",
+        within_minutes="Only messages from the last N minutes",
+        older_than_minutes="Only messages older than N minutes",
+        scan="How many messages to look through when filtering (default 5x amount)"
+    )
+    @app_commands.rename(only_links="links")  # `links` would shadow the utils.links module here
+    @app_commands.default_permissions(manage_messages=True)
+    @app_commands.checks.has_permissions(manage_messages=True)
+    async def purge(self, interaction: discord.Interaction, amount: app_commands.Range[int, 1, 10000],
+                    user: discord.User = None, contains: str = None, only_links: bool = False, attachments: bool = False,
+                    bots: bool = False, within_minutes: app_commands.Range[int, 1] = None,
+                    older_than_minutes: app_commands.Range[int, 1] = None, scan: app_commands.Range[int, 1, 50000] = None):
+        try:
+            check = PurgeFilter(user.id if user else None, contains, only_links, attachments, bots)
+        except re.error as e:
+            await interaction.response.send_message(f"❌ Invalid regex: {e}", ephemeral=True)
+            return
         await interaction.response.defer(ephemeral=True)
-        deleted = await interaction.channel.purge(limit=amount + 1)
-        await interaction.followup.send(f"🧹 Deleted {len(deleted) - 1} messages.", ephemeral=True)
-
-        log = await self.get_logs_channel(interaction.guild)
-        if log:
-            await log.send(embed=discord.Embed(
-                title="🧹 Messages Purged",
-                description=f"**Moderator:** {interaction.user.mention}\n**Deleted:** {len(deleted) - 1} in {interaction.channel.mention}",
-                color=discord.Color.blurple(),
-                timestamp=datetime.datetime.utcnow()
-            ))
+
+        now = discord.utils.utcnow()
+        after = now - timedelta(minutes=within_minutes) if within_minutes else None
+        before = now - timedelta(minutes=older_than_minutes) if older_than_minutes else None
+        scan_limit = amount if check.is_empty else (scan or min(amount * 5, 50000))
+        status = await interaction.followup.send(f"🧹 Purging up to {amount} messages...", ephemeral=True, wait=True)
+
+        async def progress(state):
+            await status.edit(content=f"🧹 Scanned {state.scanned}, deleted {state.deleted} ({state.rate:.0f}/s)...")
+
+        # the deferred ephemeral response is not a channel message, so nothing to offset
+        state = await run_purge(
+            interaction.channel, amount, None if check.is_empty else check,
+            scan_limit=scan_limit, before=before, after=after, progress=progress
+        )
+        summary = f"🧹 Deleted {state.deleted} messages (scanned {state.scanned}) in {state.elapsed:.1f}s."
+        if state.slow_deleted:
+            summary += f"\n🐢 {state.slow_deleted} were older than 14 days and deleted one by one."
+        if state.retried:
+            summary += f"\n🔁 {state.retried} were deleted individually after a bulk delete hit an already deleted message."
+        if state.failed:
+            summary += f"\n⚠️ {state.failed} could not be deleted."
+        await status.edit(content=summary)
+
+        await self.send_mod_log(interaction.guild, discord.Embed(
+            title="🧹 Messages Purged",
+            description=f"**Moderator:** {interaction.user.mention}\n**Deleted:** {state.deleted} in {interaction.channel.mention}",
+            color=discord.Color.blurple(),
+            timestamp=datetime.datetime.utcnow()
+        ))
 
     # ==================================================
     # Mod log channel
@@ -251,11 +726,7 @@ class Moderation(commands.Cog):
     @app_commands.command(name="mod_logs_channel", description="Set the moderation logs channel.")
     @commands.has_permissions(manage_guild=True)
     async def mod_logs_channel(self, interaction: discord.Interaction, channel: discord.TextChannel):
-        await self.db.guilds.update_one(
-            {"guild_id": interaction.guild.id},
-            {"$set": {"mod_logs_channel": channel.id}},
-            upsert=True
-        )
+        await self.bot.guild_cache.update(interaction.guild.id, {"$set": {"mod_logs_channel": channel.id}})
         await interaction.response.send_message(f"✅ Set mod logs channel to {channel.mention}", ephemeral=True)
 
 async def setup(bot):
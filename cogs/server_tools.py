@@ -2,34 +2,49 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
-from pymongo import MongoClient
-import os
+from pymongo import ReturnDocument
+from utils.cache import GuildConfigCache
+from utils.cluster import build_activity
+from utils.joins import JoinCoalescer, RoleGrantQueue, compile_template, join_names
+from utils.memory import cache_usage, format_bytes
+from utils.scheduler import parse_duration
 
-# MongoDB setup
-mongo_uri = os.getenv("MONGO_URI")
-cluster = MongoClient(mongo_uri)
-db = cluster["primebot"]
-settings = db["server_settings"]
+DEFAULT_CONFIG = {
+    "welcome_channel": None,
+    "welcome_message": "👋 Welcome to {server}, {member}!",
+    "goodbye_channel": None,
+    "goodbye_message": "😢 {member} has left the server.",
+    "auto_role": None
+}
 
 
 class ServerTools(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.settings = bot.db.server_settings  # async Motor collection from main.py
+        self.config_cache = GuildConfigCache(self.settings, key="_id", loader=self._load_guild_config)
+        self.welcomes = JoinCoalescer(self.send_welcome)
+        self.role_queue = RoleGrantQueue()
 
-    # Utility: Get or create server document
-    def get_guild_config(self, guild_id):
-        config = settings.find_one({"_id": guild_id})
-        if not config:
-            config = {
-                "_id": guild_id,
-                "welcome_channel": None,
-                "welcome_message": "👋 Welcome to {server}, {member}!",
-                "goodbye_channel": None,
-                "goodbye_message": "😢 {member} has left the server.",
-                "auto_role": None
-            }
-            settings.insert_one(config)
-        return config
+    async def cog_load(self):
+        self.role_queue.start()
+        self.bot.scheduler.register("remove_role", self.scheduled_role_removal)
+
+    async def cog_unload(self):
+        await self.welcomes.close()
+        await self.role_queue.close()
+
+    # Utility: Get or create server document in a single round trip
+    async def _load_guild_config(self, guild_id):
+        return await self.settings.find_one_and_update(
+            {"_id": guild_id},
+            {"$setOnInsert": DEFAULT_CONFIG},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def get_guild_config(self, guild_id):
+        return await self.config_cache.get(guild_id)
 
     # ---------------------------------------------------
     # 🎉 Welcome System
@@ -37,23 +52,48 @@ class ServerTools(commands.Cog):
     @commands.hybrid_command(name="set_welcome_channel", description="Set the welcome channel for new members.")
     @commands.has_permissions(manage_guild=True)
     async def set_welcome_channel(self, ctx, channel: discord.TextChannel):
-        settings.update_one({"_id": ctx.guild.id}, {"$set": {"welcome_channel": channel.id}}, upsert=True)
+        await self.config_cache.update(ctx.guild.id, {"$set": {"welcome_channel": channel.id}})
         await ctx.reply(f"✅ Welcome channel set to {channel.mention}")
 
     @commands.hybrid_command(name="set_welcome_message", description="Set the welcome message.")
     @commands.has_permissions(manage_guild=True)
     async def set_welcome_message(self, ctx, *, message: str):
-        settings.update_one({"_id": ctx.guild.id}, {"$set": {"welcome_message": message}}, upsert=True)
+        try:
+            compile_template(message)
+        except ValueError as e:
+            await ctx.reply(f"❌ {e}")
+            return
+        await self.config_cache.update(ctx.guild.id, {"$set": {"welcome_message": message}})
         await ctx.reply("✅ Welcome message updated.")
 
+    async def send_welcome(self, guild: discord.Guild, members: list):
+        """Send one welcome message for a batch of joins (see JoinCoalescer)."""
+        config = await self.get_guild_config(guild.id)
+        channel = guild.get_channel(config.get("welcome_channel") or 0)
+        if not channel:
+            return
+        try:
+            template = compile_template(config.get("welcome_message") or DEFAULT_CONFIG["welcome_message"])
+        except ValueError:
+            template = compile_template(DEFAULT_CONFIG["welcome_message"])
+        msg = template.render(
+            member=join_names([m.mention for m in members]),
+            server=guild.name,
+            count=guild.member_count
+        )
+        await channel.send(msg, allowed_mentions=discord.AllowedMentions(users=members[:3], everyone=False, roles=False))
+
+    # One listener for both welcome and auto role; config comes from the cache
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
-        config = self.get_guild_config(member.guild.id)
+        config = await self.get_guild_config(member.guild.id)
         if config.get("welcome_channel"):
-            channel = member.guild.get_channel(config["welcome_channel"])
-            if channel:
-                msg = config["welcome_message"].format(member=member.mention, server=member.guild.name)
-                await channel.send(msg)
+            self.welcomes.add(member)
+        role_id = config.get("auto_role")
+        if role_id:
+            role = member.guild.get_role(role_id)
+            if role:
+                self.role_queue.put(member, role)
 
     # ---------------------------------------------------
     # 🧑 Auto Role System
@@ -61,27 +101,15 @@ class ServerTools(commands.Cog):
     @commands.hybrid_command(name="set_auto_role", description="Set a role to be given automatically to new members.")
     @commands.has_permissions(manage_roles=True)
     async def set_auto_role(self, ctx, role: discord.Role):
-        settings.update_one({"_id": ctx.guild.id}, {"$set": {"auto_role": role.id}}, upsert=True)
+        await self.config_cache.update(ctx.guild.id, {"$set": {"auto_role": role.id}})
         await ctx.reply(f"✅ Auto role set to **{role.name}**")
 
     @commands.hybrid_command(name="remove_auto_role", description="Disable auto-role assignment.")
     @commands.has_permissions(manage_roles=True)
     async def remove_auto_role(self, ctx):
-        settings.update_one({"_id": ctx.guild.id}, {"$unset": {"auto_role": ""}}, upsert=True)
+        await self.config_cache.update(ctx.guild.id, {"$unset": {"auto_role": ""}})
         await ctx.reply("✅ Auto role removed.")
 
-    @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member):
-        config = self.get_guild_config(member.guild.id)
-        role_id = config.get("auto_role")
-        if role_id:
-            role = member.guild.get_role(role_id)
-            if role:
-                try:
-                    await member.add_roles(role, reason="Auto role assigned")
-                except discord.Forbidden:
-                    pass
-
     # ---------------------------------------------------
     # 🛠 Server Info
     # ---------------------------------------------------
@@ -104,21 +132,43 @@ class ServerTools(commands.Cog):
         # ---------------------------------------------------
     # 🧩 Add / Remove Role
     # ---------------------------------------------------
-    @commands.hybrid_command(name="add_role", description="Add a role to a member.")
+    @commands.hybrid_command(name="add_role", description="Add a role to a member, optionally for a while (e.g. 12h, 7d).")
     @commands.has_permissions(manage_roles=True)
-    async def add_role(self, ctx, member: discord.Member, role: discord.Role):
+    async def add_role(self, ctx, member: discord.Member, role: discord.Role, duration: str = None):
         if role >= ctx.author.top_role:
             await ctx.reply("🚫 You can’t assign a role higher or equal to your top role.")
             return
+        try:
+            length = parse_duration(duration) if duration else None
+        except ValueError as e:
+            await ctx.reply(f"❌ {e}")
+            return
         try:
             await member.add_roles(role)
-            await ctx.reply(f"✅ Added role **{role.name}** to {member.mention}.")
-            try:
-                await member.send(f"🎉 You were given the role **{role.name}** in **{ctx.guild.name}**.")
-            except:
-                pass
         except discord.Forbidden:
             await ctx.reply("❌ I don’t have permission to add that role.")
+            return
+
+        key = f"remove_role:{ctx.guild.id}:{member.id}:{role.id}"
+        if length:
+            await self.bot.scheduler.schedule("remove_role", ctx.guild.id, member.id, datetime.utcnow() + length, key=key, role_id=role.id)
+            await ctx.reply(f"✅ Added role **{role.name}** to {member.mention} for {duration}.")
+            self.bot.dms.send(member, f"🎉 You were given the role **{role.name}** in **{ctx.guild.name}** for {duration}.")
+        else:
+            await self.bot.scheduler.cancel(key)  # a permanent grant replaces an expiring one
+            await ctx.reply(f"✅ Added role **{role.name}** to {member.mention}.")
+            self.bot.dms.send(member, f"🎉 You were given the role **{role.name}** in **{ctx.guild.name}**.")
+
+    async def scheduled_role_removal(self, guild: discord.Guild, doc: dict):
+        role = guild.get_role(doc["data"]["role_id"])
+        if role is None:
+            return
+        try:
+            member = guild.get_member(doc["user_id"]) or await guild.fetch_member(doc["user_id"])
+        except discord.NotFound:
+            return
+        await member.remove_roles(role, reason="Timed role expired")
+        self.bot.dms.send(member, f"⌛ Your role **{role.name}** in **{guild.name}** has expired.")
 
     @commands.hybrid_command(name="remove_role", description="Remove a role from a member.")
     @commands.has_permissions(manage_roles=True)
@@ -128,11 +178,9 @@ class ServerTools(commands.Cog):
             return
         try:
             await member.remove_roles(role)
+            await self.bot.scheduler.cancel(f"remove_role:{ctx.guild.id}:{member.id}:{role.id}")
             await ctx.reply(f"✅ Removed role **{role.name}** from {member.mention}.")
-            try:
-                await member.send(f"⚠️ Your role **{role.name}** was removed in **{ctx.guild.name}**.")
-            except:
-                pass
+            self.bot.dms.send(member, f"⚠️ Your role **{role.name}** was removed in **{ctx.guild.name}**.")
         except discord.Forbidden:
             await ctx.reply("❌ I don’t have permission to remove that role.")
 
@@ -150,21 +198,12 @@ class ServerTools(commands.Cog):
         - competing
         """
         activity_type = activity_type.lower()
-        activity = None
-
-        if activity_type == "playing":
-            activity = discord.Game(name=message)
-        elif activity_type == "watching":
-            activity = discord.Activity(type=discord.ActivityType.watching, name=message)
-        elif activity_type == "listening":
-            activity = discord.Activity(type=discord.ActivityType.listening, name=message)
-        elif activity_type == "competing":
-            activity = discord.Activity(type=discord.ActivityType.competing, name=message)
-        else:
+        if build_activity(activity_type, message) is None:
             await ctx.reply("❌ Invalid activity type! Use: `playing`, `watching`, `listening`, or `competing`.")
             return
 
-        await self.bot.change_presence(activity=activity)
+        # stored in Mongo so every cluster picks it up on its next heartbeat
+        await self.bot.cluster.set_presence(activity_type, message)
         await ctx.reply(f"✅ Bot status updated to **{activity_type.title()} {message}**")
 
     @status.error
@@ -172,6 +211,98 @@ class ServerTools(commands.Cog):
         if isinstance(error, commands.NotOwner):
             await ctx.reply("🚫 Only the bot owner can use this command.")
 
+    # ---------------------------------------------------
+    # 📈 Owner-only: Cache Stats
+    # ---------------------------------------------------
+    @commands.command(name="cachestats", help="Show guild settings cache hit/miss counters.")
+    @commands.is_owner()
+    async def cachestats(self, ctx):
+        stats = self.bot.guild_cache.stats()
+        lines = "\n".join(f"**{key}:** {value}" for key, value in stats.items())
+        await ctx.reply(embed=discord.Embed(title="📈 Guild Cache", description=lines, color=discord.Color.blue()))
+
+    @commands.command(name="cachemem", help="Show estimated member/message cache memory. Usage: .cachemem [guilds]")
+    @commands.is_owner()
+    async def cachemem(self, ctx, limit: int = 10):
+        usage = cache_usage(self.bot)
+        embed = discord.Embed(
+            title="🧠 Cache Memory",
+            description=(
+                f"**Profile:** {self.bot.cache_profile}\n"
+                f"**Members:** {usage['members']} (~{format_bytes(usage['member_size'])} each) = {format_bytes(usage['member_bytes'])}\n"
+                f"**Messages:** {usage['messages']} (~{format_bytes(usage['message_size'])} each) = {format_bytes(usage['message_bytes'])}"
+            ),
+            color=discord.Color.blue()
+        )
+        largest = sorted(usage["guilds"].values(), key=lambda entry: entry["member_bytes"] + entry["message_bytes"], reverse=True)
+        lines = "\n".join(
+            f"**{entry['name']}** — {entry['members']} members {format_bytes(entry['member_bytes'])}, "
+            f"{entry['messages']} messages {format_bytes(entry['message_bytes'])}"
+            for entry in largest[:max(1, min(limit, 25))]
+        )
+        embed.add_field(name="Largest guilds", value=lines[:1024] or "No guilds.", inline=False)
+        await ctx.reply(embed=embed)
+
+    @commands.command(name="sync", help="Force a global slash command sync. Usage: .sync [force]")
+    @commands.is_owner()
+    async def sync(self, ctx, mode: str = "force"):
+        synced = await self.bot.sync_commands(force=mode.lower() == "force")
+        await ctx.reply("✅ Slash commands synced globally." if synced else "✅ Command tree unchanged, nothing to sync.")
+
+    @commands.command(name="clusters", help="Show health of every bot cluster.")
+    @commands.is_owner()
+    async def clusters(self, ctx):
+        embed = discord.Embed(title="🛰️ Clusters", color=discord.Color.blue(), timestamp=datetime.utcnow())
+        for doc in await self.bot.cluster.all_health():
+            age = (datetime.utcnow() - doc["updated_at"]).total_seconds()
+            latencies = [s["latency_ms"] for s in doc.get("shards", {}).values() if s["latency_ms"] is not None]
+            state = "🟢" if doc.get("ready") and age < self.bot.cluster.interval * 3 else "🔴"
+            embed.add_field(
+                name=f"{state} Cluster {doc['_id']}",
+                value=(
+                    f"**Shards:** {doc.get('shard_ids')}\n**Guilds:** {doc.get('guilds')}\n"
+                    f"**Latency:** {max(latencies) if latencies else '?'}ms\n**Last seen:** {int(age)}s ago"
+                ),
+            )
+        await ctx.reply(embed=embed)
+
+    @commands.command(name="pipeline", help="Show per-stage timings of the message pipeline.")
+    @commands.is_owner()
+    async def pipeline(self, ctx):
+        rows = self.bot.pipeline.report()
+        lines = "\n".join(f"**{name}** — {calls} calls, avg {avg}ms, max {peak}ms" for name, calls, avg, peak in rows)
+        await ctx.reply(embed=discord.Embed(title="⏱️ Message Pipeline", description=lines or "No stages registered.", color=discord.Color.blue()))
+
+    @commands.command(name="cmdstats", help="Top or slowest commands across all clusters. Usage: .cmdstats [top|slow] [hours]")
+    @commands.is_owner()
+    async def cmdstats(self, ctx, mode: str = "top", hours: int = 24):
+        if mode.lower() == "slow":
+            rows = await self.bot.analytics.slowest_commands(hours)
+            lines = [f"`{row['_id']}` p95 {row['p95'] * 1000:.0f}ms · max {row['max'] * 1000:.0f}ms · {row['count']} runs" for row in rows]
+            title = f"🐢 Slowest Commands ({hours}h)"
+        else:
+            rows = await self.bot.analytics.top_commands(hours)
+            lines = [f"`{row['_id']}` {row['count']} runs · {row['guilds']} servers" + (f" · {row['errors']} errors" if row["errors"] else "") for row in rows]
+            title = f"📊 Top Commands ({hours}h)"
+        await ctx.reply(embed=discord.Embed(title=title, description="\n".join(lines) or "No command usage recorded yet.", color=discord.Color.blue()))
+
+    @commands.command(name="modtimings", help="Show per-step timings of moderation commands.")
+    @commands.is_owner()
+    async def modtimings(self, ctx):
+        moderation = self.bot.get_cog("Moderation")
+        rows = moderation.actions.report() if moderation else []
+        lines = "\n".join(f"**/{command}** {step} — {calls} calls, avg {avg}ms, max {peak}ms" for command, step, calls, avg, peak in rows)
+        await ctx.reply(embed=discord.Embed(title="⏱️ Moderation Timings", description=lines[:4096] or "No moderation commands run yet.", color=discord.Color.blue()))
+
+    @commands.command(name="errors", help="Show the most frequent errors on this cluster.")
+    @commands.is_owner()
+    async def errors(self, ctx):
+        lines = "\n".join(
+            f"`{fp}` **{entry.count}×** in `{entry.source}` — {entry.summary}"
+            for fp, entry in self.bot.errors.top()
+        )
+        await ctx.reply(embed=discord.Embed(title="💥 Errors", description=lines[:4096] or "No errors since startup.", color=discord.Color.red()))
+
 
 async def setup(bot):
     await bot.add_cog(ServerTools(bot))
@@ -1,91 +1,81 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from datetime import datetime  # ✅ fixed import
+import time
+from utils.afk import AfkStore
 
 class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # {user_id: {"reason": str, "since": datetime}}
-        self.afk_users = {}
+        # per-guild AFK statuses, in memory with write-behind to Mongo
+        self.afk_users = AfkStore(bot.db.afk)
+
+    async def cog_load(self):
+        await self.afk_users.load()
+        self.afk_users.start()
+        self.bot.pipeline.register("afk_return", self.afk_return, order=50)
+        self.bot.pipeline.register("afk_mentions", self.afk_mentions, order=60)
+
+    async def cog_unload(self):
+        self.bot.pipeline.unregister("afk_return")
+        self.bot.pipeline.unregister("afk_mentions")
+        await self.afk_users.close()
 
     # ========================
     # 💤 AFK SYSTEM
     # ========================
 
     @commands.command(name="afk")
+    @commands.guild_only()
     async def afk_prefix(self, ctx, *, reason: str = "AFK"):
         """Set your AFK status (prefix command)."""
-        self.afk_users[ctx.author.id] = {
-            "reason": reason,
-            "since": datetime.utcnow(),
-        }
+        self.afk_users.set(ctx.guild.id, ctx.author.id, reason)
         await ctx.send(f"💤 {ctx.author.mention} is now AFK: **{reason}**")
 
     @app_commands.command(name="afk", description="Set your AFK status (slash command).")
+    @app_commands.guild_only()
     async def afk_slash(self, interaction: discord.Interaction, reason: str = "AFK"):
         """Set your AFK status (slash command)."""
-        self.afk_users[interaction.user.id] = {
-            "reason": reason,
-            "since": datetime.utcnow(),
-        }
+        self.afk_users.set(interaction.guild.id, interaction.user.id, reason)
         await interaction.response.send_message(
             f"💤 {interaction.user.mention} is now AFK: **{reason}**", ephemeral=True
         )
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """Remove AFK when user sends a normal message and alert when someone tags AFK users."""
-        if message.author.bot:
+    @staticmethod
+    def format_duration(since: float) -> str:
+        seconds = int(time.time() - since)
+        hours, remainder = divmod(seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        if hours > 0:
+            return f"{hours}h {minutes}m"
+        elif minutes > 0:
+            return f"{minutes}m {seconds}s"
+        return f"{seconds}s"
+
+    async def afk_return(self, ctx):
+        """Message pipeline stage: remove AFK when a user sends a normal message."""
+        message = ctx.message
+        if ctx.is_command or not message.guild or not self.afk_users.has_guild(message.guild.id):
             return
-
-        prefixes = ['.']
-        if any(message.content.startswith(p) for p in prefixes):
+        afk_data = self.afk_users.clear(message.guild.id, message.author.id)
+        if afk_data is None:
             return
+        await message.channel.send(
+            f"✅ Welcome back, {message.author.mention}! "
+            f"You were AFK for **{self.format_duration(afk_data.since)}**."
+        )
 
-        # ✅ Remove AFK when user returns
-        if message.author.id in self.afk_users:
-            afk_data = self.afk_users.pop(message.author.id)
-            duration = datetime.utcnow() - afk_data["since"]
-
-            # Convert duration to readable format
-            seconds = int(duration.total_seconds())
-            hours, remainder = divmod(seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-
-            if hours > 0:
-                time_str = f"{hours}h {minutes}m"
-            elif minutes > 0:
-                time_str = f"{minutes}m {seconds}s"
-            else:
-                time_str = f"{seconds}s"
-
-            await message.channel.send(
-                f"✅ Welcome back, {message.author.mention}! "
-                f"You were AFK for **{time_str}**."
-            )
-
-        # 💬 Notify if AFK users are mentioned
+    async def afk_mentions(self, ctx):
+        """Message pipeline stage: alert when someone tags AFK users."""
+        message = ctx.message
+        if ctx.is_command or not message.mentions or not message.guild or not self.afk_users.has_guild(message.guild.id):
+            return
         for user in message.mentions:
-            if user.id in self.afk_users:
-                afk_data = self.afk_users[user.id]
-                reason = afk_data["reason"]
-                since = afk_data["since"]
-                duration = datetime.utcnow() - since
-
-                seconds = int(duration.total_seconds())
-                hours, remainder = divmod(seconds, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                if hours > 0:
-                    time_str = f"{hours}h {minutes}m"
-                elif minutes > 0:
-                    time_str = f"{minutes}m {seconds}s"
-                else:
-                    time_str = f"{seconds}s"
-
+            afk_data = self.afk_users.get(message.guild.id, user.id)
+            if afk_data:
                 await message.channel.send(
-                    f"💤 {user.mention} is currently AFK: **{reason}** "
-                    f"(since {time_str} ago)"
+                    f"💤 {user.mention} is currently AFK: **{afk_data.reason}** "
+                    f"(since {self.format_duration(afk_data.since)} ago)"
                 )
 
     # ========================
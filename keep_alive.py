@@ -1,15 +1,69 @@
-from flask import Flask
-from threading import Thread
+import asyncio
+import datetime
+import math
 
-app = Flask('')
+from aiohttp import web
 
-@app.route('/')
-def home():
-    return "✅ Bot is alive!"
+from utils import metrics
 
-def run():
-    app.run(host="0.0.0.0", port=8080)
+MAX_LOOP_LAG = 5.0  # seconds before /healthz reports the loop as stuck
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+_lag_task = None
+
+
+async def monitor_loop_lag(interval: float = 0.5):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        metrics.LOOP_LAG.set(max(0.0, loop.time() - start - interval))
+
+
+def health(bot) -> dict:
+    latency = bot.latency
+    loop_lag = metrics.LOOP_LAG.values.get((), 0.0)
+    ready = (
+        bot.is_ready()
+        and not bot.is_closed()
+        and not math.isnan(latency)
+        and not any(shard.is_closed() for shard in bot.shards.values())
+        and loop_lag < MAX_LOOP_LAG
+    )
+    return {
+        "ready": ready,
+        "cluster": bot.cluster_id,
+        "shards": sorted(bot.shards),
+        "guilds": len(bot.guilds),
+        "latency_ms": None if math.isnan(latency) else round(latency * 1000),
+        "loop_lag_ms": round(loop_lag * 1000, 1),
+        "uptime_s": round((datetime.datetime.utcnow() - bot.started_at).total_seconds()),
+    }
+
+
+def build_app(bot) -> web.Application:
+    async def home(request):
+        return web.Response(text="✅ Bot is alive!")
+
+    async def healthz(request):
+        report = health(bot)
+        return web.json_response(report, status=200 if report["ready"] else 503)
+
+    async def metrics_handler(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/metrics", metrics_handler)
+    return app
+
+
+async def keep_alive(bot, port=8080):
+    """Serve /, /healthz and /metrics on the bot's own event loop."""
+    metrics.bind_bot(bot)
+    runner = web.AppRunner(build_app(bot), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    global _lag_task
+    _lag_task = asyncio.create_task(monitor_loop_lag())
+    return runner
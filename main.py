@@ -1,14 +1,29 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os, asyncio, json
+import os, asyncio, json, datetime, hashlib, time
+from contextlib import contextmanager
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
 import sys, io
 from keep_alive import keep_alive
+from utils.cache import GuildConfigCache
+from utils.db import Database
+from utils.pipeline import MessagePipeline
+from utils.cluster import ClusterReporter
+from utils.logs import LogDispatcher
+from utils.dm import DMDispatcher
+from utils.scheduler import Scheduler
+from utils.analytics import CommandAnalytics
+from utils.errors import ErrorReporter
+from utils.memory import cache_options
+from utils import metrics
 
 
-keep_alive()
+# === Cluster / shard layout (set by cluster.py, defaults to a single auto-sharded process) ===
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", 0))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0)) or None
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i] or None
+
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 load_dotenv()
@@ -31,30 +46,186 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 intents.guilds = True
+
+# "full", "balanced" or "lean", see utils/memory.py; "max_messages" overrides the profile's message cache
+CACHE_PROFILE = config.get("cache_profile", "full")
+CACHE_OPTIONS = cache_options(CACHE_PROFILE, intents, config.get("max_messages", ...))
+
+
+class PrimeTree(app_commands.CommandTree):
+    async def _call(self, interaction):
+        # handler time starts at dispatch, like the prefix path in PrimeBot.invoke
+        interaction.extras["started"] = time.perf_counter()
+        await super()._call(interaction)
+
+    async def on_error(self, interaction, error):
+        # slash command failures never reach on_command_error
+        self.client.record_app_command(interaction, failed=True)
+        if isinstance(error, (app_commands.CheckFailure, app_commands.TransformerError)):
+            message = f"🚫 {error}"
+        else:
+            command = interaction.command.qualified_name if interaction.command else "unknown"
+            fp = self.client.errors.report(f"app_command:{command}", getattr(error, "original", error))
+            message = f"❌ Something went wrong running this command. (error `{fp}`)"
+        try:
+            if interaction.response.is_done():
+                await interaction.followup.send(message, ephemeral=True)
+            else:
+                await interaction.response.send_message(message, ephemeral=True)
+        except discord.HTTPException:
+            pass
+
     
-class PrimeBot(commands.Bot):
+class PrimeBot(commands.AutoShardedBot):
     def __init__(self):
         super().__init__(
             command_prefix=commands.when_mentioned_or(PREFIX),
             intents=intents,
             owner_id=OWNER_ID,
             help_command=None,
+            shard_count=SHARD_COUNT,
+            shard_ids=SHARD_IDS,
+            tree_cls=PrimeTree,
+            **CACHE_OPTIONS,
         )
-        self.db = None  # will hold Mongo client
+        self.cache_profile = CACHE_PROFILE
+        self.cluster_id = CLUSTER_ID
+        self.started_at = datetime.datetime.utcnow()
+        self.startup_timings = {}  # {phase: seconds}
+        self.cluster = ClusterReporter(self, CLUSTER_ID)
+        self.db = None  # utils.db.Database, the one Mongo pool every cog goes through
+        self.guild_cache = None  # per-guild settings cache shared by cogs
+        self.pipeline = MessagePipeline(self)  # cogs register on_message stages here
+        self.logs = LogDispatcher(self)  # batched sender for bot, command and mod log channels
+        self.dms = DMDispatcher()  # queued member DMs for moderation actions
+        self.scheduler = Scheduler(self)  # temp-bans, expiring roles, long mutes
+        self.analytics = CommandAnalytics(self, CMD_LOG_CHANNEL_ID)  # command usage, flushed to Mongo in batches
+        self.errors = ErrorReporter(self, BOT_LOG_CHANNEL_ID)  # deduplicated tracebacks for the bot log
+        self.web = None  # aiohttp runner for /healthz and /metrics
+        self._chunk_locks = {}
+
+    @contextmanager
+    def timed(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[phase] = time.perf_counter() - start
 
     async def setup_hook(self):
-        # connect to MongoDB
-        mongo_client = AsyncIOMotorClient(MONGO_URI)
-        self.db = mongo_client["prime_bot"]
+        with self.timed("total"):
+            with self.timed("web"):
+                self.web = await keep_alive(self, int(os.getenv("PORT", 8080)) + self.cluster_id)
+
+            # connect to MongoDB
+            with self.timed("database"):
+                self.db = Database.from_config(MONGO_URI, config, app_name=f"prime-bot-cluster-{self.cluster_id}")
+                await self.db.ensure_indexes()
+                self.guild_cache = GuildConfigCache(
+                    self.db.guilds,
+                    max_size=int(config.get("guild_cache_size", 10000)),
+                    ttl=float(config.get("guild_cache_ttl", 300)),
+                )
+                if config.get("cache_change_streams", False):
+                    self.guild_cache.start_watch()
 
-        # load all cogs
-        for filename in os.listdir("./cogs"):
-            if filename.endswith(".py"):
-                await self.load_extension(f"cogs.{filename[:-3]}")
-                print(f"✅ Loaded cog: {filename}")
+            # load all cogs concurrently (pipeline stages carry their own order)
+            with self.timed("cogs"):
+                extensions = [f"cogs.{filename[:-3]}" for filename in sorted(os.listdir("./cogs")) if filename.endswith(".py")]
+                await asyncio.gather(*(self.load_extension(ext) for ext in extensions))
+                print(f"✅ Loaded cogs: {', '.join(extensions)}")
 
+            # slash commands are global, one cluster syncing them is enough
+            if self.cluster_id == 0:
+                with self.timed("command_sync"):
+                    synced = await self.sync_commands()
+                print("✅ Slash commands synced globally!" if synced else "✅ Slash commands unchanged, skipped sync.")
+
+            self.cluster.start()
+            self.scheduler.start()  # waits for ready, then catches up on anything overdue
+            self.analytics.start()
+
+        print("⏱️ Startup: " + ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in self.startup_timings.items()))
+
+    def command_tree_hash(self) -> str:
+        """Stable hash of the app commands as they would be sent to Discord."""
+        payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands()),
+            key=lambda c: (c.get("type", 1), c["name"])
+        )
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def sync_commands(self, force: bool = False) -> bool:
+        """Sync the global command tree only when it changed since the last sync."""
+        digest = self.command_tree_hash()
+        state = await self.db.bot_state.find_one({"_id": "command_tree"})
+        if not force and state and state.get("hash") == digest:
+            return False
         await self.tree.sync()
-        print("✅ Slash commands synced globally!")
+        await self.db.bot_state.update_one(
+            {"_id": "command_tree"},
+            {"$set": {"hash": digest, "synced_at": datetime.datetime.utcnow()}},
+            upsert=True
+        )
+        return True
+
+    async def ensure_chunked(self, guild):
+        """Fetch a guild's full member list on first need instead of trusting the cache.
+
+        Only commands that walk guild.members need this; with the "balanced"
+        and "lean" profiles guilds are not chunked at startup.
+        """
+        if guild.chunked:
+            return
+        lock = self._chunk_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            if not guild.chunked:
+                start = time.perf_counter()
+                await guild.chunk(cache=True)
+                metrics.GUILD_CHUNKS.observe(time.perf_counter() - start)
+
+    def dispatch(self, event_name, /, *args, **kwargs):
+        metrics.EVENTS.inc(event_name)
+        super().dispatch(event_name, *args, **kwargs)
+
+    async def invoke(self, ctx):
+        if ctx.command is None:
+            return await super().invoke(ctx)
+        start = time.perf_counter()
+        await super().invoke(ctx)
+        elapsed = time.perf_counter() - start
+        metrics.COMMAND_LATENCY.observe(elapsed, ctx.command.qualified_name, "prefix")
+        self.analytics.record(ctx.command.qualified_name, "prefix", ctx.guild.id if ctx.guild else 0, elapsed, ctx.command_failed)
+
+    def record_app_command(self, interaction, failed: bool = False):
+        command = interaction.command.qualified_name if interaction.command else "unknown"
+        elapsed = time.perf_counter() - interaction.extras.get("started", time.perf_counter())
+        metrics.COMMAND_LATENCY.observe(elapsed, command, "app")
+        self.analytics.record(command, "app", interaction.guild_id or 0, elapsed, failed)
+
+    async def on_app_command_completion(self, interaction, command):
+        self.record_app_command(interaction)
+
+    async def on_message(self, message):
+        # single entry point for messages: cog stages first, then commands
+        if message.author.bot:
+            return
+        ctx = await self.pipeline.process(message)
+        if not ctx.stopped:
+            await self.invoke(ctx.command)
+
+    async def close(self):
+        self.scheduler.stop()
+        await self.analytics.close()
+        await self.dms.close()
+        self.errors.stop()
+        self.errors.flush_summaries()
+        await self.logs.close()
+        if self.web is not None:
+            await self.web.cleanup()
+        await super().close()
+        if self.db is not None:
+            self.db.close()
 
     async def on_ready(self):
         print(f"\n🤖 Logged in as {self.user} (ID: {self.user.id})")
@@ -67,58 +238,47 @@ class PrimeBot(commands.Bot):
 bot = PrimeBot()
 
 
-async def send_log(bot, message: str, channel_id: int):
-    """Send logs to a specific Discord channel."""
-    try:
-        channel = bot.get_channel(channel_id)
-        if channel:
-            await channel.send(message)
-    except Exception as e:
-        print(f"Failed to send log: {e}")
+def send_log(bot, message: str, channel_id: int):
+    """Queue a log line for a specific Discord channel (sent in batches by bot.logs)."""
+    bot.logs.enqueue(channel_id, content=message)
 
 @bot.event
 async def on_ready():
-    print(f"✅ Logged in as {bot.user}")
-    await send_log(bot, f"✅ **Bot is online** — connected as `{bot.user}`", BOT_LOG_CHANNEL_ID)
+    print(f"✅ Logged in as {bot.user} (cluster {bot.cluster_id}, shards {sorted(bot.shards)})")
+    send_log(bot, f"✅ **Cluster {bot.cluster_id} is online** — connected as `{bot.user}` | Shards: {sorted(bot.shards)}", BOT_LOG_CHANNEL_ID)
 
 @bot.event
 async def on_guild_join(guild):
-    await send_log(bot, f"🟢 **Joined server:** {guild.name} (`{guild.id}`) | Members: {guild.member_count}", SERVER_LOG_CHANNEL_ID)
+    send_log(bot, f"🟢 **Joined server:** {guild.name} (`{guild.id}`) | Members: {guild.member_count}", SERVER_LOG_CHANNEL_ID)
 
 @bot.event
 async def on_guild_remove(guild):
-    await send_log(bot, f"🔴 **Left server:** {guild.name} (`{guild.id}`)", SERVER_LOG_CHANNEL_ID)
-
-
-@bot.event
-async def on_command(ctx):
-    await send_log(ctx.bot, f"⚙️ Command used: `{ctx.command}` by **{ctx.author}** in **#{ctx.channel}**", CMD_LOG_CHANNEL_ID)
-
-@bot.event
-async def on_command_error(ctx, error):
-    await send_log(ctx.bot, f"❌ **Command Error:** `{ctx.command}` by {ctx.author}\n```{error}```", CMD_LOG_CHANNEL_ID)
-    await ctx.reply(f"❌ Error: {error}")
+    send_log(bot, f"🔴 **Left server:** {guild.name} (`{guild.id}`)", SERVER_LOG_CHANNEL_ID)
 
-import traceback
 
 @bot.event
 async def on_error(event_method, *args, **kwargs):
-    error_info = traceback.format_exc()
-    await send_log(bot, f"💥 **Error in `{event_method}`:**\n```py\n{error_info}\n```", BOT_LOG_CHANNEL_ID)
+    error = sys.exc_info()[1]
+    if error is not None:
+        bot.errors.report(event_method, error)
 
 @bot.event
 async def on_command_error(ctx, error):
+    if isinstance(error, commands.CommandNotFound):
+        return
     if isinstance(error, commands.MissingPermissions):
         await ctx.reply("🚫 You don’t have permission to use this command.")
     elif isinstance(error, commands.MissingRequiredArgument):
         await ctx.reply("⚠️ Missing arguments. Please check usage.")
-    elif isinstance(error, commands.CommandNotFound):
-        return
-    else:
+    elif isinstance(error, commands.UserInputError) or isinstance(error, commands.CheckFailure):
         await ctx.reply(f"❌ Error: {error}")
-        raise error
+    else:
+        # a bug, not a user mistake: report it once per fingerprint instead of per occurrence
+        fp = bot.errors.report(f"command:{ctx.command}", getattr(error, "original", error))
+        await ctx.reply(f"❌ Something went wrong running this command. (error `{fp}`)")
 
-bot.run(TOKEN)
+if __name__ == "__main__":
+    bot.run(TOKEN)
 
 
 
@@ -0,0 +1,485 @@
+# scripts/bench_events.py
+# Usage: python -m scripts.bench_events [scenario ...] [--scale 1.0] [--db-latency MS] [--concurrency N]
+#            [--record FILE] [--replay FILE] [--save FILE] [--compare FILE] [--tolerance 0.25]
+# Replays message floods, join waves and warn storms through the real cogs
+# (PrimeBot.on_message and the on_member_join listeners) with stub Discord
+# objects and an in-process Mongo (scripts/fake_mongo.py). No token, no network.
+#
+# Events are replayed back to back, so timing windows (anti-spam, welcome
+# coalescing) see a burst far denser than the stream's real rate.
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+import discord
+
+from scripts.fake_mongo import FakeDatabase
+from utils.analytics import percentile
+from utils.cache import GuildConfigCache
+
+EXTENSIONS = ("cogs.moderation", "cogs.utility", "cogs.server_tools")
+BOT_ID = 1400000000000000000
+GUILD_BASE = 1300000000000000000
+USER_BASE = 1100000000000000000
+GUILDS = 5
+AFK_SHARE = 0.02  # members of each guild who start out AFK
+
+CHAT = ["gm", "lol", "anyone up for ranked?", "brb", "nice", "ok", "same", "ggs", "what time is the event?",
+        "can someone help me with the bot setup", "that was insane 😂", "I'll be back in 10 minutes"]
+LINKS = ["join my server discord.gg/abcdef", "free nitro at https://dlscord-gift.ru/claim", "go to example[.]com now",
+         "check this out https://youtube.com/watch?v=dQw4w9WgXcQ"]
+SPAM = ["FREE NITRO click here", "@everyone JOIN NOW", "buy followers cheap"]
+
+
+# ==================================================
+# Stub Discord objects
+# ==================================================
+class StubAPI:
+    """Counts the Discord API calls the handlers would have made."""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    async def call(self, endpoint: str):
+        self.calls[endpoint] += 1
+        await asyncio.sleep(0)
+
+
+API = StubAPI()
+
+
+class StubRole:
+    def __init__(self, id: int, name: str, position: int = 1):
+        self.id = id
+        self.name = name
+        self.position = position
+        self.mention = f"<@&{id}>"
+
+    def __ge__(self, other):
+        return self.position >= other.position
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+
+class StubUser:
+    def __init__(self, id: int, name: str, bot: bool = False):
+        self.id = id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{id}>"
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        await API.call("dm")
+
+
+class StubMember(StubUser):
+    def __init__(self, id: int, name: str, guild, bot: bool = False, permissions: discord.Permissions = None):
+        super().__init__(id, name, bot)
+        self.guild = guild
+        self.guild_permissions = permissions or discord.Permissions.none()
+        self.joined_at = discord.utils.utcnow()
+        self.top_role = guild.default_role
+        self.timed_out_until = None
+
+    async def timeout(self, until, reason=None):
+        await API.call("timeout")
+
+    async def add_roles(self, *roles, reason=None):
+        await API.call("add_roles")
+
+
+class StubChannel:
+    def __init__(self, id: int, name: str, guild=None):
+        self.id = id
+        self.name = name
+        self.guild = guild
+        self.mention = f"<#{id}>"
+
+    async def send(self, content=None, **kwargs):
+        await API.call("send_message")
+
+
+class StubGuild:
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+        self.owner_id = USER_BASE
+        self.default_role = StubRole(id, "@everyone", 0)
+        self.auto_role = StubRole(id + 1, "Member")
+        self.general = StubChannel(id + 10, "general", self)
+        self.welcome = StubChannel(id + 11, "welcome", self)
+        self.mod_logs = StubChannel(id + 12, "mod-logs", self)
+        self.channels = {c.id: c for c in (self.general, self.welcome, self.mod_logs)}
+        self.members = {}
+        self.me = StubMember(BOT_ID, "Prime", self, bot=True, permissions=discord.Permissions.all())
+        self.member_count = 0
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id: int):
+        return self.auto_role if role_id == self.auto_role.id else None
+
+    def get_member(self, user_id: int):
+        return self.members.get(user_id)
+
+    def member(self, user_id: int) -> StubMember:
+        member = self.members.get(user_id)
+        if member is None:
+            member = self.members[user_id] = StubMember(user_id, f"user{user_id % 100000}", self)
+            self.member_count += 1
+        return member
+
+
+class StubMessage:
+    _ids = iter(range(1500000000000000000, sys.maxsize))
+
+    def __init__(self, guild: StubGuild, author: StubMember, content: str, mentions: list):
+        self.id = next(StubMessage._ids)
+        self.guild = guild
+        self.channel = guild.general
+        self.author = author
+        self.content = content
+        self.mentions = mentions
+        self.role_mentions = []
+        self.channel_mentions = []
+        self.attachments = []
+        self.embeds = []
+        self.webhook_id = None
+
+    async def delete(self, delay=None):
+        await API.call("delete_message")
+
+
+class World:
+    """The guilds every scenario runs in, with their settings seeded into the fake database."""
+
+    def __init__(self, guilds: int = GUILDS):
+        self.guilds = {GUILD_BASE + i * 1000: StubGuild(GUILD_BASE + i * 1000, f"Guild {i}") for i in range(guilds)}
+        self.channels = {cid: channel for guild in self.guilds.values() for cid, channel in guild.channels.items()}
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id) or StubChannel(channel_id, "log")
+
+    def afk_users(self, guild_id: int, members: int) -> list:
+        return [USER_BASE + guild_id % 1000 * 1_000_000 + i for i in range(int(members * AFK_SHARE))]
+
+    def seed(self, db: FakeDatabase, members: int):
+        from cogs.server_tools import DEFAULT_CONFIG
+
+        since = discord.utils.utcnow().replace(tzinfo=None)
+        for guild in self.guilds.values():
+            db.guilds._insert({
+                "guild_id": guild.id, "anti_spam": True, "link_blocker": True,
+                "mod_logs_channel": guild.mod_logs.id, "warn_expiry_days": 30,
+            })
+            db.server_settings._insert({**DEFAULT_CONFIG, "_id": guild.id, "welcome_channel": guild.welcome.id, "auto_role": guild.auto_role.id})
+            for user_id in self.afk_users(guild.id, members):
+                db.afk._insert({"guild_id": guild.id, "user_id": user_id, "reason": "sleeping", "since": since})
+
+    def build(self, event: dict):
+        """Event dict (as recorded) -> (kind, stub object) ready for replay."""
+        guild = self.guilds[event["guild"]]
+        if event["event"] == "join":
+            guild.member_count += 1
+            return "join", StubMember(event["user"], f"user{event['user'] % 100000}", guild)
+        mentions = [guild.member(user_id) for user_id in event.get("mentions", ())]
+        return "message", StubMessage(guild, guild.member(event["user"]), event["content"], mentions)
+
+
+# ==================================================
+# Scenarios (lists of recordable event dicts)
+# ==================================================
+def _member_id(guild_id: int, index: int) -> int:
+    return USER_BASE + guild_id % 1000 * 1_000_000 + index
+
+
+def scenario_chat(world: World, rng: random.Random, scale: float) -> list:
+    """Ordinary chatter from a large member pool, a few mentions; nothing should be flagged."""
+    count = int(20_000 * scale)
+    guild_ids = list(world.guilds)
+    events = []
+    for _ in range(count):
+        guild_id = rng.choice(guild_ids)
+        events.append({
+            "event": "message", "guild": guild_id, "user": _member_id(guild_id, rng.randrange(100, count + 100)),
+            "content": rng.choice(CHAT),
+            "mentions": [_member_id(guild_id, rng.randrange(100, count + 100))] if rng.random() < 0.03 else [],
+        })
+    return events
+
+
+def scenario_afk(world: World, rng: random.Random, scale: float) -> list:
+    """Mentions of AFK members, and AFK members coming back."""
+    count = int(10_000 * scale)
+    events = []
+    for _ in range(count):
+        guild_id = rng.choice(list(world.guilds))
+        afk = world.afk_users(guild_id, count)
+        author = rng.choice(afk) if rng.random() < 0.02 else _member_id(guild_id, rng.randrange(count, count * 2))
+        mentions = rng.sample(afk, min(len(afk), rng.randint(1, 3))) if rng.random() < 0.3 else []
+        events.append({"event": "message", "guild": guild_id, "user": author, "content": rng.choice(CHAT), "mentions": mentions})
+    return events
+
+
+def scenario_spam(world: World, rng: random.Random, scale: float) -> list:
+    """Message flood with a handful of spammers repeating themselves and mass-mentioning."""
+    count = int(20_000 * scale)
+    guild_ids = list(world.guilds)
+    spammers = [(rng.choice(guild_ids), rng.randrange(count, count + 1000)) for _ in range(20)]
+    events = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            guild_id, index = rng.choice(spammers)
+            mentions = [_member_id(guild_id, rng.randrange(100, count)) for _ in range(rng.randrange(0, 6))]
+            events.append({"event": "message", "guild": guild_id, "user": _member_id(guild_id, index), "content": rng.choice(SPAM), "mentions": mentions})
+        else:
+            guild_id = rng.choice(guild_ids)
+            events.append({"event": "message", "guild": guild_id, "user": _member_id(guild_id, rng.randrange(100, count + 100)), "content": rng.choice(CHAT), "mentions": []})
+    return events
+
+
+def scenario_links(world: World, rng: random.Random, scale: float) -> list:
+    """Warn storm: a fifth of the messages carry blocked links, each one deleted and warned."""
+    count = int(10_000 * scale)
+    guild_ids = list(world.guilds)
+    events = []
+    for _ in range(count):
+        guild_id = rng.choice(guild_ids)
+        content = rng.choice(LINKS) if rng.random() < 0.2 else rng.choice(CHAT)
+        events.append({"event": "message", "guild": guild_id, "user": _member_id(guild_id, rng.randrange(100, 2100)), "content": content, "mentions": []})
+    return events
+
+
+def scenario_joins(world: World, rng: random.Random, scale: float) -> list:
+    """Join wave: welcome messages and auto roles for new members."""
+    count = int(5_000 * scale)
+    guild_ids = list(world.guilds)
+    return [{"event": "join", "guild": guild_id, "user": _member_id(guild_id, 500_000 + i)}
+            for i, guild_id in enumerate(rng.choice(guild_ids) for _ in range(count))]
+
+
+SCENARIOS = {
+    "chat": scenario_chat,
+    "afk": scenario_afk,
+    "spam": scenario_spam,
+    "links": scenario_links,
+    "joins": scenario_joins,
+}
+
+
+# ==================================================
+# Harness
+# ==================================================
+async def load_bot(world: World):
+    import main
+
+    bot = main.bot
+    bot._connection.user = StubUser(BOT_ID, "Prime", bot=True)
+    StubMessage._state = bot._connection  # commands.Context reads it
+    # log batches go to stub channels instead of the REST API
+    bot.get_channel = world.get_channel
+    bot.get_partial_messageable = world.get_channel
+    bot.get_guild = world.guilds.get
+    return bot
+
+
+async def prepare(bot, world: World, members: int, db_latency: float) -> FakeDatabase:
+    """Fresh database and freshly loaded cogs, so every run starts from the same state."""
+    for extension in EXTENSIONS:
+        if extension in bot.extensions:
+            await bot.unload_extension(extension)
+    bot.db = FakeDatabase(latency=db_latency)
+    world.seed(bot.db, members)
+    bot.guild_cache = GuildConfigCache(bot.db.guilds)
+    for extension in EXTENSIONS:
+        await bot.load_extension(extension)
+    bot.db.calls.clear()
+    API.calls.clear()
+    return bot.db
+
+
+async def drain(bot):
+    """Wait for the background work the handlers queued (welcomes, auto roles, DMs, logs, AFK writes)."""
+    tools = bot.get_cog("ServerTools")
+    await tools.welcomes.close()
+    await asyncio.gather(*tools.welcomes._running)
+    await tools.role_queue.queue.join()
+    if bot.dms.queue is not None:
+        await bot.dms.queue.join()
+    await bot.get_cog("Utility").afk_users.flush()
+    for channel_id, queue in bot.logs.channels.items():
+        await bot.logs._send(channel_id, queue)
+
+
+async def replay(bot, items: list, concurrency: int) -> list:
+    async def on_join(member):
+        for listener in bot.extra_events.get("on_member_join", ()):
+            await listener(member)
+
+    handlers = {"message": bot.on_message, "join": on_join}
+    latencies = []
+
+    async def run(kind, obj):
+        start = time.perf_counter()
+        await handlers[kind](obj)
+        latencies.append(time.perf_counter() - start)
+
+    if concurrency <= 1:
+        for kind, obj in items:
+            await run(kind, obj)
+    else:
+        # like the gateway: each event is its own task, at most `concurrency` in flight
+        for i in range(0, len(items), concurrency):
+            await asyncio.gather(*(run(kind, obj) for kind, obj in items[i:i + concurrency]))
+    return latencies
+
+
+def _error_count(bot) -> int:
+    return sum(entry.count for entry in bot.errors.entries.values())
+
+
+async def run_scenario(bot, world: World, events: list, args) -> dict:
+    members = max(1, len(events))
+    db = await prepare(bot, world, members, args.db_latency / 1000)
+    items = [world.build(event) for event in events]
+    errors = _error_count(bot)
+
+    start = time.perf_counter()
+    latencies = await replay(bot, items, args.concurrency)
+    elapsed = time.perf_counter() - start
+    await drain(bot)
+
+    db_calls = sum(db.calls.values())
+    api_calls = sum(API.calls.values())
+    ordered = sorted(latencies)
+    result = {
+        "events": len(events),
+        "throughput": len(events) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 0.5) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+        "db_calls_per_event": db_calls / len(events),
+        "api_calls_per_event": api_calls / len(events),
+        "db_calls": {f"{collection}.{command}": count for (collection, command), count in sorted(db.calls.items())},
+        "api_calls": dict(sorted(API.calls.items())),
+        "errors": _error_count(bot) - errors,
+    }
+
+    # second pass under tracemalloc, on a fresh state
+    await prepare(bot, world, members, args.db_latency / 1000)
+    items = [world.build(event) for event in events]
+    tracemalloc.start()
+    await replay(bot, items, args.concurrency)
+    await drain(bot)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result["retained_bytes_per_event"] = current / len(events)
+    result["peak_mib"] = peak / 1024 / 1024
+    return result
+
+
+def print_result(name: str, result: dict):
+    print(f"\n{name}: {result['events']:,} events")
+    print(f"  throughput      {result['throughput']:10,.0f} events/s")
+    print(f"  latency         p50 {result['p50_ms']:.3f} ms · p99 {result['p99_ms']:.3f} ms · max {result['max_ms']:.3f} ms")
+    print(f"  db calls/event  {result['db_calls_per_event']:10.3f}  " + ", ".join(f"{k} {v}" for k, v in result["db_calls"].items()))
+    print(f"  api calls/event {result['api_calls_per_event']:10.3f}  " + ", ".join(f"{k} {v}" for k, v in result["api_calls"].items()))
+    print(f"  memory          {result['retained_bytes_per_event']:10.0f} B retained/event, {result['peak_mib']:.2f} MiB peak (tracemalloc)")
+    if result["errors"]:
+        print(f"  ⚠️ {result['errors']} handler errors (see bot.errors)")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions against a saved run. Call counts are deterministic, so any increase counts."""
+    problems = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["throughput"] < before["throughput"] * (1 - tolerance):
+            problems.append(f"{name}: throughput {before['throughput']:,.0f} -> {result['throughput']:,.0f} events/s")
+        if result["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p99 {before['p99_ms']:.3f} -> {result['p99_ms']:.3f} ms")
+        for key in ("db_calls_per_event", "api_calls_per_event"):
+            if result[key] > before[key] + 0.001:
+                problems.append(f"{name}: {key} {before[key]:.3f} -> {result[key]:.3f}")
+        if result["errors"] > before.get("errors", 0):
+            problems.append(f"{name}: {result['errors']} handler errors")
+    return problems
+
+
+async def bench(args) -> int:
+    world = World()
+    rng = random.Random(args.seed)
+    if args.replay:
+        streams = {}
+        with open(args.replay, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    event = json.loads(line)
+                    streams.setdefault(event.get("scenario", "replay"), []).append(event)
+    else:
+        streams = {name: SCENARIOS[name](world, rng, args.scale) for name in args.scenarios or SCENARIOS}
+
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            for name, events in streams.items():
+                for event in events:
+                    f.write(json.dumps({"scenario": name, **event}) + "\n")
+        print(f"Recorded {sum(map(len, streams.values())):,} events to {args.record}")
+
+    bot = await load_bot(world)
+    results = {}
+    for name, events in streams.items():
+        results[name] = await run_scenario(bot, world, events, args)
+        print_result(name, results[name])
+    # no gateway to close; stop what the run started
+    for extension in EXTENSIONS:
+        await bot.unload_extension(extension)
+    await bot.dms.close()
+    await bot.logs.close()
+    bot.errors.stop()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        print("\n" + ("\n".join(f"❌ {p}" for p in problems) if problems else "✅ No regressions against the baseline."))
+        return 1 if problems else 0
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay event streams through the cogs offline and report throughput.")
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every scenario's event count")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db-latency", type=float, default=0.0, help="simulated Mongo round trip in ms")
+    parser.add_argument("--concurrency", type=int, default=1, help="events in flight at once")
+    parser.add_argument("--record", help="write the generated events to this JSONL file")
+    parser.add_argument("--replay", help="replay events from a JSONL file instead of generating them")
+    parser.add_argument("--save", help="write results as JSON (use as a --compare baseline)")
+    parser.add_argument("--compare", help="baseline JSON from --save; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed throughput/p99 change against the baseline")
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    sys.exit(asyncio.run(bench(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# scripts/bench_links.py
+# Usage: python -m scripts.bench_links [iterations]
+import random
+import re
+import sys
+import time
+
+from utils import links
+
+CHAT = [
+    "gm everyone", "lol", "who's up for a game tonight?", "brb", "that was insane 😂",
+    "can someone help me with the bot setup", "ok", "nice!!", "I'll be back in 10 minutes",
+    "did you see the patch notes", "yes", "no way", "ggs", "same tbh", "what time is the event?",
+    "hello @everyone please read the rules", "this is fine.", "e.g. the second one", "version 2.4 is out",
+]
+LINKS = [
+    "check this out https://youtube.com/watch?v=dQw4w9WgXcQ", "join my server discord.gg/abcdef",
+    "free nitro at hxxps://dlscord-gift.ru/claim", "www.example.com has it", "go to example[.]com now",
+    "docs: https://discordpy.readthedocs.io/en/stable/", "ｆｒｅｅ．ｇｉｆｔ/nitro",
+]
+
+
+def build_corpus(size=20_000, link_ratio=0.05, seed=7):
+    rng = random.Random(seed)
+    return [rng.choice(LINKS) if rng.random() < link_ratio else rng.choice(CHAT) for _ in range(size)]
+
+
+def bench(label, func, corpus, iterations):
+    start = time.perf_counter()
+    hits = 0
+    for _ in range(iterations):
+        for text in corpus:
+            if func(text):
+                hits += 1
+    elapsed = time.perf_counter() - start
+    rate = len(corpus) * iterations / elapsed
+    print(f"{label:<28} {rate:>12,.0f} msg/s   {hits // iterations} flagged")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    corpus = build_corpus()
+    policy = links.compile_policy(("youtube.com", "readthedocs.io"), ())
+    empty = links.DomainPolicy()
+    print(f"{len(corpus):,} messages x {iterations}")
+
+    bench("legacy re.search", lambda t: re.search(links.LEGACY_RE, t, re.IGNORECASE), corpus, iterations)
+    bench("links.find_blocked", lambda t: links.find_blocked(t, policy), corpus, iterations)
+    bench("links.find_blocked (no list)", lambda t: links.find_blocked(t, empty), corpus, iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# scripts/bench_spam.py
+# Usage: python -m scripts.bench_spam [messages] [members]
+import random
+import sys
+import time
+import tracemalloc
+
+from utils.spam import SpamTracker
+
+CHAT = ["gm", "lol", "anyone up for ranked?", "brb", "nice", "ok", "same", "ggs", "what time is the event?"]
+GUILD_ID = 336642139381301249
+
+
+def build_traffic(messages: int, members: int, seed: int = 7):
+    """(user_id, content, mentions, timestamp) at ~1000 msg/s, with a few spammers mixed in."""
+    rng = random.Random(seed)
+    spammers = [rng.randrange(members) for _ in range(20)]
+    traffic = []
+    now = 1000.0
+    for i in range(messages):
+        now += 0.001
+        if rng.random() < 0.02:
+            user = rng.choice(spammers)
+            traffic.append((user, "FREE NITRO click here", rng.randrange(0, 4), now))
+        else:
+            traffic.append((rng.randrange(members), rng.choice(CHAT), 0, now))
+    return traffic
+
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    members = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    traffic = build_traffic(messages, members)
+    tracker = SpamTracker()
+    print(f"{messages:,} messages from {members:,} members")
+
+    tracemalloc.start()
+    hits = 0
+    start = time.perf_counter()
+    for user_id, content, mentions, now in traffic:
+        if tracker.check(GUILD_ID, user_id, content, mentions, now=now):
+            hits += 1
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"per message     {elapsed / messages * 1e6:8.2f} µs  (with tracemalloc)")
+    print(f"flagged         {hits:8,}")
+    print(f"tracked members {len(tracker):8,}  (evicted {tracker.evictions:,})")
+    print(f"memory          {current / 1024 / 1024:8.2f} MiB now, {peak / 1024 / 1024:.2f} MiB peak")
+
+    tracker = SpamTracker()
+    start = time.perf_counter()
+    for user_id, content, mentions, now in traffic:
+        tracker.check(GUILD_ID, user_id, content, mentions, now=now)
+    elapsed = time.perf_counter() - start
+    print(f"per message     {elapsed / messages * 1e6:8.2f} µs  (plain)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# scripts/consolidate_databases.py
+# Usage: python -m scripts.consolidate_databases [--dry-run] [--drop-legacy]
+# Copies data left in the old `primebot` and `PrimeBot` databases into `prime_bot`.
+# Safe to re-run: documents already in prime_bot are never overwritten.
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from cogs.server_tools import DEFAULT_CONFIG
+from utils.db import LEGACY_DB_NAMES, Database
+from utils.warns import WarnStore
+
+BATCH = 500
+
+
+async def merge_server_settings(source, target, dry_run: bool) -> int:
+    """ServerTools used `primebot.server_settings` before it moved to the bot's handle.
+
+    Guilds touched since then have a prime_bot document made of defaults; for
+    those, a field keeps its prime_bot value only if someone changed it from
+    the default, otherwise the legacy value is restored.
+    """
+    merged = 0
+    ops = []
+    async for doc in source.find({}, batch_size=BATCH):
+        current = await target.find_one({"_id": doc["_id"]})
+        if current is None:
+            update = {"$setOnInsert": doc}
+        else:
+            changes = {
+                key: value for key, value in doc.items()
+                if key != "_id" and current.get(key, DEFAULT_CONFIG.get(key)) == DEFAULT_CONFIG.get(key) and value != current.get(key)
+            }
+            if not changes:
+                continue
+            update = {"$set": changes}
+        ops.append(UpdateOne({"_id": doc["_id"]}, update, upsert=True))
+        merged += 1
+        if len(ops) >= BATCH:
+            if not dry_run:
+                await target.bulk_write(ops, ordered=False)
+            ops.clear()
+    if ops and not dry_run:
+        await target.bulk_write(ops, ordered=False)
+    return merged
+
+
+async def import_warnings(source, db: Database, dry_run: bool) -> int:
+    """`PrimeBot.warnings` held {user_id, guild_id, reason} from the old utils/db.py helpers."""
+    store = WarnStore(db.warns, db.warn_entries)
+    done = set(await db.warn_entries.distinct("legacy_id"))  # imported by an earlier run
+    imported = 0
+    async for doc in source.find({}, batch_size=BATCH):
+        if doc["_id"] in done:
+            continue
+        imported += 1
+        if dry_run:
+            continue
+        # numbered after the user's existing warns
+        number = await store.next_number(doc["guild_id"], doc["user_id"])
+        await db.warn_entries.insert_one({
+            "legacy_id": doc["_id"],
+            "guild_id": doc["guild_id"],
+            "user_id": doc["user_id"],
+            "number": number,
+            "reason": doc.get("reason", "No reason provided"),
+            "moderator": None,
+            "time": doc["_id"].generation_time.replace(tzinfo=None)
+        })
+    return imported
+
+
+async def copy_collection(source, target, dry_run: bool) -> int:
+    """Anything else is copied as-is, keeping documents that already exist in prime_bot."""
+    copied = 0
+    ops = []
+    async for doc in source.find({}, batch_size=BATCH):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True))
+        if len(ops) >= BATCH:
+            copied += await _flush(target, ops, dry_run)
+    copied += await _flush(target, ops, dry_run)
+    return copied
+
+
+async def _flush(target, ops: list, dry_run: bool) -> int:
+    if not ops:
+        return 0
+    count = len(ops)
+    if not dry_run:
+        result = await target.bulk_write(ops, ordered=False)
+        count = result.upserted_count
+    ops.clear()
+    return count
+
+
+async def consolidate(uri: str, dry_run: bool, drop_legacy: bool):
+    db = Database(uri, timeout_ms=0, app_name="prime-consolidate")
+    existing = await db.client.list_database_names()
+    if not dry_run:
+        await db.ensure_indexes()
+
+    for legacy_name in LEGACY_DB_NAMES:
+        if legacy_name not in existing:
+            print(f"{legacy_name}: not found, skipping")
+            continue
+        legacy = db.client[legacy_name]
+        for name in await legacy.list_collection_names():
+            source = legacy[name]
+            if (legacy_name, name) == ("primebot", "server_settings"):
+                count = await merge_server_settings(source, db.server_settings, dry_run)
+                what = "guild settings merged"
+            elif (legacy_name, name) == ("PrimeBot", "warnings"):
+                count = await import_warnings(source, db, dry_run)
+                what = "warnings imported into warn_entries"
+            else:
+                count = await copy_collection(source, db[name], dry_run)
+                what = f"documents copied into {name}"
+            print(f"{legacy_name}.{name}: {count} {what}")
+        if drop_legacy and not dry_run:
+            await db.client.drop_database(legacy_name)
+            print(f"{legacy_name}: dropped")
+
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidate the legacy databases into prime_bot.")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change, write nothing")
+    parser.add_argument("--drop-legacy", action="store_true", help="drop the legacy databases after copying")
+    args = parser.parse_args()
+
+    load_dotenv()
+    asyncio.run(consolidate(os.getenv("MONGO_URI"), args.dry_run, args.drop_legacy))
+
+
+if __name__ == "__main__":
+    main()
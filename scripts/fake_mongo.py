@@ -0,0 +1,406 @@
+# scripts/fake_mongo.py
+# In-process stand-in for the Motor collections the cogs use, for offline
+# benchmarks (scripts/bench_events.py). Covers the query and update operators
+# the bot actually sends, not MongoDB in general; indexes are accepted and ignored.
+import asyncio
+import copy
+import itertools
+from collections import Counter
+from types import SimpleNamespace
+
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReturnDocument, UpdateMany, UpdateOne
+
+from utils.db import Database
+
+_ids = itertools.count(1)
+
+
+def _get(doc: dict, path: str):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return None
+        doc = doc[part]
+    return doc
+
+
+def _has(doc: dict, path: str) -> bool:
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return False
+        doc = doc[part]
+    return True
+
+
+def _compare(value, op: str, arg) -> bool:
+    if op == "$eq":
+        return value == arg
+    if op == "$ne":
+        return value != arg
+    if op == "$in":
+        return value in arg
+    if op == "$nin":
+        return value not in arg
+    if op == "$not":
+        return not all(_compare(value, inner_op, inner) for inner_op, inner in arg.items())
+    if value is None:
+        return False
+    try:
+        return {"$gt": value > arg, "$gte": value >= arg, "$lt": value < arg, "$lte": value <= arg}[op]
+    except TypeError:
+        return False
+    except KeyError:
+        raise NotImplementedError(f"fake_mongo: query operator {op}") from None
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+        elif isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            value = _get(doc, key)
+            for op, arg in cond.items():
+                if op == "$exists":
+                    if _has(doc, key) != bool(arg):
+                        return False
+                elif not _compare(value, op, arg):
+                    return False
+        elif _get(doc, key) != cond:
+            return False
+    return True
+
+
+def _set(doc: dict, path: str, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def _unset(doc: dict, path: str):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+
+def _evaluate(doc: dict, expr):
+    """Aggregation expressions used by pipeline updates ($add, $ifNull, $size, field refs)."""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _get(doc, expr[1:])
+    if isinstance(expr, dict) and len(expr) == 1:
+        (op, args), = expr.items()
+        if op == "$add":
+            values = [_evaluate(doc, arg) for arg in args]
+            return None if any(v is None for v in values) else sum(values[1:], values[0])
+        if op == "$ifNull":
+            value = _evaluate(doc, args[0])
+            return _evaluate(doc, args[1]) if value is None else value
+        if op == "$size":
+            return len(_evaluate(doc, args))
+        raise NotImplementedError(f"fake_mongo: expression {op}")
+    return expr
+
+
+def apply_update(doc: dict, update, inserting: bool = False):
+    if isinstance(update, list):
+        for stage in update:
+            (op, fields), = stage.items()
+            if op not in ("$set", "$addFields"):
+                raise NotImplementedError(f"fake_mongo: pipeline stage {op}")
+            values = {path: _evaluate(doc, expr) for path, expr in fields.items()}
+            for path, value in values.items():
+                _set(doc, path, value)
+        return
+    for op, fields in update.items():
+        for path, value in fields.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                _set(doc, path, copy.deepcopy(value))
+            elif op == "$setOnInsert":
+                continue
+            elif op == "$unset":
+                _unset(doc, path)
+            elif op == "$inc":
+                _set(doc, path, (_get(doc, path) or 0) + value)
+            elif op == "$push":
+                current = _get(doc, path)
+                _set(doc, path, (current or []) + [value])
+            elif op == "$pull":
+                current = _get(doc, path) or []
+                _set(doc, path, [item for item in current if item != value])
+            else:
+                raise NotImplementedError(f"fake_mongo: update operator {op}")
+
+
+def _project(doc: dict, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {key for key, on in projection.items() if on and key != "_id"}
+    if include:
+        result = {key: copy.deepcopy(doc[key]) for key in include if key in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    return {key: copy.deepcopy(value) for key, value in doc.items() if projection.get(key, 1)}
+
+
+def _sorted(docs: list, sort: list) -> list:
+    for key, direction in reversed(sort or []):
+        docs.sort(key=lambda doc: (_get(doc, key) is not None, _get(doc, key)), reverse=direction < 0)
+    return docs
+
+
+class FakeCursor:
+    def __init__(self, collection, query, projection):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=1):
+        self._sort = key if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _results(self) -> list:
+        docs = _sorted(self.collection._matching(self.query), self._sort)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(doc, self.projection) for doc in docs]
+
+    async def to_list(self, length=None):
+        await self.collection.database.round_trip(self.collection.name, "find")
+        docs = self._results()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self.collection.database.round_trip(self.collection.name, "find")
+        for doc in self._results():
+            yield doc
+
+
+class FakeCollection:
+    """Documents in insertion order, with lookups by _id and by (guild_id, user_id).
+
+    The lookups stand in for the real indexes so a warn storm doesn't turn
+    into a full scan per call; they assume those fields never change after insert.
+    """
+
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+        self.docs = {}  # {_id: doc}, insertion ordered
+        self._by_member = {}  # {(guild_id, user_id): {_id: doc}}
+
+    async def _call(self, op: str):
+        await self.database.round_trip(self.name, op)
+
+    def _candidates(self, query: dict):
+        if "_id" in query and not isinstance(query["_id"], dict):
+            doc = self.docs.get(query["_id"])
+            return [] if doc is None else [doc]
+        guild_id, user_id = query.get("guild_id"), query.get("user_id")
+        if guild_id is not None and user_id is not None and not isinstance(guild_id, dict) and not isinstance(user_id, dict):
+            return list(self._by_member.get((guild_id, user_id), {}).values())
+        return list(self.docs.values())
+
+    def _matching(self, query: dict) -> list:
+        return [doc for doc in self._candidates(query) if matches(doc, query)]
+
+    def _first(self, query: dict, sort=None):
+        found = _sorted(self._matching(query), sort if isinstance(sort, list) else [])
+        return found[0] if found else None
+
+    def _insert(self, doc: dict) -> dict:
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", next(_ids))
+        self.docs[doc["_id"]] = doc
+        if "guild_id" in doc and "user_id" in doc:
+            self._by_member.setdefault((doc["guild_id"], doc["user_id"]), {})[doc["_id"]] = doc
+        return doc
+
+    def _remove(self, doc: dict):
+        del self.docs[doc["_id"]]
+        bucket = self._by_member.get((doc.get("guild_id"), doc.get("user_id")))
+        if bucket is not None:
+            bucket.pop(doc["_id"], None)
+
+    def _upsert_seed(self, query: dict) -> dict:
+        return {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+
+    def _update(self, query: dict, update, upsert: bool, many: bool = False):
+        found = self._matching(query)
+        if not many:
+            found = found[:1]
+        for doc in found:
+            apply_update(doc, update)
+        upserted_id = None
+        if not found and upsert:
+            doc = self._upsert_seed(query)
+            apply_update(doc, update, inserting=True)
+            upserted_id = self._insert(doc)["_id"]
+        return SimpleNamespace(matched_count=len(found), modified_count=len(found), upserted_id=upserted_id)
+
+    def _delete(self, query: dict, many: bool) -> int:
+        found = self._matching(query)
+        if not many:
+            found = found[:1]
+        for doc in found:
+            self._remove(doc)
+        return len(found)
+
+    # ==================================================
+    # Motor API
+    # ==================================================
+    async def find_one(self, query: dict = None, projection=None, sort=None):
+        await self._call("find")
+        doc = self._first(query or {}, sort)
+        return None if doc is None else _project(doc, projection)
+
+    def find(self, query: dict = None, projection=None, batch_size=None):
+        return FakeCursor(self, query or {}, projection)
+
+    async def count_documents(self, query: dict):
+        await self._call("aggregate")
+        return len(self._matching(query))
+
+    async def distinct(self, key: str, query: dict = None):
+        await self._call("distinct")
+        values = []
+        for doc in self._matching(query or {}):
+            if _has(doc, key) and _get(doc, key) not in values:
+                values.append(_get(doc, key))
+        return values
+
+    async def insert_one(self, doc: dict):
+        await self._call("insert")
+        return SimpleNamespace(inserted_id=self._insert(doc)["_id"])
+
+    async def insert_many(self, docs: list, ordered: bool = True):
+        await self._call("insert")
+        return SimpleNamespace(inserted_ids=[self._insert(doc)["_id"] for doc in docs])
+
+    async def update_one(self, query: dict, update, upsert: bool = False, **kwargs):
+        await self._call("update")
+        return self._update(query, update, upsert)
+
+    async def update_many(self, query: dict, update, upsert: bool = False, **kwargs):
+        await self._call("update")
+        return self._update(query, update, upsert, many=True)
+
+    async def find_one_and_update(self, query: dict, update, projection=None, upsert: bool = False,
+                                  return_document=ReturnDocument.BEFORE, sort=None, **kwargs):
+        await self._call("findAndModify")
+        doc = self._first(query, sort)
+        if doc is None:
+            if not upsert:
+                return None
+            doc = self._upsert_seed(query)
+            apply_update(doc, update, inserting=True)
+            doc = self._insert(doc)
+            return _project(doc, projection) if return_document == ReturnDocument.AFTER else None
+        before = _project(doc, projection)
+        apply_update(doc, update)
+        return _project(doc, projection) if return_document == ReturnDocument.AFTER else before
+
+    async def find_one_and_delete(self, query: dict, projection=None, sort=None, **kwargs):
+        await self._call("findAndModify")
+        doc = self._first(query, sort)
+        if doc is not None:
+            self._remove(doc)
+        return None if doc is None else _project(doc, projection)
+
+    async def delete_one(self, query: dict):
+        await self._call("delete")
+        return SimpleNamespace(deleted_count=self._delete(query, many=False))
+
+    async def delete_many(self, query: dict):
+        await self._call("delete")
+        return SimpleNamespace(deleted_count=self._delete(query, many=True))
+
+    async def bulk_write(self, requests: list, ordered: bool = True):
+        await self._call("bulkWrite")
+        result = Counter()
+        for request in requests:
+            document = request._doc if isinstance(request, InsertOne) else None
+            if document is not None:
+                self._insert(document)
+                result["inserted"] += 1
+                continue
+            query, update, upsert = request._filter, getattr(request, "_doc", None), bool(getattr(request, "_upsert", False))
+            if isinstance(request, (UpdateOne, UpdateMany)):
+                outcome = self._update(query, update, upsert, many=isinstance(request, UpdateMany))
+                result["modified"] += outcome.modified_count
+                result["upserted"] += outcome.upserted_id is not None
+            elif isinstance(request, (DeleteOne, DeleteMany)):
+                result["deleted"] += self._delete(query, many=isinstance(request, DeleteMany))
+            else:
+                raise NotImplementedError(f"fake_mongo: bulk request {type(request).__name__}")
+        return SimpleNamespace(inserted_count=result["inserted"], modified_count=result["modified"],
+                               upserted_count=result["upserted"], deleted_count=result["deleted"])
+
+    async def create_indexes(self, indexes: list):
+        await self._call("createIndexes")
+        return [index.document["name"] for index in indexes]
+
+
+class FakeMongo:
+    """The `db` handle of a FakeDatabase: collections by attribute or item, created on first use."""
+
+    def __init__(self, database):
+        self._database = database
+        self._collections = {}
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = FakeCollection(self._database, name)
+        return collection
+
+    async def command(self, name: str):
+        await self._database.round_trip("admin", name)
+        return {"ok": 1}
+
+
+class FakeDatabase(Database):
+    """utils.db.Database backed by FakeCollections; counts every round trip per (collection, command).
+
+    `latency` seconds are slept per round trip to model a remote server;
+    with 0 each call still yields to the loop once, like a real driver.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.client = None
+        self.latency = latency
+        self.calls = Counter()
+        self.db = FakeMongo(self)
+
+    async def round_trip(self, collection: str, command: str):
+        self.calls[(collection, command)] += 1
+        await asyncio.sleep(self.latency)
+
+    def close(self):
+        pass
@@ -0,0 +1,99 @@
+# scripts/migrate_warns.py
+# Usage: python -m scripts.migrate_warns [--batch 500] [--dry-run]
+# Moves the legacy `warns` arrays into one `warn_entries` document per warn.
+# Safe to re-run: entries are upserted on (guild_id, user_id, number).
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from utils.db import Database
+
+
+def entry_numbers(warns: list) -> list:
+    """Each warn keeps its stored `number`. Warns without one, or repeating an earlier
+    warn's number (the old array numbering could race), get their array position, or
+    the next free number if that is taken."""
+    numbers = [warn.get("number") if isinstance(warn.get("number"), int) else None for warn in warns]
+    taken = set()
+    for index, number in enumerate(numbers):
+        if number in taken:
+            numbers[index] = None
+        elif number is not None:
+            taken.add(number)
+    for index, number in enumerate(numbers):
+        if number is None:
+            number = index + 1 if index + 1 not in taken else max(taken) + 1
+            taken.add(number)
+            numbers[index] = number
+    return numbers
+
+
+def entry_ops(doc: dict) -> list:
+    key = {"guild_id": doc["guild_id"], "user_id": doc["user_id"]}
+    warns = doc.get("warns") or []
+    ops = []
+    for number, warn in zip(entry_numbers(warns), warns):
+        ops.append(UpdateOne(
+            {**key, "number": number},
+            {"$setOnInsert": {
+                "reason": warn.get("reason"),
+                "moderator": warn.get("moderator"),
+                "time": warn.get("time")
+            }},
+            upsert=True
+        ))
+    return ops
+
+
+async def migrate(uri: str, batch_size: int, dry_run: bool):
+    # no per-operation deadline: bulk writes of a big backlog can take a while
+    db = Database(uri, timeout_ms=0, app_name="prime-migrate-warns")
+    if not dry_run:
+        await db.ensure_indexes()
+
+    cursor = db.warns.find({"warns": {"$exists": True}}, batch_size=batch_size)
+    users = warns = 0
+    pending, finished = [], []
+
+    async def flush():
+        if pending and not dry_run:
+            await db.warn_entries.bulk_write(pending, ordered=False)
+            # counters keep numbering where the array left off; the array itself goes
+            await db.warns.bulk_write([
+                UpdateOne({"_id": _id}, [{"$set": {"count": {"$max": [{"$ifNull": ["$count", 0]}, highest]}}},
+                                         {"$unset": "warns"}])
+                for _id, highest in finished
+            ], ordered=False)
+        pending.clear()
+        finished.clear()
+
+    async for doc in cursor:
+        ops = entry_ops(doc)
+        pending.extend(ops)
+        # the counter continues after the highest migrated number, not the array length
+        finished.append((doc["_id"], max((op._filter["number"] for op in ops), default=0)))
+        users += 1
+        warns += len(ops)
+        if len(pending) >= batch_size:
+            await flush()
+            print(f"  {users} users, {warns} warns")
+    await flush()
+
+    print(f"{'Would migrate' if dry_run else 'Migrated'} {warns} warns for {users} users.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move warn arrays into per-warn documents.")
+    parser.add_argument("--batch", type=int, default=500, help="warns per bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="count only, write nothing")
+    args = parser.parse_args()
+
+    load_dotenv()
+    asyncio.run(migrate(os.getenv("MONGO_URI"), args.batch, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# scripts/stub_worker.py
+# Stand-in for main.py when testing cluster.py locally: no gateway, no Mongo.
+#   python cluster.py --clusters 2 --shards 4 --stagger 0 --worker scripts/stub_worker.py
+# Set STUB_CRASH=1 to make cluster 0 exit with an error and exercise restarts.
+import os
+import sys
+import time
+
+cluster_id = int(os.getenv("CLUSTER_ID", 0))
+shard_ids = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i]
+shard_count = int(os.getenv("SHARD_COUNT", 0))
+
+print(f"stub gateway up: shards {shard_ids} of {shard_count}")
+for beat in range(3):
+    time.sleep(0.2)
+    print(f"heartbeat {beat}: {len(shard_ids)} shards ready")
+
+if os.getenv("STUB_CRASH") and cluster_id == 0:
+    sys.exit(1)
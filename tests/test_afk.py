@@ -0,0 +1,43 @@
+# tests/test_afk.py
+# Run with: python -m unittest
+import asyncio
+import unittest
+
+from scripts.fake_mongo import FakeDatabase
+from utils.afk import AfkStore
+
+GUILD_ID = 336642139381301249
+USER_ID = 1100000000000000001
+
+
+class CloseTest(unittest.IsolatedAsyncioTestCase):
+    async def test_close_during_flush_keeps_changes(self):
+        db = FakeDatabase(latency=0.05)
+        store = AfkStore(db.afk, flush_interval=0.01)
+        store.start()
+        for i in range(20):
+            store.set(GUILD_ID, USER_ID + i, "lunch")
+        await asyncio.sleep(0.03)  # the periodic flush is now waiting on bulk_write
+
+        await store.close()
+
+        self.assertEqual(await db.afk.count_documents({}), 20)
+        self.assertEqual(store._dirty, {})
+
+    async def test_cancelled_write_puts_changes_back(self):
+        db = FakeDatabase(latency=0.05)
+        store = AfkStore(db.afk)
+
+        write = asyncio.ensure_future(store._write([], {1: None, 2: "newer"}))
+        await asyncio.sleep(0)
+        write.cancel()
+        store._dirty[2] = "newest"  # changed again while the write was in flight
+        with self.assertRaises(asyncio.CancelledError):
+            await write
+
+        self.assertEqual(store._dirty[1], None)
+        self.assertEqual(store._dirty[2], "newest")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# tests/test_analytics.py
+# Run with: python -m unittest
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from pymongo.errors import AutoReconnect
+
+from scripts.fake_mongo import FakeDatabase
+from utils.analytics import CommandAnalytics
+
+
+class FlushFailureTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db = FakeDatabase()
+        self.analytics = CommandAnalytics(SimpleNamespace(db=self.db, cluster_id=0))
+        for i in range(10):
+            self.analytics.record("warn", "slash", 1, 0.01 * (i + 1), failed=i == 0)
+        self.analytics.record("ping", "prefix", 2, 0.002)
+
+    async def test_failed_flush_keeps_the_window(self):
+        with mock.patch.object(self.db.command_usage, "bulk_write", side_effect=AutoReconnect("down")), \
+                mock.patch.object(self.db.command_latency, "insert_many", side_effect=AutoReconnect("down")):
+            with self.assertRaises(AutoReconnect):
+                await self.analytics.flush()
+        self.analytics.record("warn", "slash", 1, 0.5)
+
+        warn = self.analytics._commands[("warn", "slash")]
+        self.assertEqual((warn.count, warn.errors, warn.max, len(warn.samples)), (11, 1, 0.5, 11))
+        self.assertEqual(self.analytics._guilds[("warn", 1)][:2], [11, 1])
+        self.assertEqual(self.analytics._guilds[("ping", 2)][0], 1)
+
+        await self.analytics.flush()
+        usage = await self.db.command_usage.find({"command": "warn"}).to_list(None)
+        self.assertEqual([doc["count"] for doc in usage], [11])
+        self.assertEqual(await self.db.command_latency.count_documents({}), 2)
+        self.assertEqual(self.analytics._commands, {})
+
+    async def test_only_the_failed_write_is_retried(self):
+        with mock.patch.object(self.db.command_latency, "insert_many", side_effect=AutoReconnect("down")):
+            with self.assertRaises(AutoReconnect):
+                await self.analytics.flush()
+
+        # usage counters were written, so they must not be counted twice
+        self.assertEqual(self.analytics._guilds, {})
+        self.assertEqual(self.analytics._commands[("warn", "slash")].count, 10)
+
+    async def test_retries_usage_alone(self):
+        with mock.patch.object(self.db.command_usage, "bulk_write", side_effect=AutoReconnect("down")):
+            with self.assertRaises(AutoReconnect):
+                await self.analytics.flush()
+        self.assertEqual(self.analytics._commands, {})
+
+        await self.analytics.flush()
+        self.assertEqual(self.analytics._guilds, {})
+        self.assertEqual(await self.db.command_usage.count_documents({}), 2)
+        self.assertEqual(await self.db.command_latency.count_documents({}), 2)
+
+
+class CloseTest(unittest.IsolatedAsyncioTestCase):
+    async def test_close_during_flush_keeps_the_window(self):
+        db = FakeDatabase(latency=0.05)
+        analytics = CommandAnalytics(SimpleNamespace(db=db, cluster_id=0), flush_interval=0.01)
+        analytics.start()
+        analytics.record("warn", "slash", 1, 0.01)
+        await asyncio.sleep(0.03)  # the periodic flush is now waiting on the writes
+        analytics.record("warn", "slash", 1, 0.02)
+
+        await analytics.close()
+
+        usage = await db.command_usage.find({"command": "warn"}).to_list(None)
+        self.assertEqual(sum(doc["count"] for doc in usage), 2)
+        self.assertEqual(await db.command_latency.count_documents({}), 2)
+        self.assertEqual((analytics._commands, analytics._guilds), ({}, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
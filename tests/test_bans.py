@@ -0,0 +1,72 @@
+# tests/test_bans.py
+# Run with: python -m unittest
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from utils.bans import BanIndex
+
+GUILD_ID = 336642139381301249
+
+
+class User:
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+        self.global_name = None
+
+    def __str__(self):
+        return self.name
+
+
+class StubGuild:
+    """bans() yields pages with a pause in between, like the paginated endpoint."""
+
+    def __init__(self, users: list, page: int = 2):
+        self.id = GUILD_ID
+        self.users = users
+        self.page = page
+        self.paging = asyncio.Event()
+        self.resume = asyncio.Event()
+
+    async def bans(self, limit=None):
+        for i, user in enumerate(self.users):
+            if i and i % self.page == 0:
+                self.paging.set()
+                await self.resume.wait()
+            yield SimpleNamespace(user=user)
+
+
+class BanIndexTest(unittest.IsolatedAsyncioTestCase):
+    async def test_find_by_label(self):
+        index = BanIndex()
+        guild = StubGuild([User(1, "alice"), User(2, "Bob")])
+        guild.resume.set()
+        await index.wait(guild)
+
+        self.assertEqual(index.find(GUILD_ID, " bob "), 2)
+        index.add(GUILD_ID, User(3, "carol"))
+        self.assertEqual(index.find(GUILD_ID, "CAROL"), 3)
+        index.remove(GUILD_ID, 2)
+        self.assertIsNone(index.find(GUILD_ID, "bob"))
+        self.assertEqual([user_id for user_id, _ in index.search(GUILD_ID, "")], [1, 3])
+
+    async def test_unban_during_build_is_kept(self):
+        index = BanIndex()
+        guild = StubGuild([User(1, "alice"), User(2, "bob"), User(3, "carol"), User(4, "dave")])
+        task = index.ensure(guild)
+        await guild.paging.wait()
+
+        # carol is unbanned before the page listing her arrives
+        index.remove(GUILD_ID, 3)
+        index.remove(GUILD_ID, 1)
+        guild.resume.set()
+        await task
+
+        self.assertTrue(index.is_ready(GUILD_ID))
+        self.assertEqual(sorted(user_id for user_id, _ in index.search(GUILD_ID, "")), [2, 4])
+        self.assertIsNone(index.find(GUILD_ID, "carol"))
+
+
+if __name__ == "__main__":
+    unittest.main()
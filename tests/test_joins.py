@@ -0,0 +1,65 @@
+# tests/test_joins.py
+# Run with: python -m unittest
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from utils.joins import JoinCoalescer, RoleGrantQueue
+
+
+def _member(member_id: int, guild_id: int, granted: list, delay: float = 0.0):
+    async def add_roles(role, reason=None):
+        await asyncio.sleep(delay)
+        granted.append((member_id, role))
+
+    return SimpleNamespace(id=member_id, guild=SimpleNamespace(id=guild_id), add_roles=add_roles)
+
+
+class JoinCoalescerCloseTest(unittest.IsolatedAsyncioTestCase):
+    async def test_close_waits_for_every_flush(self):
+        flushed = []
+
+        async def flush(guild, members):
+            await asyncio.sleep(0.01)
+            flushed.append((guild.id, len(members)))
+
+        welcomes = JoinCoalescer(flush, window=60, max_batch=5)
+        granted = []
+        for i in range(7):
+            welcomes.add(_member(i, 1, granted))  # one full batch flushing, two waiting
+        welcomes.add(_member(7, 2, granted))
+
+        await welcomes.close()
+
+        self.assertEqual(sorted(flushed), [(1, 2), (1, 5), (2, 1)])
+        self.assertFalse(welcomes._running)
+
+
+class RoleGrantQueueCloseTest(unittest.IsolatedAsyncioTestCase):
+    async def test_close_drains_pending_grants(self):
+        queue = RoleGrantQueue(workers=2)
+        queue.start()
+        granted = []
+        for i in range(20):
+            queue.put(_member(i, 1, granted, delay=0.001), "role")
+
+        await queue.close()
+
+        self.assertEqual(len(granted), 20)
+        self.assertEqual(queue.stats["granted"], 20)
+
+    async def test_close_counts_what_it_drops(self):
+        queue = RoleGrantQueue(workers=1)
+        queue.start()
+        granted = []
+        for i in range(20):
+            queue.put(_member(i, 1, granted, delay=0.01), "role")
+
+        await queue.close(timeout=0.035)
+
+        self.assertEqual(queue.stats["granted"] + queue.stats["dropped"], 20)
+        self.assertGreater(queue.stats["dropped"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+# tests/test_migrate_warns.py
+# Run with: python -m unittest
+import unittest
+
+from scripts.migrate_warns import entry_numbers, entry_ops
+
+
+class EntryNumberTest(unittest.TestCase):
+    def test_stored_numbers_are_kept(self):
+        # an older warn was cleared from the middle of the array
+        self.assertEqual(entry_numbers([{"number": 1}, {"number": 3}, {"number": 4}]), [1, 3, 4])
+
+    def test_missing_numbers_fall_back_to_position(self):
+        self.assertEqual(entry_numbers([{"reason": "a"}, {"reason": "b"}]), [1, 2])
+        self.assertEqual(entry_numbers([{}, {"number": 1}, {}]), [2, 1, 3])
+
+    def test_duplicate_numbers_are_renumbered(self):
+        self.assertEqual(entry_numbers([{"number": 1}, {"number": 1}, {"number": 2}]), [1, 3, 2])
+
+    def test_ops_are_keyed_by_number(self):
+        doc = {"guild_id": 1, "user_id": 2, "warns": [{"number": 4, "reason": "spam"}, {"reason": "links"}]}
+        ops = entry_ops(doc)
+
+        self.assertEqual([op._filter["number"] for op in ops], [4, 2])
+        self.assertEqual(ops[0]._doc["$setOnInsert"]["reason"], "spam")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# tests/test_purge.py
+# Run with: python -m unittest
+import datetime
+import unittest
+from types import SimpleNamespace
+
+import discord
+
+from utils.purge import run_purge
+
+
+class StubMessage:
+    def __init__(self, channel, id: int, age: datetime.timedelta):
+        self.channel = channel
+        self.id = id
+        self.created_at = discord.utils.utcnow() - age
+
+    async def delete(self):
+        self.channel.deleted.append(self.id)
+
+
+class StubChannel:
+    """history() newest first; the first bulk delete fails as if one message was already gone."""
+
+    def __init__(self, recent: int, old: int):
+        self.messages = [StubMessage(self, i, datetime.timedelta(minutes=i)) for i in range(recent)]
+        self.messages += [StubMessage(self, recent + i, datetime.timedelta(days=20 + i)) for i in range(old)]
+        self.deleted = []
+        self.bulk_calls = 0
+
+    async def history(self, limit=None, before=None, after=None, oldest_first=None):
+        for message in self.messages[:limit]:
+            yield message
+
+    async def delete_messages(self, messages):
+        self.bulk_calls += 1
+        if self.bulk_calls == 1:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+        self.deleted.extend(message.id for message in messages)
+
+
+class RunPurgeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_retried_batch_is_not_reported_as_old(self):
+        channel = StubChannel(recent=150, old=3)
+
+        state = await run_purge(channel, 153, slow_delay=0)
+
+        self.assertEqual(sorted(channel.deleted), list(range(153)))
+        self.assertEqual((state.deleted, state.retried, state.slow_deleted, state.failed), (153, 100, 3, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# tests/test_scheduler.py
+# Run with: python -m unittest
+import datetime
+import unittest
+from types import SimpleNamespace
+
+from scripts.fake_mongo import FakeDatabase
+from utils.scheduler import Scheduler
+
+GUILD_ID = 336642139381301249
+USER_ID = 1100000000000000001
+
+
+class ExecuteTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.guilds = {}
+        self.db = FakeDatabase()
+        self.scheduler = Scheduler(SimpleNamespace(db=self.db, get_guild=self.guilds.get))
+        self.ran = []
+
+        async def unban(guild, doc):
+            self.ran.append((guild, doc["user_id"]))
+
+        self.scheduler.register("unban", unban)
+        due = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        self.key = await self.scheduler.schedule("unban", GUILD_ID, USER_ID, due)
+
+    async def test_unavailable_guild_defers_instead_of_dropping(self):
+        await self.scheduler._execute(self.key)
+
+        doc = await self.db.scheduled_actions.find_one({"key": self.key})
+        self.assertIsNotNone(doc)
+        self.assertEqual((doc["deferred"], doc["attempts"]), (1, 0))
+        self.assertGreater(doc["due"], datetime.datetime.utcnow())
+        self.assertEqual(self.ran, [])
+
+    async def test_runs_once_guild_is_back(self):
+        await self.scheduler._execute(self.key)
+        guild = self.guilds[GUILD_ID] = SimpleNamespace(id=GUILD_ID)
+        await self.db.scheduled_actions.update_one({"key": self.key}, {"$set": {"due": datetime.datetime.utcnow()}})
+
+        await self.scheduler._execute(self.key)
+
+        self.assertEqual(self.ran, [(guild, USER_ID)])
+        self.assertIsNone(await self.db.scheduled_actions.find_one({"key": self.key}))
+
+    async def test_missing_handler_defers(self):
+        self.guilds[GUILD_ID] = SimpleNamespace(id=GUILD_ID)
+        del self.scheduler.handlers["unban"]
+
+        await self.scheduler._execute(self.key)
+
+        self.assertIsNotNone(await self.db.scheduled_actions.find_one({"key": self.key}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+# tests/test_server_tools.py
+# Run with: python -m unittest
+import asyncio
+import importlib
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import pymongo
+
+from scripts.bench_events import API, GUILD_BASE, USER_BASE, StubGuild, StubMember
+from scripts.fake_mongo import FakeDatabase
+
+JOINS = 300
+
+
+def _sync_client(*args, **kwargs):
+    raise AssertionError("blocking pymongo client used; go through bot.db (Motor) instead")
+
+
+class MemberJoinTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # a synchronous client anywhere in the join path (module level or per event) fails the test
+        patcher = mock.patch.object(pymongo, "MongoClient", _sync_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        import cogs.server_tools
+        self.module = importlib.reload(cogs.server_tools)
+
+        self.db = FakeDatabase(latency=0.001)
+        self.guilds = [StubGuild(GUILD_BASE + i * 1000, f"Guild {i}") for i in range(3)]
+        for guild in self.guilds:
+            self.db.server_settings._insert({
+                **self.module.DEFAULT_CONFIG, "_id": guild.id,
+                "welcome_channel": guild.welcome.id, "auto_role": guild.auto_role.id,
+            })
+        bot = SimpleNamespace(db=self.db, scheduler=SimpleNamespace(register=lambda name, handler: None))
+        self.cog = self.module.ServerTools(bot)
+        self.cog.welcomes.window = 60  # welcomes go out at max_batch or on close
+        await self.cog.cog_load()
+        self.addAsyncCleanup(self.cog.cog_unload)
+
+        # IsolatedAsyncioTestCase runs the loop in debug mode; any callback
+        # holding the loop this long (a sync DB call, a sleep) is logged
+        loop = asyncio.get_running_loop()
+        loop.set_debug(True)
+        loop.slow_callback_duration = 0.05
+
+    async def test_join_wave_does_not_block_the_loop(self):
+        api_before = API.calls.copy()
+        members = [StubMember(USER_BASE + i, f"user{i}", self.guilds[i % len(self.guilds)]) for i in range(JOINS)]
+
+        with self.assertNoLogs("asyncio", "WARNING"):
+            # one event per loop iteration, as the gateway dispatches them
+            tasks = []
+            for member in members:
+                tasks.append(asyncio.create_task(self.cog.on_member_join(member)))
+                await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+            await self.cog.welcomes.close()
+            await asyncio.wait_for(self.cog.role_queue.queue.join(), 5)
+
+        # one settings load per guild, the rest served from the config cache
+        self.assertEqual(self.db.calls[("server_settings", "findAndModify")], len(self.guilds))
+        self.assertEqual(self.cog.role_queue.stats["granted"], JOINS)
+        self.assertEqual(API.calls["add_roles"] - api_before["add_roles"], JOINS)
+        # JOINS / guilds == max_batch, so each guild gets exactly one welcome
+        self.assertEqual(API.calls["send_message"] - api_before["send_message"], len(self.guilds))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+# tests/test_warns.py
+# Run with: python -m unittest
+import asyncio
+import unittest
+
+from scripts.fake_mongo import FakeDatabase
+from utils.warns import WarnStore
+
+GUILD_ID = 336642139381301249
+USER_ID = 1100000000000000001
+MOD_ID = 1100000000000000002
+
+
+class WarnNumberingTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # a small round-trip delay so the concurrent adds really interleave
+        self.db = FakeDatabase(latency=0.001)
+        self.store = WarnStore(self.db.warns, self.db.warn_entries)
+
+    async def test_concurrent_warns_have_no_gaps_or_duplicates(self):
+        numbers = await asyncio.gather(*(self.store.add(GUILD_ID, USER_ID, f"spam {i}", MOD_ID) for i in range(500)))
+
+        self.assertEqual(sorted(numbers), list(range(1, 501)))
+        stored = await self.db.warn_entries.find({"guild_id": GUILD_ID, "user_id": USER_ID}).to_list(None)
+        self.assertEqual(sorted(doc["number"] for doc in stored), list(range(1, 501)))
+        self.assertEqual(await self.store.count(GUILD_ID, USER_ID), 500)
+
+    async def test_numbering_is_per_member(self):
+        await asyncio.gather(*(self.store.add(GUILD_ID, USER_ID + i % 2, "spam", MOD_ID) for i in range(20)))
+
+        self.assertEqual(await self.store.next_number(GUILD_ID, USER_ID), 11)
+        self.assertEqual(await self.store.next_number(GUILD_ID, USER_ID + 1), 11)
+
+    async def test_add_is_two_round_trips(self):
+        await self.store.add(GUILD_ID, USER_ID, "spam", MOD_ID)
+
+        self.assertEqual(dict(self.db.calls), {("warns", "findAndModify"): 1, ("warn_entries", "insert"): 1})
+
+    async def test_continues_from_legacy_array(self):
+        await self.db.warns.insert_one({"guild_id": GUILD_ID, "user_id": USER_ID, "warns": [{"reason": "a"}, {"reason": "b"}]})
+
+        self.assertEqual(await self.store.add(GUILD_ID, USER_ID, "spam", MOD_ID), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
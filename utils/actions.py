@@ -0,0 +1,114 @@
+# utils/actions.py
+import asyncio
+import inspect
+import time
+
+import discord
+
+from utils import metrics
+from utils.pipeline import StageStats
+
+
+class ActionError(Exception):
+    """Raised by an action to stop it and show the message to the moderator."""
+
+
+class ModActionPipeline:
+    """Runs a moderation command as: action -> response -> side effects.
+
+    The action starts right away; if it hasn't finished after `defer_after`
+    seconds the interaction is deferred so the 3-second deadline is never
+    missed. Once the moderator has their answer, side effects (DM, mod log,
+    escalation, ...) run concurrently, each bounded by `step_timeout`, and a
+    failing side effect never affects the others. Every step is timed per
+    command into prime_moderation_step_seconds and `report()`.
+    """
+
+    def __init__(self, defer_after: float = 1.0, action_timeout: float = 15.0, step_timeout: float = 5.0):
+        self.defer_after = defer_after
+        self.action_timeout = action_timeout
+        self.step_timeout = step_timeout
+        self.stats = {}  # {(command, step): StageStats}
+
+    def _record(self, command: str, step: str, elapsed: float):
+        stats = self.stats.get((command, step))
+        if stats is None:
+            stats = self.stats[(command, step)] = StageStats()
+        stats.record(elapsed)
+        metrics.MODERATION_STEPS.observe(elapsed, command, step)
+
+    async def run(self, interaction: discord.Interaction, action, respond, side_effects: dict = None):
+        """`action()` is awaited once; `respond(result)` returns the reply text and
+        each `side_effects[name](result)` may return an awaitable. Returns the
+        action's result, or None when it failed (the moderator is told why)."""
+        command = interaction.command.qualified_name if interaction.command else "unknown"
+        start = time.perf_counter()
+
+        async def timed_action():
+            try:
+                return await asyncio.wait_for(action(), self.action_timeout)
+            finally:
+                self._record(command, "action", time.perf_counter() - start)
+
+        task = asyncio.ensure_future(timed_action())
+        done, _ = await asyncio.wait({task}, timeout=self.defer_after)
+        if not done and not interaction.response.is_done():
+            step_start = time.perf_counter()
+            try:
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            except discord.HTTPException:
+                pass  # the reply below falls back to send_message
+            self._record(command, "defer", time.perf_counter() - step_start)
+
+        result, ok = None, False
+        try:
+            result = await task
+            ok = True
+            reply = respond(result)
+        except ActionError as e:
+            reply = f"❌ {e}"
+        except asyncio.TimeoutError:
+            reply = "⏳ Discord took too long to respond. The action may still go through."
+        except discord.Forbidden:
+            reply = "❌ I don't have permission to do that. Check my role position and permissions."
+        except discord.NotFound:
+            reply = "❌ That user or message no longer exists."
+        except discord.HTTPException as e:
+            reply = f"❌ Discord returned an error ({e.status})."
+
+        step_start = time.perf_counter()
+        try:
+            if interaction.response.is_done():
+                await interaction.followup.send(reply, ephemeral=True)
+            else:
+                await interaction.response.send_message(reply, ephemeral=True)
+        except discord.HTTPException as e:
+            print(f"Could not answer /{command}: {e}")
+        self._record(command, "respond", time.perf_counter() - step_start)
+
+        if ok and side_effects:
+            await asyncio.gather(*(self._side_effect(command, name, func, result) for name, func in side_effects.items()))
+        self._record(command, "total", time.perf_counter() - start)
+        return result if ok else None
+
+    async def _side_effect(self, command: str, name: str, func, result):
+        step_start = time.perf_counter()
+        try:
+            value = func(result)
+            if inspect.isawaitable(value):
+                await asyncio.wait_for(value, self.step_timeout)
+        except asyncio.TimeoutError:
+            print(f"/{command}: {name} timed out after {self.step_timeout}s")
+        except Exception as e:
+            print(f"/{command}: {name} failed: {e}")
+        finally:
+            self._record(command, name, time.perf_counter() - step_start)
+
+    def report(self) -> list:
+        """[(command, step, calls, avg_ms, max_ms)] sorted by command, then total time spent."""
+        rows = []
+        for (command, step), s in self.stats.items():
+            avg = s.total / s.calls * 1000 if s.calls else 0.0
+            rows.append((command, step, s.calls, round(avg, 3), round(s.max * 1000, 3), s.total))
+        rows.sort(key=lambda row: (row[0], -row[5]))
+        return [row[:5] for row in rows]
@@ -0,0 +1,160 @@
+# utils/afk.py
+import asyncio
+import datetime
+import time
+from collections import Counter
+from pymongo import DeleteOne, UpdateOne
+
+AFK_TTL = 7 * 86400  # also the TTL index on `since` (see utils/db.py)
+
+
+class AfkEntry:
+    __slots__ = ("reason", "since")  # since = unix timestamp
+
+    def __init__(self, reason: str, since: float):
+        self.reason = reason
+        self.since = since
+
+
+def _key(guild_id: int, user_id: int) -> int:
+    # snowflakes fit in 64 bits; one int per entry is smaller than a (guild, user) tuple
+    return guild_id << 64 | user_id
+
+
+class AfkStore:
+    """Per-guild AFK statuses kept in memory and written behind to Mongo.
+
+    Reads never touch the database. set/clear only mark the key dirty; a
+    background task flushes dirty keys with one bulk_write. A TTL index on
+    `since` removes entries older than `ttl` from Mongo, and a periodic
+    sweep does the same in memory.
+    """
+
+    def __init__(self, collection, ttl: float = AFK_TTL, flush_interval: float = 5.0, sweep_interval: float = 600.0):
+        self.collection = collection
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.sweep_interval = sweep_interval
+        self._entries = {}  # {key: AfkEntry}
+        self._guild_counts = Counter()  # lets messages in guilds with no AFK users skip all lookups
+        self._dirty = {}  # {key: AfkEntry | None}, None = delete
+        self._task = None
+        self._writing = None  # the bulk_write in flight, shielded from close()'s cancel
+        self._last_sweep = time.monotonic()
+
+    # ==================================================
+    # Lifecycle
+    # ==================================================
+    async def load(self):
+        cutoff = time.time() - self.ttl
+        async for doc in self.collection.find({}, {"_id": 0, "guild_id": 1, "user_id": 1, "reason": 1, "since": 1}):
+            since = doc["since"].replace(tzinfo=datetime.timezone.utc).timestamp()
+            if since > cutoff:
+                self._put(_key(doc["guild_id"], doc["user_id"]), AfkEntry(doc["reason"], since))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writing is not None:
+            # a write cut off by the cancel is still running; let it finish or put its changes back
+            await asyncio.gather(self._writing, return_exceptions=True)
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_sweep >= self.sweep_interval:
+                    self.sweep()
+            except Exception as e:
+                print(f"AFK flush failed: {e}")
+
+    # ==================================================
+    # Hot set
+    # ==================================================
+    def _put(self, key: int, entry: AfkEntry):
+        if key not in self._entries:
+            self._guild_counts[key >> 64] += 1
+        self._entries[key] = entry
+
+    def _pop(self, key: int):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            guild_id = key >> 64
+            self._guild_counts[guild_id] -= 1
+            if not self._guild_counts[guild_id]:
+                del self._guild_counts[guild_id]
+        return entry
+
+    def has_guild(self, guild_id: int) -> bool:
+        return guild_id in self._guild_counts
+
+    def get(self, guild_id: int, user_id: int):
+        entry = self._entries.get(_key(guild_id, user_id))
+        if entry is not None and entry.since < time.time() - self.ttl:
+            self.clear(guild_id, user_id)
+            return None
+        return entry
+
+    def set(self, guild_id: int, user_id: int, reason: str) -> AfkEntry:
+        key = _key(guild_id, user_id)
+        entry = AfkEntry(reason, time.time())
+        self._put(key, entry)
+        self._dirty[key] = entry
+        return entry
+
+    def clear(self, guild_id: int, user_id: int):
+        key = _key(guild_id, user_id)
+        entry = self._pop(key)
+        if entry is not None:
+            self._dirty[key] = None
+        return entry
+
+    def sweep(self):
+        self._last_sweep = time.monotonic()
+        cutoff = time.time() - self.ttl
+        stale = [key for key, entry in self._entries.items() if entry.since < cutoff]
+        for key in stale:
+            self._pop(key)  # Mongo's TTL index removes the documents
+        return len(stale)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ==================================================
+    # Write-behind
+    # ==================================================
+    async def flush(self):
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, {}
+        ops = []
+        for key, entry in dirty.items():
+            query = {"guild_id": key >> 64, "user_id": key & 0xFFFFFFFFFFFFFFFF}
+            if entry is None:
+                ops.append(DeleteOne(query))
+            else:
+                since = datetime.datetime.fromtimestamp(entry.since, datetime.timezone.utc)
+                ops.append(UpdateOne(query, {"$set": {"reason": entry.reason, "since": since}}, upsert=True))
+        self._writing = asyncio.ensure_future(self._write(ops, dirty))
+        await asyncio.shield(self._writing)
+        return len(ops)
+
+    async def _write(self, ops: list, dirty: dict):
+        try:
+            await self.collection.bulk_write(ops, ordered=False)
+        except BaseException:
+            # keep newer changes made while the write was in flight
+            for key, entry in dirty.items():
+                self._dirty.setdefault(key, entry)
+            raise
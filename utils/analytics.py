@@ -0,0 +1,222 @@
+# utils/analytics.py
+import asyncio
+import datetime
+import random
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+MAX_SAMPLES = 512  # latency samples kept per command per window (reservoir)
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class CommandUsage:
+    """Counts and a bounded latency sample for one command over one window."""
+
+    __slots__ = ("count", "errors", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+
+    def add(self, elapsed: float, failed: bool):
+        self.count += 1
+        self.errors += failed
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(elapsed)
+        else:
+            i = random.randrange(self.count)
+            if i < MAX_SAMPLES:
+                self.samples[i] = elapsed
+
+    def merge(self, other: "CommandUsage"):
+        self.count += other.count
+        self.errors += other.errors
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.samples.extend(other.samples[:MAX_SAMPLES - len(self.samples)])
+
+    def percentiles(self) -> tuple:
+        ordered = sorted(self.samples)
+        return percentile(ordered, 0.5), percentile(ordered, 0.95), percentile(ordered, 0.99)
+
+
+async def _nothing():
+    return None
+
+
+def _failed(result, keys: list) -> list:
+    """Keys of the operations a gathered write didn't apply (all of them unless it was a partial bulk failure)."""
+    if not isinstance(result, BaseException):
+        return []
+    if isinstance(result, BulkWriteError):
+        return [keys[error["index"]] for error in result.details.get("writeErrors", ())]
+    return keys
+
+
+class CommandAnalytics:
+    """In-memory command usage aggregation, written to Mongo in batches.
+
+    `record()` only touches dicts. Every `flush_interval` seconds the window
+    is written with one bulk upsert into hourly per-(command, guild)
+    counters in `command_usage` and one insert_many of per-command latency
+    percentiles into `command_latency`. Every `summary_interval` seconds a
+    short roll-up is queued for the command log channel.
+    """
+
+    def __init__(self, bot, log_channel_id: int = None, flush_interval: float = 60.0, summary_interval: float = 3600.0):
+        self.bot = bot
+        self.log_channel_id = log_channel_id
+        self.flush_interval = flush_interval
+        self.summary_interval = summary_interval
+        self._commands = {}  # {(command, kind): CommandUsage} since the last flush
+        self._guilds = {}  # {(command, guild_id): [count, errors, seconds]} since the last flush
+        self._summary = {}  # {command: CommandUsage} since the last roll-up
+        self._task = None
+        self._writing = None  # the write in flight, shielded from close()'s cancel
+
+    def record(self, command: str, kind: str, guild_id: int, elapsed: float, failed: bool = False):
+        usage = self._commands.get((command, kind))
+        if usage is None:
+            usage = self._commands[(command, kind)] = CommandUsage()
+        usage.add(elapsed, failed)
+
+        totals = self._guilds.get((command, guild_id))
+        if totals is None:
+            totals = self._guilds[(command, guild_id)] = [0, 0, 0.0]
+        totals[0] += 1
+        totals[1] += failed
+        totals[2] += elapsed
+
+        summary = self._summary.get(command)
+        if summary is None:
+            summary = self._summary[command] = CommandUsage()
+        summary.add(elapsed, failed)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writing is not None:
+            # a write cut off by the cancel is still running; let it finish or merge its window back
+            await asyncio.gather(self._writing, return_exceptions=True)
+        await self.flush()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_summary = loop.time() + self.summary_interval
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if loop.time() >= next_summary:
+                    next_summary = loop.time() + self.summary_interval
+                    self.post_summary()
+            except Exception as e:
+                print(f"Command analytics flush failed: {e}")
+
+    async def flush(self):
+        commands, guilds = self._commands, self._guilds
+        if not commands and not guilds:
+            return
+        self._commands, self._guilds = {}, {}
+        now = datetime.datetime.utcnow()
+        hour = now.replace(minute=0, second=0, microsecond=0)
+
+        usage_ops = [
+            UpdateOne(
+                {"hour": hour, "command": command, "guild_id": guild_id},
+                {"$inc": {"count": count, "errors": errors, "seconds": seconds}},
+                upsert=True
+            )
+            for (command, guild_id), (count, errors, seconds) in guilds.items()
+        ]
+        latency_docs = []
+        for (command, kind), usage in commands.items():
+            p50, p95, p99 = usage.percentiles()
+            latency_docs.append({
+                "time": now, "cluster": self.bot.cluster_id, "command": command, "kind": kind,
+                "count": usage.count, "errors": usage.errors, "mean": usage.total / usage.count,
+                "p50": p50, "p95": p95, "p99": p99, "max": usage.max
+            })
+        self._writing = asyncio.ensure_future(self._write(commands, guilds, usage_ops, latency_docs))
+        await asyncio.shield(self._writing)
+
+    async def _write(self, commands: dict, guilds: dict, usage_ops: list, latency_docs: list):
+        try:
+            usage_result, latency_result = await asyncio.gather(
+                self.bot.db.command_usage.bulk_write(usage_ops, ordered=False) if usage_ops else _nothing(),
+                self.bot.db.command_latency.insert_many(latency_docs, ordered=False) if latency_docs else _nothing(),
+                return_exceptions=True
+            )
+        except BaseException as e:
+            # cancelled outright (the loop is going away); keep the whole window
+            usage_result = latency_result = e
+        # put whatever wasn't written back into the live window so the next flush retries it
+        guild_keys, command_keys = list(guilds), list(commands)
+        for key in _failed(usage_result, guild_keys):
+            totals = self._guilds.setdefault(key, [0, 0, 0.0])
+            for i, value in enumerate(guilds[key]):
+                totals[i] += value
+        for key in _failed(latency_result, command_keys):
+            self._commands.setdefault(key, CommandUsage()).merge(commands[key])
+        for result in (usage_result, latency_result):
+            if isinstance(result, BaseException):
+                raise result
+
+    def post_summary(self):
+        summary, self._summary = self._summary, {}
+        if not summary or not self.log_channel_id:
+            return
+        total = sum(usage.count for usage in summary.values())
+        errors = sum(usage.errors for usage in summary.values())
+        lines = [f"📊 **Commands (cluster {self.bot.cluster_id}):** {total} runs, {errors} errors"]
+        for command, usage in sorted(summary.items(), key=lambda item: item[1].count, reverse=True)[:5]:
+            p50, p95, _ = usage.percentiles()
+            lines.append(f"`{command}` {usage.count}× · p50 {p50 * 1000:.0f}ms · p95 {p95 * 1000:.0f}ms" + (f" · {usage.errors} errors" if usage.errors else ""))
+        self.bot.logs.enqueue(self.log_channel_id, content="\n".join(lines))
+
+    # ==================================================
+    # Queries (all clusters)
+    # ==================================================
+    async def top_commands(self, hours: int = 24, limit: int = 10) -> list:
+        since = datetime.datetime.utcnow() - datetime.timedelta(hours=hours)
+        cursor = self.bot.db.command_usage.aggregate([
+            {"$match": {"hour": {"$gte": since}}},
+            {"$group": {"_id": "$command", "count": {"$sum": "$count"}, "errors": {"$sum": "$errors"}, "guilds": {"$addToSet": "$guild_id"}}},
+            {"$project": {"count": 1, "errors": 1, "guilds": {"$size": "$guilds"}}},
+            {"$sort": {"count": -1}},
+            {"$limit": limit},
+        ])
+        return await cursor.to_list(limit)
+
+    async def slowest_commands(self, hours: int = 24, limit: int = 10) -> list:
+        since = datetime.datetime.utcnow() - datetime.timedelta(hours=hours)
+        cursor = self.bot.db.command_latency.aggregate([
+            {"$match": {"time": {"$gte": since}}},
+            # count-weighted p95 across flush windows and clusters
+            {"$group": {"_id": "$command", "count": {"$sum": "$count"}, "weighted": {"$sum": {"$multiply": ["$p95", "$count"]}}, "max": {"$max": "$max"}}},
+            {"$project": {"count": 1, "max": 1, "p95": {"$divide": ["$weighted", "$count"]}}},
+            {"$sort": {"p95": -1}},
+            {"$limit": limit},
+        ])
+        return await cursor.to_list(limit)
@@ -0,0 +1,106 @@
+# utils/bans.py
+import asyncio
+
+
+def _search_key(user) -> str:
+    return f"{user.name} {getattr(user, 'global_name', None) or ''} {user.id}".lower()
+
+
+class BanIndex:
+    """Per-guild ban list kept in memory for name lookups and autocomplete.
+
+    A guild's index is built from `guild.bans()` the first time it is
+    needed and then kept current from on_member_ban / on_member_unban, so
+    unbanning by name never pages through the whole ban list again.
+    """
+
+    def __init__(self):
+        self._guilds = {}  # {guild_id: {user_id: (search_key, label)}}
+        self._names = {}  # {guild_id: {lowercased label: user_id}} for exact lookups
+        self._ready = set()
+        self._builds = {}  # {guild_id: Task}
+        self._unbanned = {}  # {guild_id: {user_id}} removed while a build is paging
+
+    def is_ready(self, guild_id: int) -> bool:
+        return guild_id in self._ready
+
+    def ensure(self, guild) -> asyncio.Task:
+        """Start (or join) the background build of `guild`'s index."""
+        task = self._builds.get(guild.id)
+        if task is None:
+            task = self._builds[guild.id] = asyncio.create_task(self._build(guild))
+            # autocomplete starts builds nobody awaits; don't warn about their errors
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def wait(self, guild):
+        if not self.is_ready(guild.id):
+            await asyncio.shield(self.ensure(guild))
+
+    async def _build(self, guild):
+        self._guilds.setdefault(guild.id, {})
+        self._names.setdefault(guild.id, {})
+        unbanned = self._unbanned[guild.id] = set()
+        try:
+            async for entry in guild.bans(limit=None):
+                # a page fetched before an unban event can still list that user
+                if entry.user.id not in unbanned and entry.user.id not in self._guilds[guild.id]:
+                    self._put(guild.id, entry.user)
+            for user_id in unbanned:
+                self._pop(guild.id, user_id)
+            self._ready.add(guild.id)
+        except Exception:
+            self._guilds.pop(guild.id, None)
+            self._names.pop(guild.id, None)
+            raise
+        finally:
+            if self._builds.get(guild.id) is asyncio.current_task():  # not replaced after a drop()
+                del self._builds[guild.id]
+                self._unbanned.pop(guild.id, None)
+
+    def _put(self, guild_id: int, user):
+        label = str(user)
+        self._guilds[guild_id][user.id] = (_search_key(user), label)
+        self._names[guild_id][label.lower()] = user.id
+
+    def _pop(self, guild_id: int, user_id: int):
+        entry = self._guilds[guild_id].pop(user_id, None)
+        if entry is not None and self._names[guild_id].get(entry[1].lower()) == user_id:
+            del self._names[guild_id][entry[1].lower()]
+
+    def add(self, guild_id: int, user):
+        if guild_id in self._guilds:
+            self._unbanned.get(guild_id, set()).discard(user.id)
+            self._put(guild_id, user)
+
+    def remove(self, guild_id: int, user_id: int):
+        if guild_id in self._unbanned:
+            self._unbanned[guild_id].add(user_id)
+        if guild_id in self._guilds:
+            self._pop(guild_id, user_id)
+
+    def drop(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+        self._names.pop(guild_id, None)
+        self._ready.discard(guild_id)
+        self._unbanned.pop(guild_id, None)
+        task = self._builds.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+
+    def find(self, guild_id: int, query: str):
+        """Exact match on the displayed name (e.g. 'name' or 'name#1234'); returns a user id or None."""
+        return self._names.get(guild_id, {}).get(query.strip().lower())
+
+    def search(self, guild_id: int, query: str, limit: int = 25) -> list:
+        """[(user_id, label)] with prefix matches before substring matches."""
+        query = query.strip().lower()
+        prefix, contains = [], []
+        for user_id, (key, label) in self._guilds.get(guild_id, {}).items():
+            if not query or key.startswith(query):
+                prefix.append((user_id, label))
+                if len(prefix) >= limit:
+                    break
+            elif query in key and len(contains) < limit:
+                contains.append((user_id, label))
+        return (prefix + contains)[:limit]
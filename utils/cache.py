@@ -0,0 +1,153 @@
+# utils/cache.py
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+
+
+class GuildConfigCache:
+    """Bounded LRU/TTL cache in front of a per-guild settings collection.
+
+    Writes should go through `update()` so the cached copy is replaced
+    (write-through) instead of waiting for the TTL to run out.
+    """
+
+    instances = weakref.WeakValueDictionary()  # {name: cache}, read by the metrics endpoint
+
+    def __init__(self, collection, key: str = "guild_id", max_size: int = 10_000, ttl: float = 300.0, loader=None, name: str = None):
+        self.name = name or collection.name
+        GuildConfigCache.instances[self.name] = self
+        self.collection = collection
+        self.key = key
+        self.max_size = max_size
+        self.ttl = ttl
+        self.loader = loader  # optional coroutine(guild_id) -> dict, used instead of find_one
+        self._data = OrderedDict()  # {guild_id: (expires_at, config)}
+        self._pending = {}  # {guild_id: Future} so concurrent misses share one query
+        self._generations = {}  # {guild_id: invalidations while its load was in flight}
+        self._watch_task = None
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0  # actual database round trips
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ==================================================
+    # Reads
+    # ==================================================
+    async def get(self, guild_id: int) -> dict:
+        entry = self._data.get(guild_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                self._data.move_to_end(guild_id)
+                return entry[1]
+            del self._data[guild_id]
+
+        self.misses += 1
+        pending = self._pending.get(guild_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[guild_id] = future
+        try:
+            config = await self._load(guild_id)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            self._pending.pop(guild_id, None)
+            stale = self._generations.pop(guild_id, 0) > 0
+        if not stale:
+            # a write landed while this load was in flight; don't cache what it replaced
+            self._store(guild_id, config)
+        future.set_result(config)
+        return config
+
+    async def _load(self, guild_id: int) -> dict:
+        self.loads += 1
+        if self.loader is not None:
+            return await self.loader(guild_id) or {}
+        return await self.collection.find_one({self.key: guild_id}) or {}
+
+    def _store(self, guild_id: int, config: dict):
+        self._data[guild_id] = (time.monotonic() + self.ttl, config)
+        self._data.move_to_end(guild_id)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    # ==================================================
+    # Writes / invalidation
+    # ==================================================
+    async def update(self, guild_id: int, update: dict, **kwargs):
+        """Apply `update` to the collection and refresh the cached copy."""
+        result = await self.collection.update_one({self.key: guild_id}, update, upsert=True, **kwargs)
+        self.invalidate(guild_id)
+        return result
+
+    def invalidate(self, guild_id: int):
+        if guild_id in self._pending:
+            self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+        if self._data.pop(guild_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        for guild_id in self._pending:
+            self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+        self._data.clear()
+
+    # ==================================================
+    # Change streams (keeps several bot processes in sync)
+    # ==================================================
+    def start_watch(self):
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    def stop_watch(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+        while True:
+            try:
+                async with self.collection.watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        doc = change.get("fullDocument") or {}
+                        guild_id = doc.get(self.key)
+                        if guild_id is None:
+                            # deletes only carry _id, drop everything rather than serve stale data
+                            self.clear()
+                        else:
+                            self.invalidate(guild_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # change streams need a replica set; retry slowly instead of spinning
+                print(f"Guild cache watch failed: {e}")
+                self.clear()
+                await asyncio.sleep(30)
+
+    # ==================================================
+    # Stats
+    # ==================================================
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "hit_ratio": round(self.hit_ratio, 4),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
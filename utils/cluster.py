@@ -0,0 +1,107 @@
+# utils/cluster.py
+import asyncio
+import datetime
+import math
+import os
+import time
+
+import discord
+
+ACTIVITY_TYPES = {
+    "watching": discord.ActivityType.watching,
+    "listening": discord.ActivityType.listening,
+    "competing": discord.ActivityType.competing,
+}
+
+
+def build_activity(activity_type: str, message: str):
+    """Return a discord activity for `.status`, or None for an unknown type."""
+    if activity_type == "playing":
+        return discord.Game(name=message)
+    if activity_type in ACTIVITY_TYPES:
+        return discord.Activity(type=ACTIVITY_TYPES[activity_type], name=message)
+    return None
+
+
+class ClusterReporter:
+    """Heartbeats this process's shard health to Mongo and applies presence changes made on any cluster."""
+
+    def __init__(self, bot, cluster_id: int, interval: float = 15.0):
+        self.bot = bot
+        self.cluster_id = cluster_id
+        self.interval = interval
+        self.presence_version = None
+        self._task = None
+
+    @property
+    def clusters(self):
+        return self.bot.db.clusters
+
+    @property
+    def state(self):
+        return self.bot.db.bot_state
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await self.heartbeat()
+                await self.sync_presence()
+            except Exception as e:
+                print(f"Cluster heartbeat failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def health(self) -> dict:
+        shards = {
+            str(shard_id): {
+                "latency_ms": None if math.isnan(shard.latency) else round(shard.latency * 1000),
+                "closed": shard.is_closed(),
+            }
+            for shard_id, shard in self.bot.shards.items()
+        }
+        return {
+            "shard_ids": sorted(self.bot.shards),
+            "shard_count": self.bot.shard_count,
+            "shards": shards,
+            "guilds": len(self.bot.guilds),
+            "ready": self.bot.is_ready(),
+            "pid": os.getpid(),
+            "started_at": self.bot.started_at,
+            "updated_at": datetime.datetime.utcnow(),
+        }
+
+    async def heartbeat(self):
+        await self.clusters.update_one({"_id": self.cluster_id}, {"$set": self.health()}, upsert=True)
+
+    async def all_health(self) -> list:
+        return await self.clusters.find().sort("_id", 1).to_list(None)
+
+    # ==================================================
+    # Presence shared by every cluster
+    # ==================================================
+    async def set_presence(self, activity_type: str, message: str):
+        version = time.time()
+        await self.state.update_one(
+            {"_id": "presence"},
+            {"$set": {"type": activity_type, "message": message, "version": version}},
+            upsert=True
+        )
+        self.presence_version = version
+        await self.bot.change_presence(activity=build_activity(activity_type, message))
+
+    async def sync_presence(self):
+        doc = await self.state.find_one({"_id": "presence"})
+        if doc and doc.get("version") != self.presence_version:
+            self.presence_version = doc.get("version")
+            activity = build_activity(doc["type"], doc["message"])
+            if activity:
+                await self.bot.change_presence(activity=activity)
@@ -1,21 +1,153 @@
 # utils/db.py
+import asyncio
+
 from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
+from pymongo import ASCENDING, IndexModel
+
+from utils import metrics
+from utils.afk import AFK_TTL
+
+DB_NAME = "prime_bot"
+LEGACY_DB_NAMES = ("PrimeBot", "primebot")  # consolidated by scripts/consolidate_databases.py
+
+# created at startup; stores assume these exist
+INDEXES = {
+    "guilds": [
+        IndexModel([("guild_id", ASCENDING)], name="guild_id"),
+    ],
+    "warns": [
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING)], unique=True, name="guild_user"),
+    ],
+    "warn_entries": [
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING), ("time", ASCENDING)], name="guild_user_time"),
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING), ("expires_at", ASCENDING)], name="guild_user_expiry"),
+        # entries without expires_at are never touched by the TTL monitor
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="warn_ttl"),
+    ],
+    "scheduled_actions": [
+        IndexModel([("key", ASCENDING)], unique=True, name="key"),
+        IndexModel([("due", ASCENDING)], name="due"),
+        IndexModel([("guild_id", ASCENDING)], name="guild_id"),
+    ],
+    "command_usage": [
+        IndexModel([("hour", ASCENDING), ("command", ASCENDING), ("guild_id", ASCENDING)], unique=True, name="hour_command_guild"),
+        IndexModel([("hour", ASCENDING)], expireAfterSeconds=90 * 86400, name="usage_ttl"),
+    ],
+    "command_latency": [
+        IndexModel([("time", ASCENDING)], expireAfterSeconds=30 * 86400, name="latency_ttl"),
+    ],
+    "afk": [
+        IndexModel([("guild_id", ASCENDING), ("user_id", ASCENDING)], unique=True, name="guild_user"),
+        IndexModel([("since", ASCENDING)], expireAfterSeconds=int(AFK_TTL), name="afk_ttl"),
+    ],
+}
+
+
+class Database:
+    """The bot's single MongoDB connection pool and the collections cogs use.
+
+    One client per process: the pool is sized for the whole bot, every
+    operation has a deadline (`timeout_ms`) instead of hanging on a slow
+    primary, and the metrics listener times each command per collection.
+    New collections get a property here so there is one place to see what
+    the bot stores.
+    """
+
+    def __init__(self, uri: str, name: str = DB_NAME, *, max_pool_size: int = 50, min_pool_size: int = 0,
+                 timeout_ms: int = 10_000, server_selection_timeout_ms: int = 5_000, app_name: str = "prime-bot"):
+        options = dict(
+            maxPoolSize=max_pool_size,
+            minPoolSize=min_pool_size,
+            serverSelectionTimeoutMS=server_selection_timeout_ms,
+            connectTimeoutMS=server_selection_timeout_ms,
+            appname=app_name,
+            event_listeners=[metrics.MongoCommandListener()],
+        )
+        if timeout_ms:
+            options["timeoutMS"] = timeout_ms
+        self.client = AsyncIOMotorClient(uri, **options)
+        self.db = self.client[name]
+
+    @classmethod
+    def from_config(cls, uri: str, config: dict, **kwargs) -> "Database":
+        return cls(
+            uri,
+            max_pool_size=int(config.get("mongo_max_pool_size", 50)),
+            min_pool_size=int(config.get("mongo_min_pool_size", 0)),
+            timeout_ms=int(config.get("mongo_timeout_ms", 10_000)),
+            server_selection_timeout_ms=int(config.get("mongo_server_selection_timeout_ms", 5_000)),
+            **kwargs
+        )
+
+    def __getitem__(self, name: str):
+        return self.db[name]
+
+    async def ping(self):
+        await self.db.command("ping")
+
+    async def ensure_indexes(self) -> list:
+        """Create every index in INDEXES, one createIndexes call per collection; returns failures."""
+        collections = list(INDEXES)
+        results = await asyncio.gather(
+            *(self.db[name].create_indexes(INDEXES[name]) for name in collections), return_exceptions=True
+        )
+        failed = []
+        for name, result in zip(collections, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Could not create indexes on {name}: {result}")
+                failed.append(name)
+        return failed
+
+    def close(self):
+        self.client.close()
+
+    # ==================================================
+    # Collections
+    # ==================================================
+    @property
+    def guilds(self):
+        """Moderation settings per guild (mod log channel, link blocker, anti-spam, warn expiry)."""
+        return self.db.guilds
+
+    @property
+    def server_settings(self):
+        """ServerTools settings per guild, keyed by _id = guild id."""
+        return self.db.server_settings
+
+    @property
+    def warns(self):
+        """Per-user warn counters."""
+        return self.db.warns
+
+    @property
+    def warn_entries(self):
+        return self.db.warn_entries
 
-load_dotenv()
+    @property
+    def afk(self):
+        return self.db.afk
 
-MONGO_URI = os.getenv("MONGO_URI")
+    @property
+    def scheduled_actions(self):
+        """Pending timed actions (temp-bans, role expiry, long mutes); see utils/scheduler.py."""
+        return self.db.scheduled_actions
 
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["PrimeBot"]
+    @property
+    def command_usage(self):
+        """Hourly command counts per guild (utils/analytics.py), kept 90 days."""
+        return self.db.command_usage
 
-# Example collections
-warnings = db["warnings"]
-configs = db["configs"]
+    @property
+    def command_latency(self):
+        """Per-flush command latency percentiles, kept 30 days."""
+        return self.db.command_latency
 
-async def add_warning(user_id: int, guild_id: int, reason: str):
-    await warnings.insert_one({"user_id": user_id, "guild_id": guild_id, "reason": reason})
+    @property
+    def clusters(self):
+        """Heartbeats from each shard cluster."""
+        return self.db.clusters
 
-async def get_warnings(user_id: int, guild_id: int):
-    return await warnings.find({"user_id": user_id, "guild_id": guild_id}).to_list(None)
+    @property
+    def bot_state(self):
+        """Singleton documents: command tree hash, presence."""
+        return self.db.bot_state
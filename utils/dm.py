@@ -0,0 +1,100 @@
+# utils/dm.py
+import asyncio
+import time
+from collections import Counter, OrderedDict
+
+import discord
+
+
+class DMDispatcher:
+    """Background sender for moderation DMs.
+
+    Callers `send()` and return immediately; a few workers deliver the
+    queue so DMs never hold up a command or count against its rate limits
+    while it runs. Users whose DMs are closed (403) go into a bounded
+    negative cache for `closed_ttl` seconds and are skipped instead of
+    retried. Messages that don't fit in a full queue are dropped and counted.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 1000, closed_ttl: float = 6 * 3600, max_closed: int = 50_000):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.closed_ttl = closed_ttl
+        self.max_closed = max_closed
+        self.queue = None
+        self.closed = False
+        self._closed_dms = OrderedDict()  # {user_id: expires_at}, oldest first
+        self._tasks = []
+        self.stats = Counter()  # queued, sent, forbidden, failed, skipped_closed, dropped
+
+    def send(self, user, content: str = None, embed: discord.Embed = None, remember_closed: bool = True) -> bool:
+        """Queue a DM. Pass remember_closed=False when a 403 is expected for other
+        reasons (e.g. the user was just kicked and no longer shares a server)."""
+        if self.closed or user is None:
+            return False
+        if self.dms_closed(user.id):
+            self.stats["skipped_closed"] += 1
+            return False
+        if self.queue is None:
+            # created on first use so it binds to the running loop
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            self.queue.put_nowait((user, content, embed, remember_closed))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def dms_closed(self, user_id: int) -> bool:
+        expires_at = self._closed_dms.get(user_id)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del self._closed_dms[user_id]
+            return False
+        return True
+
+    def _mark_closed(self, user_id: int):
+        self._closed_dms.pop(user_id, None)
+        self._closed_dms[user_id] = time.monotonic() + self.closed_ttl
+        while len(self._closed_dms) > self.max_closed:
+            self._closed_dms.popitem(last=False)
+
+    async def _deliver(self, user, content, embed, remember_closed):
+        try:
+            await user.send(content=content, embed=embed)
+            self.stats["sent"] += 1
+        except discord.Forbidden:
+            # DMs closed, blocked, or no shared server anymore
+            self.stats["forbidden"] += 1
+            if remember_closed:
+                self._mark_closed(user.id)
+        except discord.HTTPException as e:
+            self.stats["failed"] += 1
+            print(f"DM to {user.id} failed: {e}")
+
+    async def _worker(self):
+        while True:
+            user, content, embed, remember_closed = await self.queue.get()
+            try:
+                if not self.dms_closed(user.id):
+                    await self._deliver(user, content, embed, remember_closed)
+                else:
+                    self.stats["skipped_closed"] += 1
+            finally:
+                self.queue.task_done()
+
+    async def close(self, timeout: float = 5.0):
+        """Stop accepting DMs and give the workers `timeout` seconds to drain."""
+        self.closed = True
+        if self.queue is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"Dropped {self.queue.qsize()} queued DMs on shutdown")
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
@@ -0,0 +1,115 @@
+# utils/errors.py
+import asyncio
+import hashlib
+import os
+import time
+import traceback
+from collections import OrderedDict
+
+from utils import metrics
+
+MAX_TRACEBACK = 1800  # leaves room for the header inside Discord's 2000 characters
+
+
+def fingerprint(error: BaseException) -> str:
+    """Stable id for "the same bug": exception type plus the frames it went through.
+
+    Frames are reduced to file name, function and source text, so the id
+    survives line shifts between deploys and ignores the message (which
+    usually carries ids, names or numbers).
+    """
+    parts = [f"{type(error).__module__}.{type(error).__qualname__}"]
+    for frame in traceback.extract_tb(error.__traceback__):
+        parts.append(f"{os.path.basename(frame.filename)}:{frame.name}:{(frame.line or '').strip()}")
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()[:12]
+
+
+class ErrorEntry:
+    __slots__ = ("source", "summary", "count", "suppressed", "first_seen", "last_seen", "last_report")
+
+    def __init__(self, source: str, summary: str, now: float):
+        self.source = source
+        self.summary = summary
+        self.count = 0
+        self.suppressed = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.last_report = 0.0
+
+
+class ErrorReporter:
+    """Deduplicated error reports for the bot log channel.
+
+    The first occurrence of a fingerprint is posted with its traceback.
+    Repeats are only counted, and every `interval` seconds each fingerprint
+    that repeated gets one "N occurrences since last report" line. A
+    fingerprint quiet for `quiet_after` seconds is posted in full again.
+    At most `max_entries` fingerprints are tracked (least recent dropped).
+    """
+
+    def __init__(self, bot, channel_id: int, interval: float = 300.0, quiet_after: float = 3600.0, max_entries: int = 1000):
+        self.bot = bot
+        self.channel_id = channel_id
+        self.interval = interval
+        self.quiet_after = quiet_after
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # {fingerprint: ErrorEntry}, least recently seen first
+        self._task = None
+
+    def report(self, source: str, error: BaseException) -> str:
+        """Count an error and post it if it's new; returns its fingerprint."""
+        fp = fingerprint(error)
+        now = time.monotonic()
+        metrics.ERRORS.inc(type(error).__name__)
+        entry = self.entries.get(fp)
+        if entry is None:
+            entry = self.entries[fp] = ErrorEntry(source, f"{type(error).__name__}: {error}"[:200], now)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(fp)
+        entry.count += 1
+        quiet = now - entry.last_seen >= self.quiet_after
+        entry.last_seen = now
+
+        if entry.count == 1 or quiet:
+            entry.last_report = now
+            entry.suppressed = 0
+            tb = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+            if len(tb) > MAX_TRACEBACK:
+                tb = "…" + tb[-MAX_TRACEBACK:]
+            self.bot.logs.enqueue(self.channel_id, content=f"💥 **Error in `{source}`** (`{fp}`)\n```py\n{tb}\n```")
+        else:
+            entry.suppressed += 1
+            self.start()
+        return fp
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush_summaries()
+
+    def flush_summaries(self):
+        now = time.monotonic()
+        for fp, entry in self.entries.items():
+            if entry.suppressed:
+                minutes = max(1, round((now - entry.last_report) / 60))
+                self.bot.logs.enqueue(
+                    self.channel_id,
+                    content=f"🔁 `{fp}` in `{entry.source}`: **{entry.suppressed}** more occurrences in the last {minutes}m ({entry.count} total) — {entry.summary}"
+                )
+                entry.suppressed = 0
+                entry.last_report = now
+
+    def top(self, limit: int = 10) -> list:
+        """[(fingerprint, ErrorEntry)] with the most occurrences first."""
+        return sorted(self.entries.items(), key=lambda item: item[1].count, reverse=True)[:limit]
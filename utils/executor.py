@@ -0,0 +1,71 @@
+# utils/executor.py
+import asyncio
+import time
+
+import discord
+
+
+class ActionResult:
+    __slots__ = ("done", "failed", "elapsed")
+
+    def __init__(self):
+        self.done = []  # target ids
+        self.failed = {}  # {target_id: reason}
+        self.elapsed = 0.0
+
+
+class ActionExecutor:
+    """Runs one moderation action over many targets with bounded concurrency.
+
+    discord.py already queues requests per rate-limit bucket, so the cap here
+    mostly keeps a 500-member raid cleanup from opening 500 requests at once.
+    429s that still surface are retried after `retry_after`.
+    """
+
+    def __init__(self, concurrency: int = 5, retries: int = 3, progress_interval: float = 2.0):
+        self.concurrency = concurrency
+        self.retries = retries
+        self.progress_interval = progress_interval
+
+    async def run(self, targets: list, action, progress=None) -> ActionResult:
+        """`action(target)` is awaited once per target; `progress(done, failed, total)` is awaited periodically."""
+        result = ActionResult()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+        last_report = start
+
+        async def run_one(target):
+            nonlocal last_report
+            async with semaphore:
+                error = await self._attempt(action, target)
+            if error is None:
+                result.done.append(target.id)
+            else:
+                result.failed[target.id] = error
+            now = time.perf_counter()
+            if progress is not None and now - last_report >= self.progress_interval:
+                last_report = now
+                try:
+                    await progress(len(result.done), len(result.failed), len(targets))
+                except discord.HTTPException:
+                    pass
+
+        await asyncio.gather(*(run_one(target) for target in targets))
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    async def _attempt(self, action, target):
+        for attempt in range(self.retries + 1):
+            try:
+                await action(target)
+                return None
+            except discord.Forbidden:
+                return "missing permissions"
+            except discord.NotFound:
+                return "not found"
+            except discord.HTTPException as e:
+                if e.status == 429 and attempt < self.retries:
+                    await asyncio.sleep(getattr(e, "retry_after", None) or 2 ** attempt)
+                    continue
+                return f"HTTP {e.status}"
+        return "rate limited"
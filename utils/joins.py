@@ -0,0 +1,174 @@
+# utils/joins.py
+import asyncio
+from collections import Counter
+from functools import lru_cache
+from string import Formatter
+
+import discord
+
+TEMPLATE_FIELDS = ("member", "server", "count")
+
+
+class WelcomeTemplate:
+    """A welcome message parsed once into literal text and field names."""
+
+    __slots__ = ("source", "pieces")
+
+    def __init__(self, source: str, pieces: tuple):
+        self.source = source
+        self.pieces = pieces  # ((literal, field or None), ...)
+
+    def render(self, **values) -> str:
+        return "".join(literal + (str(values[field]) if field else "") for literal, field in self.pieces)
+
+
+@lru_cache(maxsize=1024)
+def compile_template(source: str) -> WelcomeTemplate:
+    """Parse and validate a welcome message; raises ValueError for bad placeholders."""
+    pieces = []
+    try:
+        parsed = list(Formatter().parse(source))
+    except ValueError as e:
+        raise ValueError(f"Invalid message format: {e}. Use `{{{{` and `}}}}` for literal braces.")
+    for literal, field, spec, conversion in parsed:
+        if field is not None:
+            if field not in TEMPLATE_FIELDS:
+                allowed = ", ".join(f"`{{{name}}}`" for name in TEMPLATE_FIELDS)
+                raise ValueError(f"Unknown placeholder `{{{field}}}`. Allowed: {allowed}.")
+            if spec or conversion:
+                raise ValueError(f"Formatting options aren't supported in `{{{field}}}`.")
+        pieces.append((literal, field))
+    return WelcomeTemplate(source, tuple(pieces))
+
+
+def join_names(mentions: list, shown: int = 3) -> str:
+    """'A', 'A and B', 'A, B and C', 'A, B, C and 37 others'."""
+    if len(mentions) == 1:
+        return mentions[0]
+    if len(mentions) <= shown:
+        return ", ".join(mentions[:-1]) + " and " + mentions[-1]
+    rest = len(mentions) - shown
+    return ", ".join(mentions[:shown]) + f" and {rest} other" + ("s" if rest != 1 else "")
+
+
+class JoinCoalescer:
+    """Collects joins per guild and hands them over in one batch.
+
+    The first join in a quiet guild opens a `window`; every join inside it
+    is added to the same batch, which is flushed when the window closes or
+    `max_batch` members are waiting.
+    """
+
+    def __init__(self, flush, window: float = 3.0, max_batch: int = 100):
+        self.flush = flush  # coroutine(guild, [members])
+        self.window = window
+        self.max_batch = max_batch
+        self._batches = {}  # {guild_id: [members]}
+        self._tasks = {}
+        self._running = set()  # window and max_batch flushes, kept referenced until done
+
+    def add(self, member: discord.Member):
+        guild_id = member.guild.id
+        batch = self._batches.setdefault(guild_id, [])
+        batch.append(member)
+        if len(batch) >= self.max_batch:
+            self._flush_now(guild_id)
+        elif guild_id not in self._tasks:
+            task = self._tasks[guild_id] = asyncio.create_task(self._wait_and_flush(guild_id))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def _flush_now(self, guild_id: int):
+        task = self._tasks.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+        members = self._batches.pop(guild_id, None)
+        if members:
+            task = asyncio.create_task(self._run(members))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _wait_and_flush(self, guild_id: int):
+        await asyncio.sleep(self.window)
+        self._tasks.pop(guild_id, None)
+        members = self._batches.pop(guild_id, None)
+        if members:
+            await self._run(members)
+
+    async def _run(self, members: list):
+        try:
+            await self.flush(members[0].guild, members)
+        except Exception as e:
+            print(f"Welcome flush failed for {members[0].guild.id}: {e}")
+
+    async def close(self):
+        """Flush every waiting batch now and wait for all flushes to finish."""
+        for guild_id in list(self._batches):
+            self._flush_now(guild_id)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+
+class RoleGrantQueue:
+    """Bounded worker queue for auto-role grants.
+
+    A few workers drain the queue so a join wave becomes a steady stream of
+    add_roles calls instead of hundreds of concurrent requests racing the
+    same rate-limit bucket. discord.py sleeps on 429s itself; members who
+    left or roles we can't grant are dropped.
+    """
+
+    def __init__(self, workers: int = 2, max_size: int = 10_000):
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self.workers = workers
+        self.stats = Counter()
+        self._tasks = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self, timeout: float = 10.0):
+        """Let the workers drain the queue for up to `timeout` seconds, then stop them."""
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        dropped = 0
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            dropped += 1
+        if dropped:
+            self.stats["dropped"] += dropped
+            print(f"Role queue closed with {dropped} auto role grant(s) still pending; dropped them")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def put(self, member: discord.Member, role: discord.Role, reason: str = "Auto role assigned") -> bool:
+        try:
+            self.queue.put_nowait((member, role, reason))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        return True
+
+    async def _worker(self):
+        while True:
+            member, role, reason = await self.queue.get()
+            try:
+                await member.add_roles(role, reason=reason)
+                self.stats["granted"] += 1
+            except asyncio.CancelledError:
+                self.stats["dropped"] += 1  # closed mid-grant
+                raise
+            except (discord.Forbidden, discord.NotFound):
+                self.stats["failed"] += 1
+            except discord.HTTPException as e:
+                self.stats["failed"] += 1
+                print(f"Auto role failed for {member.id} in {member.guild.id}: {e}")
+            finally:
+                self.queue.task_done()
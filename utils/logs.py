@@ -0,0 +1,110 @@
+# utils/logs.py
+import asyncio
+from collections import Counter, deque
+
+import discord
+
+MAX_EMBEDS = 10  # per Discord message
+MAX_CONTENT = 2000
+
+
+class _ChannelQueue:
+    __slots__ = ("items", "wake", "task")
+
+    def __init__(self):
+        self.items = deque()  # [(content, embed)]
+        self.wake = asyncio.Event()
+        self.task = None
+
+
+class LogDispatcher:
+    """Background sender for log channels.
+
+    Callers `enqueue()` and return immediately. Each channel gets its own
+    bounded queue and worker, which coalesces up to 10 embeds (and as much
+    text as fits in 2000 characters) into one message, flushing when a full
+    batch is ready or every `interval` seconds. Items that don't fit in a
+    full queue are dropped and counted.
+    """
+
+    def __init__(self, bot, max_queue: int = 500, interval: float = 2.0):
+        self.bot = bot
+        self.max_queue = max_queue
+        self.interval = interval
+        self.channels = {}  # {channel_id: _ChannelQueue}
+        self.closed = False
+        self.stats = Counter()  # enqueued, dropped, messages, items, failed
+
+    def enqueue(self, channel_id: int, content: str = None, embed: discord.Embed = None) -> bool:
+        if self.closed or not channel_id or (content is None and embed is None):
+            return False
+        queue = self.channels.get(channel_id)
+        if queue is None:
+            queue = self.channels[channel_id] = _ChannelQueue()
+        if len(queue.items) >= self.max_queue:
+            self.stats["dropped"] += 1
+            return False
+        if content is not None and len(content) > MAX_CONTENT:
+            content = content[:MAX_CONTENT - 3] + "..."
+        queue.items.append((content, embed))
+        self.stats["enqueued"] += 1
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._worker(channel_id, queue))
+        if len(queue.items) >= MAX_EMBEDS:
+            queue.wake.set()
+        return True
+
+    def _next_batch(self, queue: _ChannelQueue):
+        lines, embeds, length = [], [], 0
+        while queue.items:
+            content, embed = queue.items[0]
+            if embed is not None and len(embeds) >= MAX_EMBEDS:
+                break
+            if content is not None and lines and length + len(content) + 1 > MAX_CONTENT:
+                break
+            queue.items.popleft()
+            if content is not None:
+                lines.append(content)
+                length += len(content) + 1
+            if embed is not None:
+                embeds.append(embed)
+        return "\n".join(lines) or None, embeds
+
+    async def _send(self, channel_id: int, queue: _ChannelQueue):
+        channel = self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id)
+        while queue.items:
+            content, embeds = self._next_batch(queue)
+            count = len(embeds) + (content is not None)
+            try:
+                await channel.send(content=content, embeds=embeds)
+                self.stats["messages"] += 1
+                self.stats["items"] += count
+            except Exception as e:
+                # rate limits are retried by discord.py itself; anything else drops this batch
+                self.stats["failed"] += count
+                print(f"Failed to send log to {channel_id}: {e}")
+
+    async def _worker(self, channel_id: int, queue: _ChannelQueue):
+        while True:
+            try:
+                await asyncio.wait_for(queue.wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            queue.wake.clear()
+            await self._send(channel_id, queue)
+            if self.closed:
+                return
+
+    async def close(self, timeout: float = 10.0):
+        """Stop accepting logs and let every worker flush what is still queued."""
+        self.closed = True
+        tasks = [queue.task for queue in self.channels.values() if queue.task is not None]
+        for queue in self.channels.values():
+            queue.wake.set()
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            print(f"Timed out flushing {len(pending)} log queues on shutdown")
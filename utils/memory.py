@@ -0,0 +1,118 @@
+# utils/memory.py
+import itertools
+import sys
+
+import discord
+from discord.state import ConnectionState
+
+CACHE_PROFILES = {
+    # discord.py defaults: every member cached, every guild chunked at startup
+    "full": {"members": "all", "chunk_at_startup": True, "max_messages": 1000},
+    # members cached as they join or when a guild is chunked on first need
+    "balanced": {"members": "joined", "chunk_at_startup": False, "max_messages": 1000},
+    # members only from on-demand chunks and lookups, no message cache
+    "lean": {"members": "none", "chunk_at_startup": False, "max_messages": None},
+}
+
+# reachable from members and messages but owned by the guild or client, not by them
+_SHARED = (ConnectionState, discord.Client, discord.Guild, discord.Role, discord.abc.GuildChannel, discord.Thread, discord.Emoji)
+_ATOMS = (str, bytes, int, float, bool, type(None))
+
+
+def cache_options(profile_name: str, intents: discord.Intents, max_messages=...) -> dict:
+    """Client kwargs for a profile; `max_messages` overrides the profile's message cache size."""
+    if profile_name not in CACHE_PROFILES:
+        raise ValueError(f"Unknown cache profile {profile_name!r}, expected one of {', '.join(CACHE_PROFILES)}")
+    profile = CACHE_PROFILES[profile_name]
+    if profile["members"] == "all":
+        flags = discord.MemberCacheFlags.from_intents(intents)
+    elif profile["members"] == "joined":
+        flags = discord.MemberCacheFlags(voice=False, joined=True)
+    else:
+        flags = discord.MemberCacheFlags.none()
+    return {
+        "member_cache_flags": flags,
+        "chunk_guilds_at_startup": profile["chunk_at_startup"],
+        "max_messages": profile["max_messages"] if max_messages is ... else max_messages,
+    }
+
+
+def object_size(obj) -> int:
+    """Approximate bytes held by `obj`: itself plus what it references that isn't shared guild state."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SHARED) or isinstance(item, type):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, _ATOMS):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            for cls in type(item).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    stack.append(getattr(item, name, None))
+            if hasattr(item, "__dict__"):
+                stack.append(item.__dict__)
+    return total
+
+
+def _average_size(objects, sample: int) -> float:
+    sizes = [object_size(obj) for obj in itertools.islice(objects, sample)]
+    return sum(sizes) / len(sizes) if sizes else 0.0
+
+
+def cache_usage(bot, sample: int = 256) -> dict:
+    """Estimated member and message cache memory, per guild and in total.
+
+    Sizes come from a sample of `sample` members and messages spread over
+    the guilds, multiplied out by each guild's counts, so this stays cheap
+    enough for the metrics endpoint.
+    """
+    guilds = bot.guilds
+    # guild.members copies the whole member list; read the cache dict directly
+    members = {guild.id: len(guild._members) for guild in guilds}
+    messages = {}
+    for message in bot.cached_messages:
+        if message.guild is not None:
+            messages[message.guild.id] = messages.get(message.guild.id, 0) + 1
+
+    per_guild = max(1, sample // max(1, len(guilds)))
+    member_sample = itertools.chain.from_iterable(itertools.islice(guild._members.values(), per_guild) for guild in guilds)
+    member_bytes = _average_size(member_sample, sample)
+    message_bytes = _average_size(reversed(bot.cached_messages), sample)
+
+    usage = {
+        guild.id: {
+            "name": guild.name,
+            "members": members[guild.id],
+            "member_bytes": int(members[guild.id] * member_bytes),
+            "messages": messages.get(guild.id, 0),
+            "message_bytes": int(messages.get(guild.id, 0) * message_bytes),
+        }
+        for guild in guilds
+    }
+    return {
+        "member_size": member_bytes,
+        "message_size": message_bytes,
+        "members": sum(members.values()),
+        "messages": len(bot.cached_messages),
+        "member_bytes": sum(entry["member_bytes"] for entry in usage.values()),
+        "message_bytes": sum(entry["message_bytes"] for entry in usage.values()),
+        "guilds": usage,
+    }
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
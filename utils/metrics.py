@@ -0,0 +1,225 @@
+# utils/metrics.py
+# Small Prometheus text-format registry. prometheus_client would pull in a
+# second HTTP stack; the bot only needs counters, gauges and histograms.
+import bisect
+import threading
+import time
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()  # pymongo listeners run on driver threads
+        registry.append(self)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        for labels, value in list(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Either set() directly or give a callback returning {labels_tuple: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), callback=None):
+        super().__init__(name, help, labelnames)
+        self.values = {}
+        self.callback = callback
+
+    def set(self, value: float, *labels):
+        self.values[labels] = value
+
+    def render(self):
+        lines = self.header()
+        values = self.values
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception:
+                values = {}
+        for labels, value in list(values.items()):
+            if value is not None:
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}  # {labels: [bucket counts..., sum, count]}
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            row = self.values.get(labels)
+            if row is None:
+                row = self.values[labels] = [0] * (len(self.buckets) + 2)
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = self.header()
+        for labels, row in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), labels + ('+Inf',))} {row[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {row[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {row[-1]}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+def render() -> str:
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==================================================
+# Bot-wide metrics
+# ==================================================
+COMMAND_LATENCY = Histogram("prime_command_latency_seconds", "Command handling time.", ("command", "kind"))
+LOOP_LAG = Gauge("prime_event_loop_lag_seconds", "How late the event loop woke up a 0.5s sleep.")
+EVENTS = Counter("prime_events_total", "Gateway events dispatched to listeners.", ("event",))
+MONGO_LATENCY = Histogram("prime_mongo_operation_seconds", "MongoDB operation round-trip time.", ("collection", "command"))
+MONGO_FAILURES = Counter("prime_mongo_operation_failures_total", "Failed MongoDB operations.", ("collection", "command"))
+WARNS_EXPIRED = Counter("prime_warns_expired_total", "Expired warns deleted by the compaction task.")
+WARN_COMPACTION_REMOVED = Gauge("prime_warn_compaction_last_removed", "Warns deleted by the last compaction run.")
+WARN_COMPACTION_SECONDS = Histogram("prime_warn_compaction_seconds", "Duration of warn compaction runs.")
+MODERATION_STEPS = Histogram("prime_moderation_step_seconds", "Moderation command steps (action, defer, respond, side effects, total).", ("command", "step"))
+SCHEDULED_ACTIONS = Counter("prime_scheduled_actions_total", "Timed actions run by the scheduler.", ("kind", "outcome"))
+ERRORS = Counter("prime_errors_total", "Unhandled errors reported to the bot log, by exception type.", ("type",))
+GUILD_CHUNKS = Histogram("prime_guild_chunk_seconds", "Time to fetch a guild's member list on first need.",
+                         buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+SPAM_HITS = Counter("prime_spam_detections_total", "Messages flagged by the anti-spam filter.", ("reason",))
+SPAM_TRACKED = Gauge("prime_spam_tracked_members", "Members with an active anti-spam window.")
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Feeds MONGO_LATENCY; pass to the Motor client via event_listeners=[...]."""
+
+    _IGNORED = frozenset(("hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "killCursors"))
+
+    def __init__(self):
+        self._collections = {}  # {request_id: collection}
+
+    def started(self, event):
+        if event.command_name not in self._IGNORED:
+            collection = event.command.get(event.command_name)
+            self._collections[event.request_id] = collection if isinstance(collection, str) else event.database_name
+
+    def succeeded(self, event):
+        collection = self._collections.pop(event.request_id, None)
+        if collection is not None:
+            MONGO_LATENCY.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event):
+        collection = self._collections.pop(event.request_id, None)
+        if collection is not None:
+            MONGO_LATENCY.observe(event.duration_micros / 1e6, collection, event.command_name)
+            MONGO_FAILURES.inc(collection, event.command_name)
+
+
+def bind_bot(bot):
+    """Register gauges that read live state from the running bot."""
+    import math
+    from utils.cache import GuildConfigCache
+
+    Gauge("prime_gateway_latency_seconds", "Websocket heartbeat latency per shard.", ("shard",),
+          callback=lambda: {(shard_id,): None if math.isnan(shard.latency) else shard.latency for shard_id, shard in bot.shards.items()})
+    Gauge("prime_guilds", "Guilds served by this process.", callback=lambda: {(): len(bot.guilds)})
+    Gauge("prime_cache_hit_ratio", "Hit ratio of the guild settings caches.", ("cache",),
+          callback=lambda: {(name, ): cache.hit_ratio for name, cache in GuildConfigCache.instances.items()})
+    Gauge("prime_cache_entries", "Entries held by the guild settings caches.", ("cache",),
+          callback=lambda: {(name, ): len(cache._data) for name, cache in GuildConfigCache.instances.items()})
+    Gauge("prime_cache_loads", "Database loads done by the guild settings caches.", ("cache",),
+          callback=lambda: {(name, ): cache.loads for name, cache in GuildConfigCache.instances.items()})
+    Gauge("prime_pipeline_stage_calls", "Message pipeline stage invocations.", ("stage",),
+          callback=lambda: {(name, ): stats.calls for name, stats in bot.pipeline.stats.items()})
+    Gauge("prime_pipeline_stage_seconds", "Time spent in each message pipeline stage.", ("stage",),
+          callback=lambda: {(name, ): stats.total for name, stats in bot.pipeline.stats.items()})
+    Gauge("prime_log_dispatcher_items", "Log dispatcher counters (enqueued, dropped, messages, items, failed).", ("outcome",),
+          callback=lambda: {(key, ): value for key, value in bot.logs.stats.items()})
+    Gauge("prime_dm_dispatcher_items", "DM dispatcher outcomes (queued, sent, forbidden, failed, skipped_closed, dropped).", ("outcome",),
+          callback=lambda: {(key, ): value for key, value in bot.dms.stats.items()})
+    Gauge("prime_scheduler_loaded_actions", "Scheduled actions held in memory (due within the window).",
+          callback=lambda: {(): len(bot.scheduler._pending)})
+    Gauge("prime_cache_memory_bytes", "Estimated member and message cache memory for the largest guilds and in total.", ("guild", "cache"),
+          callback=lambda: _cache_memory(bot))
+    Gauge("prime_dm_closed_users", "Users currently cached as having closed DMs.", callback=lambda: {(): len(bot.dms._closed_dms)})
+
+
+def _cache_memory(bot, top: int = 20) -> dict:
+    from utils.memory import cache_usage
+
+    usage = cache_usage(bot)
+    values = {("all", "members"): usage["member_bytes"], ("all", "messages"): usage["message_bytes"]}
+    largest = sorted(usage["guilds"].items(), key=lambda item: item[1]["member_bytes"] + item[1]["message_bytes"], reverse=True)
+    for guild_id, entry in largest[:top]:
+        values[(guild_id, "members")] = entry["member_bytes"]
+        values[(guild_id, "messages")] = entry["message_bytes"]
+    return values
@@ -0,0 +1,85 @@
+# utils/pipeline.py
+import time
+
+
+class MessageContext:
+    """Per-message state shared between pipeline stages."""
+
+    __slots__ = ("bot", "message", "command", "stopped", "_guild_config")
+
+    def __init__(self, bot, message, command):
+        self.bot = bot
+        self.message = message
+        self.command = command  # commands.Context, parsed once for the whole pipeline
+        self.stopped = False
+        self._guild_config = None
+
+    @property
+    def is_command(self) -> bool:
+        """True when the message starts with one of the bot's prefixes."""
+        return self.command.prefix is not None
+
+    async def guild_config(self) -> dict:
+        if self._guild_config is None:
+            self._guild_config = await self.bot.guild_cache.get(self.message.guild.id) if self.message.guild else {}
+        return self._guild_config
+
+    def stop(self):
+        """Skip the remaining stages and command handling for this message."""
+        self.stopped = True
+
+
+class StageStats:
+    __slots__ = ("calls", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+
+class MessagePipeline:
+    """Ordered message stages registered by cogs and run once per message by PrimeBot."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.stages = []  # [(order, name, func)], kept sorted
+        self.stats = {}
+
+    def register(self, name: str, func, order: int = 100):
+        self.unregister(name)
+        self.stages.append((order, name, func))
+        self.stages.sort(key=lambda stage: stage[0])
+        self.stats.setdefault(name, StageStats())
+
+    def unregister(self, name: str):
+        self.stages = [stage for stage in self.stages if stage[1] != name]
+
+    async def process(self, message) -> MessageContext:
+        ctx = MessageContext(self.bot, message, await self.bot.get_context(message))
+        for _, name, func in self.stages:
+            start = time.perf_counter()
+            try:
+                await func(ctx)
+            except Exception:
+                await self.bot.on_error(f"pipeline:{name}", message)
+            finally:
+                self.stats[name].record(time.perf_counter() - start)
+            if ctx.stopped:
+                break
+        return ctx
+
+    def report(self) -> list:
+        """[(name, calls, avg_ms, max_ms)] in stage order."""
+        rows = []
+        for _, name, _ in self.stages:
+            s = self.stats[name]
+            avg = s.total / s.calls * 1000 if s.calls else 0.0
+            rows.append((name, s.calls, round(avg, 3), round(s.max * 1000, 3)))
+        return rows
@@ -0,0 +1,140 @@
+# utils/purge.py
+import asyncio
+import datetime
+import re
+import time
+
+import discord
+
+from utils import links
+
+BULK_MAX = 100
+# Discord refuses bulk deletes for messages older than 14 days; keep a margin for clock skew
+BULK_MAX_AGE = datetime.timedelta(days=14) - datetime.timedelta(minutes=5)
+
+
+class PurgeFilter:
+    """Which messages a purge deletes. Every option that is set must match."""
+
+    __slots__ = ("author_id", "pattern", "links", "attachments", "bots")
+
+    def __init__(self, author_id: int = None, pattern: str = None, links: bool = False, attachments: bool = False, bots: bool = False):
+        self.author_id = author_id
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.links = links
+        self.attachments = attachments
+        self.bots = bots
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.author_id or self.pattern or self.links or self.attachments or self.bots)
+
+    def __call__(self, message: discord.Message) -> bool:
+        if self.author_id and message.author.id != self.author_id:
+            return False
+        if self.bots and not message.author.bot:
+            return False
+        if self.attachments and not message.attachments:
+            return False
+        if self.links and not links.extract_domains(message.content):
+            return False
+        if self.pattern and not self.pattern.search(message.content):
+            return False
+        return True
+
+
+class PurgeProgress:
+    __slots__ = ("scanned", "matched", "deleted", "bulk_requests", "slow_deleted", "retried", "failed", "start")
+
+    def __init__(self):
+        self.scanned = 0
+        self.matched = 0
+        self.deleted = 0
+        self.bulk_requests = 0
+        self.slow_deleted = 0  # older than 14 days
+        self.retried = 0  # from a bulk delete that hit NotFound
+        self.failed = 0
+        self.start = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def rate(self) -> float:
+        """Deleted messages per second."""
+        return self.deleted / self.elapsed if self.elapsed else 0.0
+
+
+async def run_purge(channel, amount: int, check=None, *, scan_limit: int = None, before=None, after=None,
+                    progress=None, progress_interval: float = 3.0, slow_delay: float = 1.0) -> PurgeProgress:
+    """Delete up to `amount` messages matching `check`, newest first.
+
+    Messages younger than 14 days go out in 100-message bulk deletes while
+    history is still being scanned; older ones are deleted one by one
+    afterwards with `slow_delay` between requests. `progress(state)` is
+    awaited at most every `progress_interval` seconds.
+    """
+    state = PurgeProgress()
+    bulk_cutoff = discord.utils.utcnow() - BULK_MAX_AGE
+    batch, old, retry = [], [], []
+    last_report = state.start
+
+    async def report(force=False):
+        nonlocal last_report
+        now = time.perf_counter()
+        if progress is not None and (force or now - last_report >= progress_interval):
+            last_report = now
+            try:
+                await progress(state)
+            except discord.HTTPException:
+                pass
+
+    async def flush():
+        if not batch:
+            return
+        try:
+            await channel.delete_messages(batch)
+            state.deleted += len(batch)
+            state.bulk_requests += 1
+        except discord.NotFound:
+            # someone else deleted one of them; retry the rest individually
+            retry.extend(batch)
+        except discord.HTTPException:
+            state.failed += len(batch)
+        batch.clear()
+        await report()
+
+    # newest first even with `after` (discord.py flips to oldest first when it's set)
+    async for message in channel.history(limit=scan_limit or amount, before=before, after=after, oldest_first=False):
+        state.scanned += 1
+        if check is not None and not check(message):
+            continue
+        state.matched += 1
+        if message.created_at > bulk_cutoff:
+            batch.append(message)
+            if len(batch) >= BULK_MAX:
+                await flush()
+        else:
+            old.append(message)
+        if state.matched >= amount:
+            break
+    await flush()
+
+    for message in retry + old:
+        try:
+            await message.delete()
+            state.deleted += 1
+            if message.created_at > bulk_cutoff:
+                state.retried += 1
+            else:
+                state.slow_deleted += 1
+        except discord.NotFound:
+            pass
+        except discord.HTTPException:
+            state.failed += 1
+        await report()
+        await asyncio.sleep(slow_delay)
+
+    await report(force=True)
+    return state
@@ -0,0 +1,193 @@
+# utils/scheduler.py
+import asyncio
+import datetime
+import heapq
+import itertools
+import re
+
+from pymongo import ReturnDocument
+
+from utils import metrics
+
+_DURATION_RE = re.compile(r"(\d+)\s*([smhdw])", re.IGNORECASE)
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(text: str) -> datetime.timedelta:
+    """'30m', '12h', '7d', '1w2d' -> timedelta; raises ValueError on anything else."""
+    text = text.strip()
+    matches = list(_DURATION_RE.finditer(text))
+    if not matches or "".join(m.group(0) for m in matches).replace(" ", "") != text.replace(" ", ""):
+        raise ValueError("Use a duration like `30m`, `12h`, `7d` or `1w2d`.")
+    seconds = sum(int(m.group(1)) * _UNITS[m.group(2).lower()] for m in matches)
+    if seconds <= 0:
+        raise ValueError("The duration must be longer than zero.")
+    return datetime.timedelta(seconds=seconds)
+
+
+class Scheduler:
+    """Timed moderation actions that survive restarts.
+
+    Every action is a document in `scheduled_actions` with a unique `key`
+    (scheduling the same key again moves it) and an indexed `due` time.
+    Only actions due within `window` are held in memory, on a min-heap
+    drained by a single task; the rest are picked up by the periodic
+    refill. Overdue actions found at startup run right away. An action is
+    claimed with find_one_and_delete before its handler runs, so a
+    cancelled or rescheduled action is skipped and nothing runs twice;
+    one whose guild or handler is missing is put back with a backoff.
+    """
+
+    def __init__(self, bot, window: float = 3600.0, batch: int = 10, max_attempts: int = 5):
+        self.bot = bot
+        self.window = window
+        self.batch = batch
+        self.max_attempts = max_attempts
+        self.handlers = {}  # {kind: coroutine(guild, doc)}
+        self._heap = []  # [(due_ts, seq, key)]
+        self._pending = {}  # {key: due_ts} for what's on the heap; stale heap entries are skipped
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @property
+    def collection(self):
+        return self.bot.db.scheduled_actions
+
+    def register(self, kind: str, handler):
+        self.handlers[kind] = handler
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # ==================================================
+    # Scheduling
+    # ==================================================
+    async def schedule(self, kind: str, guild_id: int, user_id: int, due: datetime.datetime, key: str = None, **data) -> str:
+        """Store an action (replacing any with the same key) and return its key."""
+        key = key or f"{kind}:{guild_id}:{user_id}"
+        await self.collection.update_one(
+            {"key": key},
+            {"$set": {"kind": kind, "guild_id": guild_id, "user_id": user_id, "due": due, "data": data, "attempts": 0, "deferred": 0}},
+            upsert=True
+        )
+        self._push(key, due)
+        return key
+
+    async def cancel(self, key: str) -> bool:
+        self._pending.pop(key, None)
+        result = await self.collection.delete_one({"key": key})
+        return result.deleted_count > 0
+
+    async def drop_guild(self, guild_id: int):
+        for key in [key for key in self._pending if key.split(":")[1] == str(guild_id)]:
+            del self._pending[key]
+        await self.collection.delete_many({"guild_id": guild_id})
+
+    def _push(self, key: str, due: datetime.datetime):
+        ts = due.replace(tzinfo=datetime.timezone.utc).timestamp()
+        if ts > self._now() + self.window:
+            self._pending.pop(key, None)  # the refill will find it when it gets close
+            return
+        self._pending[key] = ts
+        heapq.heappush(self._heap, (ts, next(self._seq), key))
+        self._wake.set()
+
+    @staticmethod
+    def _now() -> float:
+        return datetime.datetime.now(datetime.timezone.utc).timestamp()
+
+    # ==================================================
+    # Runner
+    # ==================================================
+    async def refill(self) -> int:
+        """Load actions due within the window (including overdue ones) for guilds on this cluster."""
+        horizon = datetime.datetime.utcnow() + datetime.timedelta(seconds=self.window)
+        loaded = 0
+        cursor = self.collection.find({"due": {"$lte": horizon}}, {"key": 1, "guild_id": 1, "due": 1}).sort("due", 1)
+        async for doc in cursor:
+            if self.bot.get_guild(doc["guild_id"]) is None:
+                continue  # another cluster's guild
+            ts = doc["due"].replace(tzinfo=datetime.timezone.utc).timestamp()
+            if self._pending.get(doc["key"]) != ts:
+                self._push(doc["key"], doc["due"])
+                loaded += 1
+        return loaded
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        next_refill = 0.0
+        while True:
+            try:
+                now = self._now()
+                if now >= next_refill:
+                    await self.refill()
+                    next_refill = now + self.window / 2
+                due = []
+                while self._heap and self._heap[0][0] <= now and len(due) < self.batch:
+                    ts, _, key = heapq.heappop(self._heap)
+                    if self._pending.get(key) == ts:
+                        del self._pending[key]
+                        due.append(key)
+                if due:
+                    await asyncio.gather(*(self._execute(key) for key in due))
+                    continue
+                until = min(next_refill, self._heap[0][0] if self._heap else next_refill)
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, until - self._now()))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Scheduler loop error: {e}")
+                await asyncio.sleep(5)
+
+    async def _execute(self, key: str):
+        doc = await self.collection.find_one_and_delete({"key": key, "due": {"$lte": datetime.datetime.utcnow()}})
+        if doc is None:
+            return  # cancelled, rescheduled or run by someone else
+        kind = doc["kind"]
+        handler = self.handlers.get(kind)
+        guild = self.bot.get_guild(doc["guild_id"])
+        if handler is None or guild is None:
+            # an outage or a cog reload, not a failed action: put it back and try again later
+            deferred = doc.get("deferred", 0) + 1
+            metrics.SCHEDULED_ACTIONS.inc(kind, "deferred")
+            print(f"Scheduled {doc['key']} deferred: {'no handler' if guild else 'guild unavailable'}")
+            delay = min(60 * 2 ** min(deferred, 10), self.window)
+            await self._reschedule(doc, datetime.datetime.utcnow() + datetime.timedelta(seconds=delay), deferred=deferred)
+            return
+        try:
+            await handler(guild, doc)
+            metrics.SCHEDULED_ACTIONS.inc(kind, "done")
+        except Exception as e:
+            await self._retry(doc, e)
+
+    async def _retry(self, doc: dict, error: Exception):
+        attempts = doc.get("attempts", 0) + 1
+        if attempts >= self.max_attempts:
+            metrics.SCHEDULED_ACTIONS.inc(doc["kind"], "failed")
+            print(f"Scheduled {doc['key']} failed {attempts} times, giving up: {error}")
+            return
+        metrics.SCHEDULED_ACTIONS.inc(doc["kind"], "retried")
+        await self._reschedule(doc, datetime.datetime.utcnow() + datetime.timedelta(minutes=2 ** attempts), attempts=attempts)
+
+    async def _reschedule(self, doc: dict, due: datetime.datetime, **fields):
+        """Put a claimed action back with a new due time."""
+        doc.pop("_id", None)
+        # $setOnInsert: if the key was scheduled again meanwhile, the new schedule wins
+        result = await self.collection.find_one_and_update(
+            {"key": doc["key"]},
+            {"$setOnInsert": {**doc, **fields, "due": due}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._push(doc["key"], result["due"])
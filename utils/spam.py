@@ -0,0 +1,109 @@
+# utils/spam.py
+import time
+from array import array
+from collections import OrderedDict
+
+
+def _key(guild_id: int, user_id: int) -> int:
+    return guild_id << 64 | user_id
+
+
+class SpamWindow:
+    """The last `size` messages of one member in a single int64 ring.
+
+    `slots` holds three runs of `size` values: send times in milliseconds,
+    content hashes and mention counts. One array per member keeps the
+    per-entry overhead to a couple of hundred bytes.
+    """
+
+    __slots__ = ("slots", "pos", "last_seen")
+
+    def __init__(self, size: int):
+        self.slots = array("q", bytes(24 * size))  # 0 = empty slot / no text
+        self.pos = 0
+        self.last_seen = 0.0
+
+    def reset(self):
+        self.slots = array("q", bytes(8 * len(self.slots)))
+
+
+class SpamTracker:
+    """Sliding-window flood, mention and duplicate detection per (guild, user).
+
+    Each member gets a fixed ring of their last `max_messages` messages, so
+    a check is O(ring size) and an entry never grows. Members idle for
+    `idle_ttl` seconds are evicted, and at most `max_tracked` members are
+    kept at once (least recently active go first), so memory stays flat no
+    matter how many people talk.
+    """
+
+    def __init__(self, window: float = 8.0, max_messages: int = 7, max_mentions: int = 10,
+                 max_duplicates: int = 4, idle_ttl: float = 60.0, max_tracked: int = 50_000):
+        self.window = window
+        self.max_messages = max_messages
+        self.max_mentions = max_mentions
+        self.max_duplicates = max_duplicates
+        self.idle_ttl = idle_ttl
+        self.max_tracked = max_tracked
+        self._windows = OrderedDict()  # {key: SpamWindow}, least recently active first
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._windows)
+
+    def check(self, guild_id: int, user_id: int, content: str, mentions: int = 0, now: float = None):
+        """Record a message; returns "flood", "mentions", "duplicates" or None."""
+        now = time.monotonic() if now is None else now
+        key = _key(guild_id, user_id)
+        entry = self._windows.get(key)
+        if entry is None:
+            self._evict(now)
+            entry = self._windows[key] = SpamWindow(self.max_messages)
+        else:
+            self._windows.move_to_end(key)
+        entry.last_seen = now
+
+        # content hashes of 0 mean "no text" and never count as duplicates
+        digest = hash(content.casefold().strip()) if content else 0
+        size = self.max_messages
+        slots = entry.slots
+        pos = entry.pos
+        slots[pos] = int(now * 1000)
+        slots[size + pos] = digest
+        slots[2 * size + pos] = mentions
+        entry.pos = (pos + 1) % size
+
+        cutoff = int((now - self.window) * 1000)
+        # the slot we'll overwrite next holds the oldest message in the ring
+        if slots[entry.pos] > cutoff:
+            verdict = "flood"
+        else:
+            total_mentions = duplicates = 0
+            for i in range(size):
+                if slots[i] > cutoff:
+                    total_mentions += slots[2 * size + i]
+                    if digest and slots[size + i] == digest:
+                        duplicates += 1
+            if total_mentions >= self.max_mentions:
+                verdict = "mentions"
+            elif duplicates >= self.max_duplicates:
+                verdict = "duplicates"
+            else:
+                return None
+        # one burst should trigger one action, not one per remaining message
+        entry.reset()
+        return verdict
+
+    def _evict(self, now: float):
+        windows = self._windows
+        idle_before = now - self.idle_ttl
+        while windows:
+            key, oldest = next(iter(windows.items()))
+            if oldest.last_seen > idle_before and len(windows) < self.max_tracked:
+                break
+            del windows[key]
+            self.evictions += 1
+
+    def forget_guild(self, guild_id: int):
+        for key in [key for key in self._windows if key >> 64 == guild_id]:
+            del self._windows[key]
@@ -0,0 +1,124 @@
+# utils/warns.py
+import asyncio
+import datetime
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from utils import metrics
+
+
+class WarnStore:
+    """Warn storage: one document per warn, plus a per-user counter for numbering.
+
+    `counters` (the old `warns` collection) holds {guild_id, user_id, count}
+    and hands out warn numbers atomically. Each warn lives in `entries`, so
+    reads can count and page on the server instead of loading every warn.
+
+    Warns added while a guild has an expiry set carry `expires_at`; a TTL
+    index deletes them, and `compact()` removes whatever the TTL monitor
+    hasn't reached yet. Escalation counts only warns that haven't expired.
+    """
+
+    def __init__(self, counters, entries, compact_interval: float = 3600.0):
+        self.counters = counters
+        self.entries = entries
+        self.compact_interval = compact_interval
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                await self.compact()
+            except Exception as e:
+                print(f"Warn compaction failed: {e}")
+
+    async def next_number(self, guild_id: int, user_id: int) -> int:
+        # documents that predate the counter only have the legacy array; continue from its size
+        pipeline = [{"$set": {"count": {"$add": [
+            {"$ifNull": ["$count", {"$size": {"$ifNull": ["$warns", []]}}]}, 1
+        ]}}}]
+        query = {"guild_id": guild_id, "user_id": user_id}
+        try:
+            doc = await self._increment(query, pipeline)
+        except DuplicateKeyError:
+            # two first-warns raced on the upsert; the loser retries against the new document
+            doc = await self._increment(query, pipeline)
+        return doc["count"]
+
+    async def _increment(self, query, pipeline):
+        return await self.counters.find_one_and_update(
+            query,
+            pipeline,
+            projection={"_id": 0, "count": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def add(self, guild_id: int, user_id: int, reason: str, moderator_id: int, expire_days: int = 0) -> int:
+        """Store a warn and return its number. `expire_days` of 0 keeps it forever."""
+        number = await self.next_number(guild_id, user_id)
+        now = datetime.datetime.utcnow()
+        entry = {
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "number": number,
+            "reason": reason,
+            "moderator": moderator_id,
+            "time": now
+        }
+        if expire_days:
+            entry["expires_at"] = now + datetime.timedelta(days=expire_days)
+        await self.entries.insert_one(entry)
+        return number
+
+    async def count(self, guild_id: int, user_id: int) -> int:
+        return await self.entries.count_documents({"guild_id": guild_id, "user_id": user_id})
+
+    async def count_active(self, guild_id: int, user_id: int) -> int:
+        """Warns that haven't expired, counted on the guild_user_expiry index."""
+        return await self.entries.count_documents({
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "expires_at": {"$not": {"$lte": datetime.datetime.utcnow()}}
+        })
+
+    async def set_expiry(self, guild_id: int, days: int) -> int:
+        """Re-stamp a guild's existing warns for a new expiry; returns how many changed."""
+        if days:
+            update = [{"$set": {"expires_at": {"$add": ["$time", days * 86_400_000]}}}]
+        else:
+            update = {"$unset": {"expires_at": ""}}
+        result = await self.entries.update_many({"guild_id": guild_id}, update)
+        return result.modified_count
+
+    async def compact(self) -> int:
+        """Delete expired warns the TTL monitor hasn't removed yet."""
+        with metrics.WARN_COMPACTION_SECONDS.time():
+            result = await self.entries.delete_many({"expires_at": {"$lte": datetime.datetime.utcnow()}})
+        removed = result.deleted_count
+        metrics.WARNS_EXPIRED.inc(amount=removed)
+        metrics.WARN_COMPACTION_REMOVED.set(removed)
+        if removed:
+            print(f"Warn compaction removed {removed} expired warns")
+        return removed
+
+    async def page(self, guild_id: int, user_id: int, page: int, per_page: int = 10) -> list:
+        cursor = self.entries.find(
+            {"guild_id": guild_id, "user_id": user_id},
+            {"_id": 0, "number": 1, "reason": 1, "moderator": 1, "time": 1}
+        ).sort("time", ASCENDING).skip(page * per_page).limit(per_page)
+        return await cursor.to_list(per_page)
+
+    async def clear(self, guild_id: int, user_id: int):
+        await self.counters.delete_one({"guild_id": guild_id, "user_id": user_id})
+        await self.entries.delete_many({"guild_id": guild_id, "user_id": user_id})